@@ -1,8 +1,10 @@
 """API endpoints for the GhostWriter backend."""
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import asyncio
+import json
 import sys
 import os
 from datetime import datetime
@@ -12,21 +14,34 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from helpers.wordpress_checker import is_wordpress
-from helpers.threads_api import publish_to_threads, check_threads_connection
-from helpers.facebook_api import publish_to_facebook, check_facebook_connection, get_facebook_pages
-from backend.services.image_generator import generate_image
-
-from ghostwriter_agent.agent import runner
-from ghostwriter_agent.sub_agents import (
-    build_trend_watcher_agent,
-    build_content_strategist_agent,
-    build_content_creator_agent,
-    build_publisher_agent,
-    build_evaluator_agent,
-    build_image_generator_agent,
+from helpers.wordpress_checker import ais_wordpress
+from helpers.threads_api import acheck_threads_connection
+from helpers.facebook_api import acheck_facebook_connection, aget_facebook_pages
+from helpers.model_limiter import ModelBusy, model_limiter
+from helpers import circuit_breaker
+from backend.services.image_generator import agenerate_image
+from backend.services.loop_monitor import monitor as loop_monitor
+from backend.services.request_cancel import tracker as disconnect_tracker
+from backend.services.post_store import post_store
+from backend.services.post_dispatcher import post_dispatcher
+from backend.services.publishing import ProviderUnavailable, PublishError, publish_post
+from backend.services.publish_jobs import publish_jobs
+from backend.services.session_cache import session_cache
+from backend.services.chat_context import ContextTooLarge, chat_context
+from backend.services.content_cache import content_cache, make_key
+from backend.services.topic_index import topic_index
+from backend.services.singleflight import singleflight
+from backend.services.hedging import hedger
+from backend.services.stage_memo import stage_memo
+from backend.services.platform_content import (
+    PLATFORM_SPECS, format_section, generation_config, parse_section, section_prompt
 )
 
+from backend.services.agent_registry import UnknownAgentError, agent_registry
+from ghostwriter_agent.config import MODEL_ROUTES, model_router
+from ghostwriter_agent.pipeline import FULL_CYCLE, extract_json
+from ghostwriter_agent.tools import live_publish
+
 router = APIRouter()
 
 
@@ -45,11 +60,17 @@ class ImageGenerationRequest(BaseModel):
 class AgentRunRequest(BaseModel):
     topic: str
     prompt: Optional[str] = None
+    bypass_cache: Optional[bool] = False  # re-run memoized trend/strategy stages
+    user_id: Optional[str] = None  # fair-queue key for the cycle's model calls
+    deadline_ms: Optional[int] = None  # time budget for the full cycle (default AGENT_CYCLE_DEADLINE_MS)
+    publish: bool = False  # let the publisher stage really post (otherwise a dry run)
 
 
 class ContentGenerationRequest(BaseModel):
     topic: str
     tone: Optional[str] = "Informative and Professional"
+    bypass_cache: Optional[bool] = False  # force a fresh generation (result is still cached)
+    user_id: Optional[str] = None  # fair-queue key for the model calls
 
 
 class ScheduledPostRequest(BaseModel):
@@ -58,6 +79,10 @@ class ScheduledPostRequest(BaseModel):
     content: str
     date_time: str
     image_url: Optional[str] = None
+    # Optional Threads/Facebook credentials so the dispatcher can auto-publish
+    access_token: Optional[str] = None
+    page_id: Optional[str] = None
+    page_access_token: Optional[str] = None
 
 
 class ScheduledPostsRequest(BaseModel):
@@ -94,6 +119,8 @@ class ChatResponse(BaseModel):
     follow_up: Optional[str] = None
     session_id: Optional[str] = None
     history: Optional[list] = None
+    # True when the model was skipped under overload and the template answered
+    degraded: bool = False
 
 
 # WordPress Checker Endpoint
@@ -101,7 +128,7 @@ class ChatResponse(BaseModel):
 async def check_wordpress(request: WordPressCheckRequest):
     """Check if a URL is a WordPress site."""
     try:
-        result = is_wordpress(request.url)
+        result = await ais_wordpress(request.url)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking WordPress: {str(e)}")
@@ -124,8 +151,12 @@ async def generate_image_endpoint(request: ImageGenerationRequest):
         # Extract a concise prompt from content (first 100 chars)
         image_prompt = prompt_text[:100].strip()
         
-        # Try to generate image using the service
-        result = generate_image(image_prompt, request.style)
+        # Try to generate image using the service (identical concurrent requests share one call)
+        result = await singleflight.do(
+            "image",
+            {"prompt": image_prompt, "style": request.style},
+            lambda: agenerate_image(image_prompt, request.style)
+        )
         
         # If service fails or not configured, return a placeholder
         if not result.get("success"):
@@ -159,10 +190,109 @@ async def generate_image_endpoint(request: ImageGenerationRequest):
 # Agent Endpoints
 @router.post("/agents/run-full-cycle")
 async def run_full_agent_cycle(request: AgentRunRequest):
-    """Run the full GhostWriter agent cycle."""
+    """Run the full GhostWriter agent cycle.
+
+    With GOOGLE_API_KEY set, the sub-agents run as a fixed stage pipeline
+    (ghostwriter_agent/pipeline.py) and the response carries each stage's
+    output (`stages`), the structured values handed between stages (`state`),
+    timings (`timings`) and a prompt-token comparison against re-sending the
+    upstream replies (`tokens`). Without a key, demo content is
+    returned. Trend and strategy results are memoized per topic for a
+    freshness window (`bypass_cache` re-runs them). The response includes
+    `similar`: earlier cycle results for near-duplicate topics.
+
+    The cycle has a time budget (`deadline_ms`, default AGENT_CYCLE_DEADLINE_MS)
+    split across the stages. Stages that run out of theirs are marked "timeout"
+    and replaced by memoized or default output where there is one, so a response
+    always arrives within the budget; `completed` lists the stages that really
+    ran and `partial` is true when any did not.
+
+    The publisher stage is a dry run unless `publish` is true, so generating
+    content never posts to WordPress, Threads or Facebook by itself.
+    """
     topic = request.topic
     tone = "Informative and Professional"
+    similar = _similar_drafts("agent-cycle", topic)
+    cycle = {"outputs": {}, "state": {}, "timings": {}, "errors": {}, "tokens": {}, "completed": [],
+             "partial": False, "total_ms": 0}
+
+    if os.getenv("GOOGLE_API_KEY"):
+        inputs = {"topic": topic, "notes": f" {request.prompt}" if request.prompt else ""}
+
+        async def run_stage(agent, prompt, state):
+            user_id = request.user_id or "pipeline"
+            token = live_publish.set(request.publish)
+            try:
+                return (await agent_registry.run(agent, prompt, user_id=user_id, state=state))["result"]
+            finally:
+                live_publish.reset(token)
+
+        deadline_ms = AGENT_CYCLE_DEADLINE_MS if request.deadline_ms is None else request.deadline_ms
+        deadline = deadline_ms / 1000 if deadline_ms > 0 else None
+
+        # Identical concurrent cycles of one user share a pipeline run; the run is
+        # charged to that user's fair-queue key and agent sessions
+        cycle = await singleflight.do(
+            "agent-cycle",
+            {**inputs, "bypass_cache": bool(request.bypass_cache), "deadline_ms": deadline_ms,
+             "publish": request.publish, "user_id": request.user_id},
+            lambda: FULL_CYCLE.run(inputs, run_stage, memo=stage_memo, refresh=bool(request.bypass_cache),
+                                   count_tokens=chat_context.count_tokens, deadline=deadline)
+        )
+
+    if cycle["outputs"].get("content_creator"):
+        outputs = _cycle_outputs(topic, tone, cycle["outputs"]["content_creator"])
+    else:
+        outputs = _demo_cycle_outputs(topic, tone)
+    _remember_content(make_key(topic, tone, "agent-cycle", AGENT_CYCLE_VERSION), "agent-cycle", topic, tone,
+                      outputs=outputs)
     
+    return {
+        "success": True,
+        "outputs": outputs,
+        "topic": topic,
+        "stages": cycle["outputs"],
+        "state": cycle["state"],
+        "timings": cycle["timings"],
+        "errors": cycle["errors"],
+        "tokens": cycle["tokens"],
+        "completed": cycle["completed"],
+        "partial": cycle["partial"],
+        "total_ms": cycle["total_ms"],
+        "similar": similar
+    }
+
+
+def _cycle_outputs(topic, tone, creator_text):
+    """Platform outputs from the content creator's per-channel assets."""
+    assets = (extract_json(creator_text) or {}).get("assets")
+    if not isinstance(assets, dict) or not assets:
+        return _build_outputs(topic, tone, creator_text)
+
+    def asset(channel):
+        for name, value in assets.items():
+            if name.lower() == channel and isinstance(value, dict):
+                return value
+        return next((value for value in assets.values() if isinstance(value, dict)), {})
+
+    def hashtags(value):
+        tags = value.get("hashtags") or []
+        return " ".join(tags) if isinstance(tags, list) else str(tags)
+
+    facebook, instagram = asset("facebook"), asset("instagram")
+    scripts = [value.get("video_script") or value.get("caption") or ""
+               for value in assets.values() if isinstance(value, dict)]
+    body = next((script for script in scripts if script), creator_text)
+    return {
+        "master": f"## {topic}\n\n{body}\n\n**Tone: {tone}**",
+        "facebook": f"💡 {topic}\n\n{facebook.get('caption', '')}\n\n{hashtags(facebook)}".rstrip(),
+        "wordpress": f"<h1>{topic}</h1>\n\n" + "\n\n".join(f"<p>{script}</p>" for script in scripts if script),
+        "instagram": f"🔥 {topic}!\n\n{instagram.get('caption', '')}\n\n{hashtags(instagram)}".rstrip(),
+    }
+
+
+def _demo_cycle_outputs(topic, tone):
+    """Demo cycle content, used when no API key is configured or the creator stage failed."""
     # Generate quality demo content without relying on external API
     agent_text = f"""Artificial Intelligence is revolutionizing the way we live and work. From smart assistants to autonomous vehicles, AI technologies are becoming increasingly integrated into our daily lives.
 
@@ -183,131 +313,255 @@ As we look to the future, {topic} will continue to evolve, bringing new opportun
 <h2>Looking Forward</h2>
 <p>{agent_text.split(chr(10)+chr(10))[2] if len(agent_text.split(chr(10)+chr(10))) > 2 else ''}</p>"""
     instagram = f"🔥 {topic}!\n\n{agent_text[:150]}...\n\n#{topic.split()[0] if topic.split() else 'Content'} #Tech #Future #Innovation"
-    
+    outputs = {
+        "master": master,
+        "facebook": facebook,
+        "wordpress": wordpress,
+        "instagram": instagram
+    }
+    return outputs
+
+
+@router.delete("/agents/stage-cache")
+async def invalidate_stage_cache(stage: Optional[str] = None, topic: Optional[str] = None):
+    """Drop memoized run-full-cycle stage results (optionally one stage and/or topic)."""
     return {
         "success": True,
-        "outputs": {
-            "master": master,
-            "facebook": facebook,
-            "wordpress": wordpress,
-            "instagram": instagram
-        },
-        "topic": topic
+        "invalidated": stage_memo.invalidate(stage, topic)
     }
 
 
-@router.post("/agents/trend-watcher")
-async def run_trend_watcher(request: Dict[str, Any]):
-    """Run the trend watcher agent."""
+@router.post("/agents/{name}")
+async def run_agent_endpoint(name: str, request: Dict[str, Any]):
+    """Run one sub-agent (trend-watcher, content-strategist, content-creator,
+    publisher, evaluator, image-generator).
+
+    Body: `prompt` (or `topic` for trend-watcher), optional `user_id`, and
+    optional `session_id` to continue an earlier conversation with the agent.
+    """
     try:
-        agent = build_trend_watcher_agent()
-        from google.adk.runners import InMemoryRunner
-        runner_instance = InMemoryRunner(agent=agent)
-        
-        prompt = request.get("prompt", f"Find trends for: {request.get('topic', 'general')}")
-        result = await runner_instance.run_debug(prompt)
+        spec = agent_registry.spec(name)
+    except UnknownAgentError:
+        raise HTTPException(status_code=404, detail=f"Unknown agent: {name}")
+    try:
+        prompt = request.get("prompt") or spec.default_prompt(request)
+        user_id = str(request.get("user_id") or "anonymous")
+        session_id = request.get("session_id")
+        if session_id:
+            result = await agent_registry.run(name, prompt, user_id, session_id)
+        else:
+            # Identical concurrent one-shot requests share one run
+            result = await singleflight.do(
+                f"agent:{name}",
+                {"prompt": prompt, "user_id": user_id},
+                lambda: agent_registry.run(name, prompt, user_id)
+            )
         
         return {
             "success": True,
-            "result": str(result)
+            "result": result["result"],
+            "session_id": result["session_id"]
         }
+    except ModelBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error running trend watcher: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error running {name.replace('-', ' ')}: {str(e)}")
 
 
-@router.post("/agents/content-strategist")
-async def run_content_strategist(request: Dict[str, Any]):
-    """Run the content strategist agent."""
-    try:
-        agent = build_content_strategist_agent()
-        from google.adk.runners import InMemoryRunner
-        runner_instance = InMemoryRunner(agent=agent)
-        
-        prompt = request.get("prompt", "Create a content strategy")
-        result = await runner_instance.run_debug(prompt)
-        
-        return {
-            "success": True,
-            "result": str(result)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error running content strategist: {str(e)}")
+CONTENT_PLATFORMS = ("master", "facebook", "wordpress", "instagram")
+# Bump when the section prompts/specs change so cached drafts from the old prompts are not served
+CONTENT_PROMPT_VERSION = "2"
+# Bump when the run-full-cycle output format changes
+AGENT_CYCLE_VERSION = "2"
+# Default time budget for a full cycle, split across its stages (0 = none)
+AGENT_CYCLE_DEADLINE_MS = int(os.getenv("AGENT_CYCLE_DEADLINE_MS", "60000"))
 
 
-@router.post("/agents/content-creator")
-async def run_content_creator(request: Dict[str, Any]):
-    """Run the content creator agent."""
-    try:
-        agent = build_content_creator_agent()
-        from google.adk.runners import InMemoryRunner
-        runner_instance = InMemoryRunner(agent=agent)
-        
-        prompt = request.get("prompt", "Create content")
-        result = await runner_instance.run_debug(prompt)
-        
-        return {
-            "success": True,
-            "result": str(result)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error running content creator: {str(e)}")
+def _build_output(platform, topic, tone, agent_text):
+    """Format one free-form text for a platform (no-key content and older cached drafts)."""
+    if platform == "master":
+        return f"## {topic}\n\n{agent_text}\n\n**Tone: {tone}**"
+    if platform == "facebook":
+        return f"💡 {topic}\n\n{agent_text[:500]}...\n\n#{topic.replace(' ', '')} #ContentStrategy #AI"
+    if platform == "wordpress":
+        return f"<h1>{topic}</h1>\n\n<p>{agent_text}</p>"
+    return f"🔥 {topic}!\n\n{agent_text[:150]}...\n\n#{topic.split()[0] if topic.split() else 'Content'}"
 
 
-@router.post("/agents/publisher")
-async def run_publisher(request: Dict[str, Any]):
-    """Run the publisher agent."""
-    try:
-        agent = build_publisher_agent()
-        from google.adk.runners import InMemoryRunner
-        runner_instance = InMemoryRunner(agent=agent)
-        
-        prompt = request.get("prompt", "Publish content")
-        result = await runner_instance.run_debug(prompt)
-        
-        return {
-            "success": True,
-            "result": str(result)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error running publisher: {str(e)}")
+def _build_outputs(topic, tone, agent_text):
+    return {platform: _build_output(platform, topic, tone, agent_text) for platform in CONTENT_PLATFORMS}
+
+
+def _fallback_outputs(topic, tone):
+    fallback_text = f"Explore the fascinating world of {topic}. This topic offers many opportunities for engagement and learning."
+    return {
+        "master": f"## {topic}\n\n{fallback_text}\n\n**Tone: {tone}**",
+        "facebook": f"💡 {topic}\n\n{fallback_text}\n\n#{topic.replace(' ', '')} #ContentStrategy",
+        "wordpress": f"<h1>{topic}</h1>\n\n<p>{fallback_text}</p>",
+        "instagram": f"🔥 {topic}!\n\n{fallback_text[:100]}...\n\n#{topic.split()[0] if topic.split() else 'Content'}"
+    }
+
 
+def _content_models():
+    """Primary models of the content routes, part of the content cache key.
+
+    Only output from these models is cached; a section served by a cheaper
+    tier (failover or cascade) leaves the result uncached.
+    """
+    return "+".join(sorted({MODEL_ROUTES[spec.task].primary for spec in PLATFORM_SPECS.values()}))
+
+
+def _cached_content_outputs(request):
+    """Cached outputs for this topic/tone, honoring `bypass_cache`.
+
+    Returns:
+        Tuple of (cache key, cached outputs or None)
+    """
+    key = make_key(request.topic, request.tone, _content_models(), CONTENT_PROMPT_VERSION)
+    if request.bypass_cache:
+        content_cache.record_bypass()
+        return key, None
+    cached = content_cache.get(key)
+    return key, cached["outputs"] if cached else None
+
+
+async def _generate_section(platform, topic, tone, user_key):
+    """
+    Generate one platform's output with a schema-constrained, length-capped call.
+
+    The call waits for a slot in the shared model limiter, queued under `user_key`,
+    and is hedged when it runs past the platform's usual latency. The model comes
+    from the platform's route in `model_router`, which fails over to cheaper tiers.
+
+    Returns:
+        Tuple of (output, cacheable). `cacheable` is False if a cheaper tier
+        answered instead of the route's primary model, and the output is the
+        platform's template fallback if the call failed or returned nothing usable
+    """
+    import google.generativeai as genai
+
+    prompt = section_prompt(platform, topic, tone)
+    task = PLATFORM_SPECS[platform].task
+
+    async def attempt(name):
+        response = await genai.GenerativeModel(name).generate_content_async(
+            prompt, generation_config=generation_config(platform)
+        )
+        return response.text, name
+
+    async def call():
+        async with model_limiter.slot("generate-content", key=user_key):
+            hedger.started()
+            return await model_router.call(task, attempt)
+
+    async def generate():
+        return await hedger.run(f"generate-content:{platform}", call)
 
-@router.post("/agents/evaluator")
-async def run_evaluator(request: Dict[str, Any]):
-    """Run the evaluator agent."""
     try:
-        agent = build_evaluator_agent()
-        from google.adk.runners import InMemoryRunner
-        runner_instance = InMemoryRunner(agent=agent)
-        
-        prompt = request.get("prompt", "Evaluate performance")
-        result = await runner_instance.run_debug(prompt)
-        
-        return {
-            "success": True,
-            "result": str(result)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error running evaluator: {str(e)}")
+        # Identical concurrent requests share one model call
+        text, model = await singleflight.do(
+            "generate-content",
+            {"task": task, "platform": platform, "prompt": prompt},
+            generate
+        )
+        output = format_section(platform, topic, tone, parse_section(platform, text))
+        return output, model == MODEL_ROUTES[task].primary
+    except Exception:
+        return _fallback_outputs(topic, tone)[platform], False
 
 
-@router.post("/agents/image-generator")
-async def run_image_generator(request: Dict[str, Any]):
-    """Run the image generator agent."""
+async def _stream_text(task, kind, key, start_stream, served=None):
+    """
+    Stream a model reply's text through the shared limiter and router.
+
+    A background task holds the model slot and reads the model into a queue, so
+    the slot is released when the model finishes, not when a slow client has
+    read the last piece. A model that fails before its first text is retried on
+    the route's next model; later failures are raised to the reader.
+
+    Args:
+        task: Route in `model_router` ("chat", "long_form", ...)
+        kind: Call type for `model_limiter` latency tracking
+        key: Fair-queue key
+        start_stream: Coroutine function starting the stream for a model name
+        served: Optional dict that gets the answering model's name under "model"
+
+    Yields:
+        Non-empty text pieces
+
+    Raises:
+        Exception: the model's error once text was yielded or every model failed,
+            or ModelBusy if no slot was granted
+    """
+    pieces = asyncio.Queue()
+    finished = object()
+
+    async def produce():
+        try:
+            async with model_limiter.slot(kind, key=key):
+                models = model_router.candidates(task)
+                for attempt, model in enumerate(models):
+                    started = False
+                    try:
+                        with model_router.track(task, model):
+                            async for chunk in await start_stream(model):
+                                try:
+                                    text = chunk.text
+                                except ValueError:
+                                    continue  # chunk without text parts (e.g. safety metadata)
+                                if text:
+                                    started = True
+                                    pieces.put_nowait(text)
+                        if served is not None:
+                            served["model"] = model
+                        break
+                    except Exception:
+                        if started or attempt == len(models) - 1:
+                            raise
+                        model_router.failed_over(task)
+            pieces.put_nowait(finished)
+        except Exception as e:
+            pieces.put_nowait(e)
+
+    producer = asyncio.ensure_future(produce())
     try:
-        agent = build_image_generator_agent()
-        from google.adk.runners import InMemoryRunner
-        runner_instance = InMemoryRunner(agent=agent)
-        
-        prompt = request.get("prompt", "Generate image prompt")
-        result = await runner_instance.run_debug(prompt)
-        
-        return {
-            "success": True,
-            "result": str(result)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error running image generator: {str(e)}")
+        while True:
+            piece = await pieces.get()
+            if piece is finished:
+                return
+            if isinstance(piece, Exception):
+                raise piece
+            yield piece
+    finally:
+        # The reader stopped early (client gone): stop the model and free the slot
+        producer.cancel()
+
+
+def _content_user(request):
+    """Fair-queue key for a content request's model calls."""
+    return request.user_id or "anonymous"
+
+
+def _remember_content(key, kind, topic, tone, **value):
+    """Cache a generated result and index its topic for near-duplicate lookups."""
+    content_cache.set(key, {"kind": kind, "topic": topic, "tone": tone, **value})
+    topic_index.add(kind, key, topic)
+
+
+def _similar_drafts(kind, topic, exclude_key=None):
+    """Cached drafts for near-duplicate topics, offered as instant starting points."""
+    drafts = []
+    for similarity, key, match_topic in topic_index.query(kind, topic, exclude_key):
+        cached = content_cache.peek(key)
+        if not cached:
+            continue  # expired
+        outputs = cached.get("outputs") or _build_outputs(match_topic, cached.get("tone"), cached["agent_text"])
+        drafts.append({"topic": match_topic, "similarity": similarity, "outputs": outputs})
+    return drafts
+
+
+def _no_key_text(topic):
+    return f"Discover the latest insights about {topic}. This comprehensive guide explores key aspects and provides valuable information for your audience."
 
 
 @router.post("/generate-content")
@@ -318,81 +572,234 @@ async def generate_content_endpoint(request: ContentGenerationRequest):
         import google.generativeai as genai
         
         api_key = os.getenv("GOOGLE_API_KEY")
+        cached_outputs = None
+        similar = []
+        degraded = False
         if api_key:
+            # Repeat topic/tone combinations are served from the content cache
+            cache_key, cached_outputs = _cached_content_outputs(request)
+        if cached_outputs:
+            outputs = cached_outputs
+        elif api_key and model_limiter.overloaded():
+            # Shed at admission rather than queue behind a saturated model
+            outputs = _fallback_outputs(request.topic, request.tone)
+            degraded = True
+        elif api_key:
+            similar = _similar_drafts("content", request.topic, exclude_key=cache_key)
             genai.configure(api_key=api_key)
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            
-            prompt = f"""Create engaging content about "{request.topic}" with a {request.tone} tone.
-            
-Generate content in the following format:
-1. A master content piece (2-3 paragraphs)
-2. A Facebook post (engaging, with emojis and hashtags)
-3. A WordPress blog post (HTML formatted)
-4. An Instagram caption (short, catchy with hashtags)
-
-Be creative and engaging!"""
-            
-            response = model.generate_content(prompt)
-            agent_text = response.text
+            # One length-capped call per platform, run concurrently
+            sections = await asyncio.gather(*(
+                _generate_section(platform, request.topic, request.tone, _content_user(request))
+                for platform in CONTENT_PLATFORMS
+            ))
+            outputs = {platform: output for platform, (output, _) in zip(CONTENT_PLATFORMS, sections)}
+            if all(ok for _, ok in sections):
+                _remember_content(cache_key, "content", request.topic, request.tone, outputs=outputs)
         else:
             # Fallback if no API key
-            agent_text = f"Discover the latest insights about {request.topic}. This comprehensive guide explores key aspects and provides valuable information for your audience."
-        
-        # Create platform-specific content
-        master = f"## {request.topic}\n\n{agent_text}\n\n**Tone: {request.tone}**"
-        facebook = f"💡 {request.topic}\n\n{agent_text[:500]}...\n\n#{request.topic.replace(' ', '')} #ContentStrategy #AI"
-        wordpress = f"<h1>{request.topic}</h1>\n\n<p>{agent_text}</p>"
-        instagram = f"🔥 {request.topic}!\n\n{agent_text[:150]}...\n\n#{request.topic.split()[0] if request.topic.split() else 'Content'}"
+            outputs = _build_outputs(request.topic, request.tone, _no_key_text(request.topic))
         
         return {
             "success": True,
-            "outputs": {
-                "master": master,
-                "facebook": facebook,
-                "wordpress": wordpress,
-                "instagram": instagram
-            }
+            "cached": bool(cached_outputs),
+            "degraded": degraded,
+            "outputs": outputs,
+            "similar": similar
         }
     except Exception as e:
         # Return a fallback response instead of failing completely
-        fallback_text = f"Explore the fascinating world of {request.topic}. This topic offers many opportunities for engagement and learning."
         return {
             "success": True,
-            "outputs": {
-                "master": f"## {request.topic}\n\n{fallback_text}\n\n**Tone: {request.tone}**",
-                "facebook": f"💡 {request.topic}\n\n{fallback_text}\n\n#{request.topic.replace(' ', '')} #ContentStrategy",
-                "wordpress": f"<h1>{request.topic}</h1>\n\n<p>{fallback_text}</p>",
-                "instagram": f"🔥 {request.topic}!\n\n{fallback_text[:100]}...\n\n#{request.topic.split()[0] if request.topic.split() else 'Content'}"
-            }
+            "cached": False,
+            "degraded": True,
+            "outputs": _fallback_outputs(request.topic, request.tone),
+            "similar": []
         }
 
 
+@router.post("/generate-content/stream")
+async def generate_content_stream_endpoint(request: ContentGenerationRequest):
+    """Streaming variant of /generate-content (NDJSON, one JSON record per line).
 
+    Records, in order of availability:
+    - `{"type": "delta", "platform": "master", "text": ...}` as Gemini streams the master draft
+    - `{"type": "output", "platform": ..., "content": ...}` once a platform's output is final
+      (Facebook, WordPress and Instagram are generated concurrently with the master
+      draft and arrive as soon as each finishes)
+    - `{"type": "summary", "success": true, "cached": bool, "degraded": bool, "outputs": {...}}`
+      with all four outputs, identical to the non-streaming response
 
+    The master draft fails over to the route's next model if it errors before
+    its first delta. Cache hits skip the model and send the four outputs
+    immediately, as do the templates when the model is overloaded (`degraded`). On a miss, a
+    `{"type": "similar", "drafts": [...]}` record with cached drafts for
+    near-duplicate topics is sent first, before the model starts.
+    """
+    topic, tone = request.topic, request.tone
+    user_key = _content_user(request)
+
+    def record(data):
+        return json.dumps(data) + "\n"
+
+    async def records():
+        sent = set()
+        outputs = {}
+        cached_outputs = None
+        degraded = False
+        sections = {}
+        try:
+            try:
+                import google.generativeai as genai
 
-# Persistent session store (file-based)
-import json
-from pathlib import Path
-_SESSION_DIR = Path("sessions")
-_SESSION_DIR.mkdir(exist_ok=True)
+                api_key = os.getenv("GOOGLE_API_KEY")
+                if api_key:
+                    cache_key, cached_outputs = _cached_content_outputs(request)
+                if cached_outputs:
+                    outputs = dict(cached_outputs)
+                elif api_key and model_limiter.overloaded():
+                    degraded = True  # the templates below answer without queueing
+                elif api_key:
+                    similar = _similar_drafts("content", topic, exclude_key=cache_key)
+                    if similar:
+                        yield record({"type": "similar", "drafts": similar})
+                    genai.configure(api_key=api_key)
+                    sections = {
+                        asyncio.ensure_future(_generate_section(platform, topic, tone, user_key)): platform
+                        for platform in CONTENT_PLATFORMS if platform != "master"
+                    }
+                    complete = True
+                    master_text = ""
+                    def start_master(name):
+                        return genai.GenerativeModel(name).generate_content_async(
+                            section_prompt("master", topic, tone),
+                            generation_config=generation_config("master", structured=False),
+                            stream=True
+                        )
+
+                    master_task = PLATFORM_SPECS["master"].task
+                    served = {}
+                    try:
+                        async for text in _stream_text(master_task, "generate-content-stream",
+                                                       user_key, start_master, served):
+                            master_text += text
+                            yield record({"type": "delta", "platform": "master", "text": text})
+                            for task, platform in sections.items():
+                                if task.done() and platform not in sent:
+                                    outputs[platform], ok = task.result()
+                                    complete = complete and ok
+                                    sent.add(platform)
+                                    yield record({"type": "output", "platform": platform,
+                                                  "content": outputs[platform]})
+                    except Exception:
+                        complete = False
+                    # Only the primary model's draft is cached under this key
+                    complete = complete and served.get("model") == MODEL_ROUTES[master_task].primary
+                    if master_text.strip():
+                        outputs["master"] = format_section("master", topic, tone, {"body": master_text})
+                        sent.add("master")
+                        yield record({"type": "output", "platform": "master", "content": outputs["master"]})
+                    else:
+                        complete = False
+
+                    pending = {task for task, platform in sections.items() if platform not in sent}
+                    while pending:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            platform = sections[task]
+                            outputs[platform], ok = task.result()
+                            complete = complete and ok
+                            sent.add(platform)
+                            yield record({"type": "output", "platform": platform, "content": outputs[platform]})
+                    if complete:
+                        _remember_content(cache_key, "content", topic, tone, outputs=outputs)
+                else:
+                    outputs = _build_outputs(topic, tone, _no_key_text(topic))
+            except Exception:
+                pass  # whatever is missing falls back to the templates below
 
-def _load_session(session_id):
-    path = _SESSION_DIR / f"{session_id}.json"
-    if path.exists():
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
-
-def _save_session(session_id, history):
-    path = _SESSION_DIR / f"{session_id}.json"
+            fallback = _fallback_outputs(topic, tone)
+            outputs = {platform: outputs.get(platform) or fallback[platform] for platform in CONTENT_PLATFORMS}
+            for platform in CONTENT_PLATFORMS:
+                if platform not in sent:
+                    yield record({"type": "output", "platform": platform, "content": outputs[platform]})
+            yield record({"type": "summary", "success": True, "cached": bool(cached_outputs),
+                          "degraded": degraded, "outputs": outputs})
+        finally:
+            # Client went away (or we are done): stop any section still generating
+            for task in sections:
+                task.cancel()
+
+    return StreamingResponse(records(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+
+
+# Chat sessions are served from an LRU cache with write-behind (see backend/services/session_cache.py)
+
+_ASK_BRAND_REPLY = (
+    "Thanks — to help with content, please tell me about your brand:"
+    " what you sell, who your audience is, and what tone you prefer."
+)
+_ASK_BRAND_FOLLOW_UP = "Please provide a short description of your brand (products/services, audience, tone)."
+
+
+def _start_chat(request: ChatRequest):
+    """Validate chat input and load the session (shared by /chat and /chat/stream).
+
+    Returns:
+        Tuple of (session_id, history, base_history, brand_info)
+
+    Raises:
+        HTTPException: 413 if the message exceeds the token limit
+    """
+    import uuid
+    # Bound client input before it reaches the model
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(history, f)
-    except Exception:
-        pass
+        chat_context.check_message(request.message)
+    except ContextTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    brand_info = chat_context.truncate_brand(request.brand_info)
+    client_history = chat_context.clamp_history(request.history)
+
+    # Use provided session_id or generate one
+    session_id = request.session_id or str(uuid.uuid4())
+    history = session_cache.get(session_id)
+
+    # If explicit history is provided by frontend, use/extend it
+    base_history = None
+    if client_history:
+        history = client_history
+        base_history = list(client_history)
+    return session_id, history, base_history, brand_info
+
+
+def _follow_up_from(text):
+    """Last line of the reply that asks a question, if any."""
+    if "?" in text:
+        parts = [s.strip() for s in text.split("\n") if s.strip()]
+        for p in reversed(parts):
+            if "?" in p:
+                return p
+    return None
+
+
+def _template_reply(brand_info, user_message):
+    reply_lines = []
+    reply_lines.append(f"Thanks — here are some quick ideas for your brand:")
+    reply_lines.append(f"Brand summary: {brand_info}")
+    reply_lines.append("")
+    reply_lines.append("Suggested messages:")
+    reply_lines.append(f"- Short headline: Try: \"{user_message[:60]}\"")
+    reply_lines.append(f"- Social caption: Speak warmly to your audience and mention benefits; e.g., 'Our {brand_info.split()[0]} helps...' ")
+    reply = "\n".join(reply_lines)
+    follow_up = "Would you like a caption in a specific tone (e.g., playful, formal, educational)?"
+    return reply, follow_up
+
+
+def _sse(event, data):
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -400,115 +807,141 @@ async def chat_endpoint(request: ChatRequest):
     """Brand-aware chatbot endpoint with persistent session/history support.
 
     - Accepts `session_id` in request (or generates one if missing).
-    - Stores and returns conversation history for multi-turn chat (file-based).
+    - Stores and returns conversation history for multi-turn chat (cached, flushed to disk in the background).
     - If `brand_info` is missing, returns a prompt asking for brand details.
     - If `brand_info` is present, uses Google Generative AI if available, else falls back to a template.
+    - While the model is overloaded the template answers immediately, with `degraded: true`.
     """
-    import uuid
+    session_id, history, base_history, brand_info = _start_chat(request)
     try:
-        # Use provided session_id or generate one
-        session_id = request.session_id or str(uuid.uuid4())
-        history = _load_session(session_id)
-
-        # If explicit history is provided by frontend, use/extend it
-        if request.history:
-            history = request.history
-
         # If no brand_info, prompt for it
-        if not request.brand_info:
-            reply = (
-                "Thanks — to help with content, please tell me about your brand:"
-                " what you sell, who your audience is, and what tone you prefer."
-            )
-            follow_up = "Please provide a short description of your brand (products/services, audience, tone)."
-            history.append({"role": "assistant", "content": reply})
-            _save_session(session_id, history[-12:])
+        if not brand_info:
+            reply = _ASK_BRAND_REPLY
+            follow_up = _ASK_BRAND_FOLLOW_UP
+            assistant_turn = {"role": "assistant", "content": reply}
+            history.append(assistant_turn)
+            session_cache.append(session_id, [assistant_turn], base_history)
             return ChatResponse(reply=reply, follow_up=follow_up, session_id=session_id, history=history)
 
         # Build prompt from history
         user_message = request.message or "Please help me with my brand messaging."
-        history.append({"role": "user", "content": user_message})
-
-        # Construct prompt for LLM
-        prompt_lines = []
-        prompt_lines.append("You are a helpful brand assistant. Use the brand information below to respond to the user's message.")
-        prompt_lines.append(f"Brand information: {request.brand_info}")
-        prompt_lines.append("")
-        for turn in history[-6:]:  # last 6 turns
-            prompt_lines.append(f"{turn['role'].capitalize()}: {turn['content']}")
-        prompt_lines.append("")
-        prompt_lines.append("Provide a concise, actionable reply (2-4 short paragraphs) and suggest one follow-up question to clarify the brand further.")
-        prompt_text = "\n".join(prompt_lines)
+        user_turn = {"role": "user", "content": user_message}
+        history.append(user_turn)
+
+        # Construct prompt for LLM: recent turns within the token budget, older ones summarized
+        prompt_text, _ = chat_context.build_prompt(session_id, brand_info, history)
 
         # Prefer Google Generative AI if available
         google_key = os.getenv("GOOGLE_API_KEY")
         reply = None
         follow_up = None
-        if google_key:
+        degraded = False
+        if google_key and model_limiter.overloaded():
+            degraded = True  # shed at admission rather than queue behind a saturated model
+        elif google_key:
             try:
                 import google.generativeai as genai
                 genai.configure(api_key=google_key)
-                response = genai.generate_text(model="text-bison-001", input=prompt_text)
-                text = None
-                if hasattr(response, "text") and response.text:
-                    text = response.text
-                else:
-                    try:
-                        text = response.candidates[0].content
-                    except Exception:
-                        text = str(response)
-                reply = text
-                if "?" in text:
-                    parts = [s.strip() for s in text.split("\n") if s.strip()]
-                    for p in reversed(parts):
-                        if "?" in p:
-                            follow_up = p
-                            break
+
+                async def attempt(name):
+                    return await genai.GenerativeModel(name).generate_content_async(prompt_text)
+
+                async def call():
+                    async with model_limiter.slot("chat", key=session_id):
+                        hedger.started()
+                        return await model_router.call("chat", attempt)
+
+                response = await hedger.run("chat", call)
+                reply = response.text
+                follow_up = _follow_up_from(reply)
             except Exception:
                 pass
 
         if not reply:
-            reply_lines = []
-            reply_lines.append(f"Thanks — here are some quick ideas for your brand:")
-            reply_lines.append(f"Brand summary: {request.brand_info}")
-            reply_lines.append("")
-            reply_lines.append("Suggested messages:")
-            reply_lines.append(f"- Short headline: Try: \"{user_message[:60]}\"")
-            reply_lines.append(f"- Social caption: Speak warmly to your audience and mention benefits; e.g., 'Our {request.brand_info.split()[0]} helps...' ")
-            reply = "\n".join(reply_lines)
-            follow_up = "Would you like a caption in a specific tone (e.g., playful, formal, educational)?"
-
-        history.append({"role": "assistant", "content": reply})
-        _save_session(session_id, history[-12:])
-
-        return ChatResponse(reply=reply, follow_up=follow_up, session_id=session_id, history=history)
+            reply, follow_up = _template_reply(brand_info, user_message)
+
+        assistant_turn = {"role": "assistant", "content": reply}
+        history.append(assistant_turn)
+        session_cache.append(session_id, [user_turn, assistant_turn], base_history)
+
+        return ChatResponse(reply=reply, follow_up=follow_up, session_id=session_id, history=history,
+                            degraded=degraded)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in chat endpoint: {str(e)}")
 
 
-# Scheduled Posts Endpoints
-_POSTS_DIR = Path("scheduled_posts")
-_POSTS_DIR.mkdir(exist_ok=True)
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Streaming variant of /chat (server-sent events).
+
+    Emits `token` events (`{"text": ...}`) as Gemini produces the reply, then
+    one `done` event with `reply`, `follow_up`, `session_id`, `history_delta`
+    (the turns persisted for this request) and `degraded`. Falls back to the
+    template reply, sent as a single token event, when the model is unavailable
+    or overloaded (`degraded`). A model that fails before its first token is
+    retried on the chat route's next model.
+    Failures after the stream has started are reported as an `error` event
+    (with `partial_reply` if the model stopped mid-reply); nothing is saved then.
+    """
+    session_id, history, base_history, brand_info = _start_chat(request)
 
-def _load_user_posts(user_id: str):
-    """Load scheduled posts for a user from file."""
-    path = _POSTS_DIR / f"{user_id}.json"
-    if path.exists():
+    async def events():
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
-
-def _save_user_posts(user_id: str, posts: list):
-    """Save scheduled posts for a user to file."""
-    path = _POSTS_DIR / f"{user_id}.json"
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(posts, f, indent=2)
-    except Exception:
-        pass
+            if not brand_info:
+                assistant_turn = {"role": "assistant", "content": _ASK_BRAND_REPLY}
+                yield _sse("token", {"text": _ASK_BRAND_REPLY})
+                session_cache.append(session_id, [assistant_turn], base_history)
+                yield _sse("done", {"reply": _ASK_BRAND_REPLY, "follow_up": _ASK_BRAND_FOLLOW_UP,
+                                    "session_id": session_id, "history_delta": [assistant_turn]})
+                return
+
+            user_message = request.message or "Please help me with my brand messaging."
+            user_turn = {"role": "user", "content": user_message}
+            history.append(user_turn)
+            prompt_text, _ = chat_context.build_prompt(session_id, brand_info, history)
+
+            reply = ""
+            google_key = os.getenv("GOOGLE_API_KEY")
+            degraded = bool(google_key) and model_limiter.overloaded()
+            if google_key and not degraded:
+                try:
+                    import google.generativeai as genai
+                    genai.configure(api_key=google_key)
+
+                    def start_reply(name):
+                        return genai.GenerativeModel(name).generate_content_async(prompt_text, stream=True)
+
+                    async for text in _stream_text("chat", "chat-stream", session_id, start_reply):
+                        reply += text
+                        yield _sse("token", {"text": text})
+                except Exception as e:
+                    if reply:
+                        # Tokens already reached the client; the cut-off reply is not saved
+                        yield _sse("error", {"detail": f"Model stream failed: {str(e)}", "partial_reply": reply})
+                        return
+                    # Nothing sent yet: fall back to the template
+
+            if reply:
+                follow_up = _follow_up_from(reply)
+            else:
+                reply, follow_up = _template_reply(brand_info, user_message)
+                yield _sse("token", {"text": reply})
+
+            assistant_turn = {"role": "assistant", "content": reply}
+            session_cache.append(session_id, [user_turn, assistant_turn], base_history)
+            yield _sse("done", {"reply": reply, "follow_up": follow_up, "session_id": session_id,
+                                "history_delta": [user_turn, assistant_turn], "degraded": degraded})
+        except Exception as e:
+            yield _sse("error", {"detail": f"Error in chat endpoint: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Scheduled Posts Endpoints (indexed SQLite store, see backend/services/post_store.py)
 
 
 @router.post("/scheduled-posts/save")
@@ -516,9 +949,6 @@ async def save_scheduled_post(request: ScheduledPostRequest):
     """Save a scheduled post for a user."""
     import uuid
     try:
-        # Load existing posts
-        posts = _load_user_posts(request.user_id)
-        
         # Create new post
         new_post = {
             "id": f"post-{uuid.uuid4()}",
@@ -530,11 +960,16 @@ async def save_scheduled_post(request: ScheduledPostRequest):
             "createdAt": datetime.utcnow().isoformat(),
         }
         
-        # Add to list
-        posts.append(new_post)
-        
-        # Save back
-        _save_user_posts(request.user_id, posts)
+        # Save to the store and queue it for publishing when due
+        credentials = {
+            key: value for key, value in {
+                "access_token": request.access_token,
+                "page_id": request.page_id,
+                "page_access_token": request.page_access_token,
+            }.items() if value
+        }
+        await asyncio.to_thread(post_store.add_post, request.user_id, new_post, credentials)
+        post_dispatcher.schedule(request.user_id, new_post)
         
         return {
             "success": True,
@@ -549,7 +984,7 @@ async def save_scheduled_post(request: ScheduledPostRequest):
 async def list_scheduled_posts(request: ScheduledPostsRequest):
     """Get all scheduled posts for a user."""
     try:
-        posts = _load_user_posts(request.user_id)
+        posts = await asyncio.to_thread(post_store.list_posts, request.user_id)
         return {
             "success": True,
             "posts": posts
@@ -562,9 +997,7 @@ async def list_scheduled_posts(request: ScheduledPostsRequest):
 async def delete_scheduled_post(user_id: str, post_id: str):
     """Delete a scheduled post."""
     try:
-        posts = _load_user_posts(user_id)
-        posts = [p for p in posts if p.get("id") != post_id]
-        _save_user_posts(user_id, posts)
+        await asyncio.to_thread(post_store.delete_post, user_id, post_id)
         
         return {
             "success": True,
@@ -574,233 +1007,157 @@ async def delete_scheduled_post(user_id: str, post_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting scheduled post: {str(e)}")
 
 
+async def _submit_publish_job(user_id: str, post_id: str, platform: str, outage: Optional[ProviderUnavailable] = None,
+                        **credentials) -> JSONResponse:
+    """
+    Queue a background publish and answer 202 with the job id to poll.
+
+    With `outage` (the provider's circuit breaker is open) the job is held
+    until the breaker probes again.
+    """
+    delay = max(outage.retry_after, 1.0) if outage else 0.0
+    job = await publish_jobs.submit(user_id, post_id, platform, delay=delay, **credentials)
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "message": f"{outage.message}; publish queued" if outage else "Publish job queued",
+        "job_id": job["id"],
+        "status_url": f"/api/jobs/{job['id']}",
+        "job": job
+    })
+
+
+async def _queue_after_outage(outage: ProviderUnavailable, user_id: str, post_id: str, platform: str,
+                        **credentials) -> JSONResponse:
+    """Turn a publish that hit an open circuit breaker into a held background job."""
+    try:
+        return await _submit_publish_job(user_id, post_id, platform, outage=outage, **credentials)
+    except PublishError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+
 @router.post("/scheduled-posts/publish-wordpress/{user_id}/{post_id}")
-async def publish_to_wordpress(user_id: str, post_id: str):
-    """Publish a scheduled post to WordPress."""
+async def publish_to_wordpress(user_id: str, post_id: str, async_job: bool = False):
+    """Publish a scheduled post to WordPress (202 + job id when async_job=true)."""
     try:
-        # Get WordPress credentials from environment
-        wp_site = os.getenv("WP_SITE")
-        wp_user = os.getenv("WP_USER")
-        wp_password = os.getenv("WP_PASSWORD")
-        
-        if not all([wp_site, wp_user, wp_password]):
-            raise HTTPException(
-                status_code=400, 
-                detail="WordPress credentials not configured. Please set WP_SITE, WP_USER, and WP_PASSWORD in .env"
-            )
-        
-        # Load the post
-        posts = _load_user_posts(user_id)
-        post = next((p for p in posts if p.get("id") == post_id), None)
-        
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-        
-        # Only publish WordPress posts
-        if post.get("platform", "").lower() != "wordpress":
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Can only publish WordPress posts. This is a {post.get('platform')} post."
-            )
-        
-        # Publish to WordPress
-        import requests
-        from requests.auth import HTTPBasicAuth
-        
-        wp_url = f"{wp_site.rstrip('/')}/wp-json/wp/v2/posts"
-        
-        # Extract title from content or use date
-        content = post.get("content", "")
-        title = content.split('\n')[0][:100] if content else f"Post from {datetime.utcnow().strftime('%B %d, %Y')}"
+        if async_job:
+            return await _submit_publish_job(user_id, post_id, "wordpress")
+        result = await publish_post(user_id, post_id, platform="wordpress")
         
-        # Remove HTML tags from title if present
-        import re
-        title = re.sub(r'<[^>]+>', '', title).strip()
-        
-        # Create as draft first to avoid stricter publish permissions
-        payload_wp = {
-            "title": title,
-            "content": content,
-            "status": "draft",
+        return {
+            "success": True,
+            "message": "Post published to WordPress successfully!",
+            "post": result["post"]
         }
-        
-        resp = requests.post(
-            wp_url, 
-            json=payload_wp, 
-            auth=HTTPBasicAuth(wp_user, wp_password),
-            timeout=30
-        )
-        
-        if resp.status_code in (200, 201):
-            # Update post status
-            for p in posts:
-                if p.get("id") == post_id:
-                    p["status"] = "Published"
-                    p["publishedAt"] = datetime.utcnow().isoformat()
-                    if resp.headers.get("content-type", "").startswith("application/json"):
-                        wp_data = resp.json()
-                        p["wordpressUrl"] = wp_data.get("link", "")
-                        p["wordpressId"] = wp_data.get("id", "")
-            
-            _save_user_posts(user_id, posts)
             
-            return {
-                "success": True,
-                "message": "Post published to WordPress successfully!",
-                "post": next((p for p in posts if p.get("id") == post_id), None)
-            }
-        else:
-            error_detail = resp.text
-            try:
-                error_data = resp.json()
-                error_detail = error_data.get("message", resp.text)
-            except:
-                pass
-
-            # Provide clearer guidance for common auth/role issues
-            guidance = ""
-            if resp.status_code in (401, 403):
-                guidance = (
-                    " Hint: Ensure WP_USER has Author or higher role, and WP_PASSWORD is an Application Password. "
-                    "If the site is not using HTTPS, enable application passwords on HTTP or switch to HTTPS."
-                )
-
-            raise HTTPException(
-                status_code=resp.status_code,
-                detail=f"WordPress API error: {error_detail}.{guidance}"
-            )
-            
-    except HTTPException:
-        raise
+    except ProviderUnavailable as e:
+        return await _queue_after_outage(e, user_id, post_id, "wordpress")
+    except PublishError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error publishing to WordPress: {str(e)}")
 
 
 @router.post("/scheduled-posts/publish-threads")
-async def publish_to_threads_endpoint(request: ThreadsPublishRequest):
-    """Publish a scheduled post to Threads."""
+async def publish_to_threads_endpoint(request: ThreadsPublishRequest, async_job: bool = False):
+    """Publish a scheduled post to Threads (202 + job id when async_job=true)."""
     try:
-        # Load the post
-        posts = _load_user_posts(request.user_id)
-        post = next((p for p in posts if p.get("id") == request.post_id), None)
-        
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-        
-        # Check platform
-        if post.get("platform", "").lower() != "threads":
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Can only publish Threads posts. This is a {post.get('platform')} post."
+        if async_job:
+            return await _submit_publish_job(
+                request.user_id, request.post_id, "threads", access_token=request.access_token
             )
-        
-        # Prepare content
-        content = post.get("content", "")
-        image_url = post.get("imageUrl")
-        media_type = "IMAGE" if image_url else "TEXT"
-        
-        # Publish to Threads
-        result = publish_to_threads(
-            text=content,
-            access_token=request.access_token,
-            media_url=image_url,
-            media_type=media_type
+        result = await publish_post(
+            request.user_id,
+            request.post_id,
+            platform="threads",
+            access_token=request.access_token
         )
         
-        if result.get("success"):
-            # Update post status
-            for p in posts:
-                if p.get("id") == request.post_id:
-                    p["status"] = "Published"
-                    p["publishedAt"] = datetime.utcnow().isoformat()
-                    p["threadsUrl"] = result.get("url", "")
-                    p["threadsId"] = result.get("thread_id", "")
-            
-            _save_user_posts(request.user_id, posts)
-            
-            return {
-                "success": True,
-                "message": "Post published to Threads successfully!",
-                "post": next((p for p in posts if p.get("id") == request.post_id), None),
-                "url": result.get("url")
-            }
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=result.get("message", "Failed to publish to Threads")
-            )
+        return {
+            "success": True,
+            "message": "Post published to Threads successfully!",
+            "post": result["post"],
+            "url": result["url"]
+        }
             
-    except HTTPException:
-        raise
+    except ProviderUnavailable as e:
+        return await _queue_after_outage(e, request.user_id, request.post_id, "threads", access_token=request.access_token)
+    except PublishError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error publishing to Threads: {str(e)}")
 
 
 @router.post("/scheduled-posts/publish-facebook")
-async def publish_to_facebook_endpoint(request: FacebookPublishRequest):
-    """Publish a scheduled post to Facebook."""
+async def publish_to_facebook_endpoint(request: FacebookPublishRequest, async_job: bool = False):
+    """Publish a scheduled post to Facebook (202 + job id when async_job=true)."""
     try:
-        # Load the post
-        posts = _load_user_posts(request.user_id)
-        post = next((p for p in posts if p.get("id") == request.post_id), None)
-        
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-        
-        # Check platform
-        if post.get("platform", "").lower() != "facebook":
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Can only publish Facebook posts. This is a {post.get('platform')} post."
+        if async_job:
+            return await _submit_publish_job(
+                request.user_id,
+                request.post_id,
+                "facebook",
+                access_token=request.access_token,
+                page_id=request.page_id,
+                page_access_token=request.page_access_token
             )
-        
-        # Prepare content
-        content = post.get("content", "")
-        image_url = post.get("imageUrl")
-        
-        # Publish to Facebook
-        result = publish_to_facebook(
-            message=content,
+        result = await publish_post(
+            request.user_id,
+            request.post_id,
+            platform="facebook",
             access_token=request.access_token,
             page_id=request.page_id,
-            page_access_token=request.page_access_token,
-            image_url=image_url
+            page_access_token=request.page_access_token
         )
         
-        if result.get("success"):
-            # Update post status
-            for p in posts:
-                if p.get("id") == request.post_id:
-                    p["status"] = "Published"
-                    p["publishedAt"] = datetime.utcnow().isoformat()
-                    p["facebookUrl"] = result.get("url", "")
-                    p["facebookId"] = result.get("post_id", "")
-            
-            _save_user_posts(request.user_id, posts)
-            
-            return {
-                "success": True,
-                "message": "Post published to Facebook successfully!",
-                "post": next((p for p in posts if p.get("id") == request.post_id), None),
-                "url": result.get("url")
-            }
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=result.get("message", "Failed to publish to Facebook")
-            )
+        return {
+            "success": True,
+            "message": "Post published to Facebook successfully!",
+            "post": result["post"],
+            "url": result["url"]
+        }
             
-    except HTTPException:
-        raise
+    except ProviderUnavailable as e:
+        return await _queue_after_outage(
+            e,
+            request.user_id,
+            request.post_id,
+            "facebook",
+            access_token=request.access_token,
+            page_id=request.page_id,
+            page_access_token=request.page_access_token
+        )
+    except PublishError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error publishing to Facebook: {str(e)}")
 
 
+@router.get("/jobs/{job_id}")
+async def get_publish_job(job_id: str):
+    """Status, progress and final URL of a background publish job."""
+    job = await publish_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "success": True,
+        "job": job
+    }
+
+
+@router.get("/similar-topics")
+async def similar_topics_endpoint(topic: str, kind: str = "content"):
+    """Cached drafts for topics similar to `topic` (kind: content or agent-cycle)."""
+    return {
+        "success": True,
+        "drafts": _similar_drafts(kind, topic)
+    }
+
+
 @router.get("/check-threads")
 async def check_threads_endpoint(access_token: str):
     """Check Threads API connection."""
     try:
-        result = check_threads_connection(access_token)
+        result = await acheck_threads_connection(access_token)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking Threads connection: {str(e)}")
@@ -810,7 +1167,7 @@ async def check_threads_endpoint(access_token: str):
 async def check_facebook_endpoint(access_token: str):
     """Check Facebook API connection."""
     try:
-        result = check_facebook_connection(access_token)
+        result = await acheck_facebook_connection(access_token)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking Facebook connection: {str(e)}")
@@ -820,10 +1177,29 @@ async def check_facebook_endpoint(access_token: str):
 async def get_pages_endpoint(access_token: str):
     """Get list of Facebook pages managed by the user."""
     try:
-        result = get_facebook_pages(access_token)
+        result = await aget_facebook_pages(access_token)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching Facebook pages: {str(e)}")
 
 
-
+@router.get("/metrics")
+async def metrics_endpoint():
+    """Runtime metrics for load tests and production monitoring."""
+    return {
+        "loop_monitor": loop_monitor.snapshot(),
+        "post_dispatcher": post_dispatcher.snapshot(),
+        "publish_jobs": publish_jobs.snapshot(),
+        "session_cache": session_cache.snapshot(),
+        "chat_context": chat_context.snapshot(),
+        "content_cache": content_cache.snapshot(),
+        "topic_index": topic_index.snapshot(),
+        "singleflight": singleflight.snapshot(),
+        "agents": agent_registry.snapshot(),
+        "stage_memo": stage_memo.snapshot(),
+        "model_limiter": model_limiter.snapshot(),
+        "hedging": hedger.snapshot(),
+        "model_router": model_router.snapshot(),
+        "disconnects": disconnect_tracker.snapshot(),
+        "circuit_breakers": circuit_breaker.snapshot(),
+    }
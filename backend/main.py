@@ -1,19 +1,64 @@
 """FastAPI backend server for GhostWriter."""
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 
+# Load environment variables (before importing modules that read them)
+load_dotenv()
+
 from .api.endpoints import router
+from .services.loop_monitor import LoopMonitorMiddleware, monitor as loop_monitor
+from .services.request_cancel import CancelOnDisconnectMiddleware, tracker as disconnect_tracker
+from .services.post_store import POSTS_DIR, post_store
+from .services.post_dispatcher import post_dispatcher
+from .services.publish_jobs import publish_jobs
+from .services.session_cache import session_cache
+from .services.chat_context import chat_context
+from .services.content_cache import content_cache
+from .services.topic_index import topic_index
+from helpers import circuit_breaker
+from helpers.http_client import aclose_async_client, close_session
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services and release shared resources on shutdown."""
+    # Import any legacy per-user JSON post files into the indexed store
+    post_store.migrate_json_dir(POSTS_DIR)
+    loop_monitor.start()
+    # Publish scheduled posts when they are due
+    post_dispatcher.start()
+    # Workers for publish requests submitted with async_job=true
+    publish_jobs.start()
+    # Write-behind flushing of cached chat sessions
+    session_cache.start()
+    # Load the chat tokenizer off the event loop (first load may download it)
+    await asyncio.to_thread(chat_context.load_encoding)
+    # Drop expired generated-content cache entries
+    content_cache.prune()
+    # Rebuild the near-duplicate topic index in the background
+    index_load = asyncio.create_task(asyncio.to_thread(topic_index.load, content_cache.iter_topics()))
+    yield
+    await index_load
+    await session_cache.stop()
+    await publish_jobs.stop()
+    await post_dispatcher.stop()
+    await loop_monitor.stop()
+    # Close pooled provider connections
+    await aclose_async_client()
+    close_session()
 
-# Load environment variables
-load_dotenv()
 
 # Create FastAPI app
 app = FastAPI(
     title="GhostWriter API",
     description="Backend API for GhostWriter multi-agent content system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -30,6 +75,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in event-loop stall detection (LOOP_MONITOR_ENABLED=1)
+if loop_monitor.enabled:
+    app.add_middleware(LoopMonitorMiddleware, monitor=loop_monitor)
+
+# Cancel model/provider work for clients that disconnected (CANCEL_ON_DISCONNECT=0 disables)
+if disconnect_tracker.enabled:
+    app.add_middleware(CancelOnDisconnectMiddleware, tracker=disconnect_tracker)
+
 # Include API routes
 app.include_router(router, prefix="/api", tags=["api"])
 
@@ -46,8 +99,14 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+    """Health check endpoint, with the circuit breaker state of each external provider."""
+    circuits = circuit_breaker.snapshot()
+    return {
+        "status": "healthy",
+        # The API itself is up; these providers are failing fast until their breakers close
+        "degraded_providers": [name for name, circuit in circuits.items() if circuit["state"] in ("open", "half_open")],
+        "circuits": circuits,
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+"""Registry of ADK sub-agents and their runners for the /agents/* endpoints.
+
+Each agent and its `InMemoryRunner` are built once, on first use, and reused
+by every request instead of being constructed per HTTP call. Runs take a
+`user_id` and an optional `session_id`: passing back the session id returned
+by a previous run continues that conversation with the agent; omitting it
+starts a new session. Sessions idle for longer than the TTL, or beyond the
+size limit, are deleted from the runner's in-memory session service.
+
+Environment variables:
+    AGENT_SESSION_MAX=1000    max live agent sessions per process
+    AGENT_SESSION_TTL=3600    seconds an idle agent session is kept
+"""
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from helpers.model_limiter import current_key
+
+from ghostwriter_agent.sub_agents import (
+    build_content_creator_agent,
+    build_content_strategist_agent,
+    build_evaluator_agent,
+    build_image_generator_agent,
+    build_publisher_agent,
+    build_trend_watcher_agent,
+)
+
+APP_NAME = "ghostwriter"
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """How to build an agent and the prompt used when a request has none."""
+
+    factory: Callable[[], Any]
+    default_prompt: Callable[[Dict[str, Any]], str]
+
+
+AGENTS: Dict[str, AgentSpec] = {
+    "trend-watcher": AgentSpec(
+        build_trend_watcher_agent, lambda request: f"Find trends for: {request.get('topic', 'general')}"
+    ),
+    "content-strategist": AgentSpec(build_content_strategist_agent, lambda request: "Create a content strategy"),
+    "content-creator": AgentSpec(build_content_creator_agent, lambda request: "Create content"),
+    "publisher": AgentSpec(build_publisher_agent, lambda request: "Publish content"),
+    "evaluator": AgentSpec(build_evaluator_agent, lambda request: "Evaluate performance"),
+    "image-generator": AgentSpec(build_image_generator_agent, lambda request: "Generate image prompt"),
+}
+
+
+class UnknownAgentError(KeyError):
+    """No agent is registered under the requested name."""
+
+
+class AgentRegistry:
+    """Builds each agent/runner once and runs prompts in per-user sessions."""
+
+    def __init__(self, agents: Dict[str, AgentSpec], max_sessions: int = 1000, ttl: float = 3600.0):
+        self.agents = agents
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._runners: Dict[str, InMemoryRunner] = {}
+        # (agent name, user_id, session_id) -> last use, least recently used first
+        self._sessions: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self.stats = {"runs": 0, "runners_built": 0, "sessions_created": 0, "sessions_evicted": 0}
+
+    @classmethod
+    def from_env(cls) -> "AgentRegistry":
+        return cls(
+            AGENTS,
+            max_sessions=int(os.getenv("AGENT_SESSION_MAX", "1000")),
+            ttl=float(os.getenv("AGENT_SESSION_TTL", "3600")),
+        )
+
+    def names(self) -> List[str]:
+        return list(self.agents)
+
+    def spec(self, name: str) -> AgentSpec:
+        if name not in self.agents:
+            raise UnknownAgentError(name)
+        return self.agents[name]
+
+    def runner(self, name: str) -> InMemoryRunner:
+        """The shared runner for `name`, built on first use."""
+        runner = self._runners.get(name)
+        if runner is None:
+            runner = InMemoryRunner(agent=self.spec(name).factory(), app_name=APP_NAME)
+            self._runners[name] = runner
+            self.stats["runners_built"] += 1
+        return runner
+
+    async def run(self, name: str, prompt: str, user_id: str = "anonymous",
+                  session_id: Optional[str] = None, state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send `prompt` to an agent in the user's session.
+
+        Args:
+            name: Registered agent name (e.g. "trend-watcher")
+            prompt: User message for the agent
+            user_id: Session owner
+            session_id: Existing session to continue; a new one is created if omitted or expired
+            state: Session state to set before the run (read by `{key?}` instruction placeholders)
+
+        Returns:
+            Dict with the agent's final `result` text and the `session_id` used
+
+        Raises:
+            UnknownAgentError: if no agent is registered under `name`
+        """
+        runner = self.runner(name)
+        await self._expire(time.monotonic())
+
+        session = None
+        if session_id:
+            session = await runner.session_service.get_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+        if session is None:
+            session = await runner.session_service.create_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+            self.stats["sessions_created"] += 1
+        key = (name, user_id, session.id)
+        self._sessions[key] = time.monotonic()
+        self._sessions.move_to_end(key)
+
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        texts = []
+        # The agents' model calls queue fairly per user in the shared model limiter
+        token = current_key.set(user_id)
+        try:
+            async for event in runner.run_async(
+                user_id=user_id, session_id=session.id, new_message=message, state_delta=state or None
+            ):
+                if event.is_final_response() and event.content and event.content.parts:
+                    texts.extend(part.text for part in event.content.parts if part.text)
+        finally:
+            current_key.reset(token)
+        self.stats["runs"] += 1
+        return {"result": "\n".join(texts), "session_id": session.id}
+
+    async def _expire(self, now: float) -> None:
+        """Delete idle sessions and sessions beyond the size limit."""
+        while self._sessions:
+            (name, user_id, session_id), last_used = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[(name, user_id, session_id)]
+            await self._runners[name].session_service.delete_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+            self.stats["sessions_evicted"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Runner and session counters for /metrics."""
+        return {"runners": sorted(self._runners), "sessions": len(self._sessions), **self.stats}
+
+
+# Process-wide agent registry
+agent_registry = AgentRegistry.from_env()
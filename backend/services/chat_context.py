@@ -0,0 +1,248 @@
+"""Token-budgeted prompt construction for /chat.
+
+The chat prompt is built to a fixed token budget instead of "the last six
+turns": the instruction, brand information and a running summary of older
+turns always fit, and the most recent turns fill whatever budget remains.
+Turns that no longer fit are folded into an extractive summary (the first
+sentence of each turn) that is cached per session and extended
+incrementally, so prompt size and cost stay flat however long a session runs.
+
+Client input is bounded before it reaches the model: oversize messages are
+rejected (413), `brand_info` is truncated, and an explicit `history` from the
+frontend is capped in length and per-turn size.
+
+Token counts use tiktoken's `cl100k_base` encoding as an approximation of
+the Gemini tokenizer. The encoding is loaded once at startup; if it cannot
+be loaded (e.g. no network to fetch the BPE file), counts fall back to a
+four-characters-per-token estimate.
+
+Environment variables:
+    CHAT_PROMPT_TOKEN_BUDGET=2000   max tokens in the prompt sent to the model
+    CHAT_MAX_MESSAGE_TOKENS=1000    longer user messages are rejected
+    CHAT_MAX_BRAND_TOKENS=500       brand_info is truncated to this length
+    CHAT_SUMMARY_TOKENS=300         max tokens of the running summary
+    CHAT_MAX_HISTORY_TURNS=50       max turns accepted in a client-sent history
+    CHAT_TOKEN_ENCODING=cl100k_base tiktoken encoding name
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROMPT_HEADER = "You are a helpful brand assistant. Use the brand information below to respond to the user's message."
+PROMPT_FOOTER = (
+    "Provide a concise, actionable reply (2-4 short paragraphs) and suggest one follow-up "
+    "question to clarify the brand further."
+)
+SUMMARY_LINE_TOKENS = 40
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+class ContextTooLarge(Exception):
+    """Client input exceeds the configured token limits."""
+
+
+class ChatContext:
+    """Builds chat prompts within a token budget and tracks per-session summaries."""
+
+    def __init__(self, budget: int = 2000, max_message_tokens: int = 1000, max_brand_tokens: int = 500,
+                 summary_tokens: int = 300, max_history_turns: int = 50,
+                 encoding_name: str = "cl100k_base", max_sessions: int = 1024):
+        self.budget = budget
+        self.max_message_tokens = max_message_tokens
+        self.max_brand_tokens = max_brand_tokens
+        self.summary_tokens = summary_tokens
+        self.max_history_turns = max_history_turns
+        self.encoding_name = encoding_name
+        self.max_sessions = max_sessions
+
+        self._encoding = None
+        self._encoding_loaded = False
+        self._lock = threading.Lock()
+        # session_id -> (summary lines, fingerprints of folded turns)
+        self._summaries: "OrderedDict[str, Tuple[List[str], List[str]]]" = OrderedDict()
+        self.stats = {"prompts": 0, "max_prompt_tokens": 0, "folded_turns": 0,
+                      "truncated_brand": 0, "rejected_messages": 0, "clamped_histories": 0}
+
+    @classmethod
+    def from_env(cls) -> "ChatContext":
+        return cls(
+            budget=int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "2000")),
+            max_message_tokens=int(os.getenv("CHAT_MAX_MESSAGE_TOKENS", "1000")),
+            max_brand_tokens=int(os.getenv("CHAT_MAX_BRAND_TOKENS", "500")),
+            summary_tokens=int(os.getenv("CHAT_SUMMARY_TOKENS", "300")),
+            max_history_turns=int(os.getenv("CHAT_MAX_HISTORY_TURNS", "50")),
+            encoding_name=os.getenv("CHAT_TOKEN_ENCODING", "cl100k_base"),
+        )
+
+    # Tokenizing
+
+    def load_encoding(self) -> None:
+        """Load the tiktoken encoding (may download it once); call at startup."""
+        with self._lock:
+            if self._encoding_loaded:
+                return
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception as e:
+                logger.warning("tiktoken encoding %s unavailable (%s); estimating tokens", self.encoding_name, e)
+            self._encoding_loaded = True
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        if not self._encoding_loaded:
+            self.load_encoding()
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return max(1, len(text) // 4)
+
+    def truncate(self, text: str, limit: int) -> str:
+        """Cut `text` to at most `limit` tokens."""
+        if self.count_tokens(text) <= limit:
+            return text
+        if self._encoding is not None:
+            return self._encoding.decode(self._encoding.encode(text, disallowed_special=())[:limit])
+        return text[:limit * 4]
+
+    # Input limits
+
+    def check_message(self, message: Optional[str]) -> Optional[str]:
+        """
+        Validate the user's message size.
+
+        Raises:
+            ContextTooLarge: if the message exceeds CHAT_MAX_MESSAGE_TOKENS
+        """
+        tokens = self.count_tokens(message or "")
+        if tokens > self.max_message_tokens:
+            self.stats["rejected_messages"] += 1
+            raise ContextTooLarge(
+                f"Message is too long ({tokens} tokens, limit {self.max_message_tokens}). Please shorten it."
+            )
+        return message
+
+    def truncate_brand(self, brand_info: Optional[str]) -> Optional[str]:
+        if not brand_info:
+            return brand_info
+        truncated = self.truncate(brand_info, self.max_brand_tokens)
+        if truncated != brand_info:
+            self.stats["truncated_brand"] += 1
+        return truncated
+
+    def clamp_history(self, history: Optional[list]) -> Optional[List[Dict[str, str]]]:
+        """Keep the newest well-formed turns of a client-sent history, each size-limited."""
+        if not history:
+            return history
+        turns = []
+        clamped = len(history) > self.max_history_turns
+        for turn in history[-self.max_history_turns:]:
+            if not isinstance(turn, dict) or not turn.get("content"):
+                clamped = True
+                continue
+            content = str(turn["content"])
+            truncated = self.truncate(content, self.max_message_tokens)
+            clamped = clamped or truncated != content
+            turns.append({"role": str(turn.get("role", "user")), "content": truncated})
+        if clamped:
+            self.stats["clamped_histories"] += 1
+        return turns
+
+    # Prompt building
+
+    def build_prompt(self, session_id: str, brand_info: str, history: List[Dict[str, Any]]) -> Tuple[str, int]:
+        """
+        Build the chat prompt within the token budget.
+
+        Args:
+            session_id: Session whose running summary to use and extend
+            brand_info: Brand description (already truncated)
+            history: Full conversation, newest turn last
+
+        Returns:
+            Tuple of (prompt text, prompt token count)
+        """
+        head = [PROMPT_HEADER, f"Brand information: {brand_info}"]
+        fixed = self.count_tokens("\n".join(head + [PROMPT_FOOTER])) + 4
+        remaining = max(0, self.budget - fixed - self.summary_tokens)
+
+        # Newest turns first until the budget is used up
+        recent: List[str] = []
+        cut = len(history)
+        for index in range(len(history) - 1, -1, -1):
+            turn = history[index]
+            line = f"{str(turn.get('role', 'user')).capitalize()}: {turn.get('content', '')}"
+            cost = self.count_tokens(line) + 1
+            if cost > remaining and recent:
+                break
+            if cost > remaining:
+                line = self.truncate(line, remaining)
+                cost = remaining
+            recent.append(line)
+            remaining -= cost
+            cut = index
+        recent.reverse()
+
+        summary = self._fold(session_id, history[:cut])
+
+        lines = list(head)
+        if summary:
+            lines.append(f"Summary of earlier conversation: {summary}")
+        lines.append("")
+        lines.extend(recent)
+        lines.append("")
+        lines.append(PROMPT_FOOTER)
+        prompt = "\n".join(lines)
+
+        tokens = self.count_tokens(prompt)
+        self.stats["prompts"] += 1
+        self.stats["max_prompt_tokens"] = max(self.stats["max_prompt_tokens"], tokens)
+        return prompt, tokens
+
+    def _fold(self, session_id: str, older: List[Dict[str, Any]]) -> str:
+        """Extend the session's running summary with turns that fell out of the window."""
+        with self._lock:
+            lines, folded = self._summaries.pop(session_id, ([], []))
+        seen = set(folded)
+        for turn in older:
+            fingerprint = _fingerprint(turn)
+            if fingerprint in seen:
+                continue
+            content = " ".join(str(turn.get("content", "")).split())
+            first_sentence = _SENTENCE_END.split(content, 1)[0]
+            role = "User" if turn.get("role") == "user" else "Assistant"
+            lines.append(f"{role}: {self.truncate(first_sentence, SUMMARY_LINE_TOKENS)}")
+            folded.append(fingerprint)
+            seen.add(fingerprint)
+            self.stats["folded_turns"] += 1
+
+        # Keep the newest summary lines that fit
+        while lines and self.count_tokens(" ".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        folded = folded[-4 * self.max_history_turns:]
+
+        with self._lock:
+            self._summaries[session_id] = (lines, folded)
+            while len(self._summaries) > self.max_sessions:
+                self._summaries.popitem(last=False)
+        return " ".join(lines)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Prompt size and input-limit counters for /metrics."""
+        return {"budget": self.budget, "tokenizer": self.encoding_name if self._encoding else "estimate",
+                "summaries": len(self._summaries), **self.stats}
+
+
+def _fingerprint(turn: Dict[str, Any]) -> str:
+    text = f"{turn.get('role')}\x00{turn.get('content')}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+# Process-wide prompt builder
+chat_context = ChatContext.from_env()
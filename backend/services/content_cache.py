@@ -0,0 +1,174 @@
+"""Two-tier response cache for generated content.
+
+Generated outputs are cached under a key built from the normalized topic,
+tone, model name and prompt-template version, so a repeat generation is a
+dictionary lookup instead of a model call, and changing the model or the
+prompt template never serves stale drafts. A bounded in-memory LRU sits in
+front of a SQLite table (shared by all worker processes and kept across
+restarts); entries older than the TTL are treated as misses and pruned.
+
+Environment variables:
+    CONTENT_CACHE_ENABLED=1        use the cache (default on)
+    CONTENT_CACHE_DB=cache/content_cache.db  on-disk tier
+    CONTENT_CACHE_SIZE=512         entries kept in memory
+    CONTENT_CACHE_TTL=604800       seconds an entry stays valid (default 7 days)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_cache (
+    cache_key  TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    data       TEXT NOT NULL
+);
+"""
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a topic or tone."""
+    return " ".join((value or "").lower().split()).strip(" .!?")
+
+
+def make_key(topic: str, tone: Optional[str], model: str, prompt_version: str) -> str:
+    """Cache key for one generation request."""
+    parts = [normalize_text(topic), normalize_text(tone), model, prompt_version]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class ContentCache:
+    """In-memory LRU in front of a SQLite table, both with a TTL."""
+
+    def __init__(self, path: str, max_entries: int = 512, ttl: float = 604800.0, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "stores": 0}
+
+    @classmethod
+    def from_env(cls) -> "ContentCache":
+        return cls(
+            os.getenv("CONTENT_CACHE_DB", os.path.join("cache", "content_cache.db")),
+            max_entries=int(os.getenv("CONTENT_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("CONTENT_CACHE_TTL", "604800")),
+            enabled=os.getenv("CONTENT_CACHE_ENABLED", "1").lower() not in ("0", "false", "no"),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached value for `key`, or None on a miss or expired entry."""
+        value, tier = self._lookup(key)
+        if tier is not None:
+            self.stats[f"{tier}_hits" if value is not None else "misses"] += 1
+        return value
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Like get(), without counting a hit or miss (for similar-topic drafts)."""
+        return self._lookup(key)[0]
+
+    def _lookup(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        if not self.enabled:
+            return None, None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    return entry[1], "memory"
+                del self._memory[key]
+
+        row = self._connect().execute(
+            "SELECT created_at, data FROM content_cache WHERE cache_key = ? AND created_at >= ?",
+            (key, now - self.ttl),
+        ).fetchone()
+        if row is None:
+            return None, "disk"
+        value = json.loads(row[1])
+        self._remember(key, row[0], value)
+        return value, "disk"
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO content_cache (cache_key, created_at, data) VALUES (?, ?, ?)",
+            (key, now, json.dumps(value)),
+        )
+        self._remember(key, now, value)
+        self.stats["stores"] += 1
+
+    def record_bypass(self) -> None:
+        self.stats["bypassed"] += 1
+
+    def iter_topics(self) -> Iterator[Tuple[str, str, str]]:
+        """(kind, cache key, topic) of every unexpired entry, for rebuilding the topic index."""
+        if not self.enabled:
+            return
+        rows = self._connect().execute(
+            "SELECT cache_key, data FROM content_cache WHERE created_at >= ?", (time.time() - self.ttl,)
+        )
+        for key, data in rows:
+            value = json.loads(data)
+            if value.get("topic"):
+                yield value.get("kind", "content"), key, value["topic"]
+
+    def prune(self) -> int:
+        """Delete expired entries from the on-disk tier."""
+        if not self.enabled:
+            return 0
+        cursor = self._connect().execute(
+            "DELETE FROM content_cache WHERE created_at < ?", (time.time() - self.ttl,)
+        )
+        return cursor.rowcount
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = (created_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Hit/miss counters for /metrics."""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            **self.stats,
+        }
+
+
+# Process-wide content cache
+content_cache = ContentCache.from_env()
@@ -0,0 +1,94 @@
+"""Multi-process-safe JSON file persistence.
+
+Writes go to a temp file in the same directory and are swapped in with
+os.replace, so readers never see a half-written file. Read-modify-write
+cycles hold an exclusive cross-process lock (flock on POSIX, msvcrt on
+Windows), so concurrent requests and `uvicorn --workers N` do not lose
+updates. Locks are striped over a fixed set of lock files per directory
+instead of one lock file per data file.
+"""
+import json
+import os
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_STRIPES = 64
+
+
+def _lock_path(path: Path) -> Path:
+    stripe = zlib.crc32(path.name.encode("utf-8")) % LOCK_STRIPES
+    lock_dir = path.parent / ".locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    return lock_dir / f"{stripe:02d}.lock"
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive cross-process lock for `path`."""
+    with open(_lock_path(Path(path)), "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """Read a JSON file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """Write JSON to a temp file and atomically replace `path` with it."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def update_json(path: Path, update: Callable[[Any], Any], default: Any = None) -> Any:
+    """Locked read-modify-write: store and return `update(current)`."""
+    path = Path(path)
+    with file_lock(path):
+        data = update(read_json(path, default))
+        atomic_write_json(path, data)
+    return data
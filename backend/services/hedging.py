@@ -0,0 +1,160 @@
+"""Hedged model calls to cut tail latency on /chat and /generate-content.
+
+A few slow Gemini responses dominate p99. With hedging enabled, a model
+call that is still running after the route's recent p95 latency gets a
+duplicate; whichever answers first wins and the other is cancelled. If the
+first to finish failed, the other is awaited instead.
+
+Hedges are capped by a budget: every call earns HEDGE_BUDGET tokens (0.05
+means at most ~5% extra requests) and a hedge spends one, so a provider-wide
+slowdown cannot double the load. The delay comes from a sliding window of
+the route's latencies and hedging starts only once the window has
+HEDGE_MIN_SAMPLES entries. Every attempt adds its latency, measured from
+when it got its model slot (`started()`), so queueing for the model limiter
+does not count. A primary cancelled after losing to its hedge adds the time
+it had run so far, so its slow tail keeps the delay up.
+
+Environment variables:
+    HEDGE_ENABLED=0          opt in to hedging
+    HEDGE_PERCENTILE=0.95    latency percentile after which a hedge is sent
+    HEDGE_BUDGET=0.05        max hedges per call (token bucket)
+    HEDGE_MIN_SAMPLES=20     latencies needed before a route is hedged
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_WINDOW = 200
+# Unspent budget kept for bursts of slow calls
+_MAX_TOKENS = 10.0
+
+# The current task's attempt: "created", "started" once it has a slot, "lost" if cancelled for the other
+_attempt: ContextVar[Optional[Dict[str, float]]] = ContextVar("hedge_attempt", default=None)
+
+
+class Hedger:
+    """Sends a duplicate of calls slower than the route's tracked percentile."""
+
+    def __init__(self, enabled: bool = False, percentile: float = 0.95, budget: float = 0.05,
+                 min_samples: int = 20):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._tokens = 0.0
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "Hedger":
+        return cls(
+            enabled=os.getenv("HEDGE_ENABLED", "0").lower() in ("1", "true", "yes"),
+            percentile=float(os.getenv("HEDGE_PERCENTILE", "0.95")),
+            budget=float(os.getenv("HEDGE_BUDGET", "0.05")),
+            min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+        )
+
+    def delay(self, route: str) -> Optional[float]:
+        """The route's tracked percentile latency, or None until enough samples exist."""
+        window = self._latencies.get(route)
+        if not window or len(window) < self.min_samples:
+            return None
+        ordered = sorted(window)
+        return ordered[min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)]
+
+    def _record(self, route: str, latency: float) -> None:
+        self._latencies.setdefault(route, deque(maxlen=_WINDOW)).append(latency)
+
+    def started(self) -> None:
+        """Mark the current attempt's model call as started, after any wait for a model slot."""
+        attempt = _attempt.get()
+        if attempt is not None:
+            attempt["started"] = time.monotonic()
+
+    def _start(self, route: str, fn: Callable[[], Awaitable[T]]) -> Tuple["asyncio.Future[T]", Dict[str, Any]]:
+        clock: Dict[str, Any] = {"created": time.monotonic()}
+        token = _attempt.set(clock)
+        try:
+            task = asyncio.ensure_future(fn())
+        finally:
+            _attempt.reset(token)
+
+        def finished(task: "asyncio.Future[T]") -> None:
+            if task.cancelled():
+                if not clock.get("lost") or "started" not in clock:
+                    return  # the caller left, or it was still waiting for a slot
+            elif task.exception() is not None:
+                return
+            self._record(route, time.monotonic() - clock.get("started", clock["created"]))
+
+        task.add_done_callback(finished)
+        return task, clock
+
+    async def run(self, route: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await `fn()`, sending a second `fn()` if the first is slower than usual.
+
+        Args:
+            route: Latency bucket (e.g. "chat", "generate-content:facebook")
+            fn: Zero-argument coroutine function making the model call; must be safe to call twice.
+                It should call `started()` once it holds its model slot.
+
+        Returns:
+            The first successful result
+        """
+        stats = self.stats.setdefault(route, {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0})
+        stats["calls"] += 1
+        self._tokens = min(_MAX_TOKENS, self._tokens + self.budget)
+        delay = self.delay(route) if self.enabled else None
+
+        primary, clock = self._start(route, fn)
+        tasks = {primary: clock}
+        winner = None
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done:
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        stats["hedged"] += 1
+                        hedge, clock = self._start(route, fn)
+                        tasks[hedge] = clock
+                    else:
+                        stats["budget_denied"] += 1
+
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if not task.cancelled() and task.exception() is None), None)
+                if winner is not None or not pending:
+                    break
+            if winner is None:
+                winner = next(iter(done))  # every attempt failed: raise the last failure
+            if winner is not primary:
+                stats["hedge_wins"] += 1
+            return winner.result()
+        finally:
+            for task, clock in tasks.items():
+                if not task.done():
+                    clock["lost"] = winner is not None
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # retrieved so a losing failure is not logged as lost
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-route hedge counters and current delay for /metrics."""
+        routes = {}
+        for route, stats in self.stats.items():
+            delay = self.delay(route)
+            routes[route] = {**stats, "delay_ms": round(delay * 1000, 1) if delay is not None else None}
+        return {"enabled": self.enabled, "budget": self.budget, "routes": routes}
+
+
+# Process-wide hedging policy
+hedger = Hedger.from_env()
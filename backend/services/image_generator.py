@@ -1,7 +1,14 @@
 """Image generator service using nanobanana API."""
 import os
+import httpx
 import requests
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+
+from helpers.circuit_breaker import breakers
+from helpers.http_client import get_session, get_async_client
+
+# Opens after repeated nanobanana failures so callers fall back to a placeholder at once
+_breaker = breakers["nanobanana"]
 
 
 def generate_image(prompt: str, style: Optional[str] = None) -> Dict:
@@ -13,47 +20,59 @@ def generate_image(prompt: str, style: Optional[str] = None) -> Dict:
         style: Optional style parameter
         
     Returns:
-        Dictionary with image_url or error message
+        Dictionary with image_url or error message (with circuit_open set
+        when nanobanana is failing and the call was not attempted)
     """
-    api_key = os.getenv("NANOBANANA_API_KEY")
+    request_args, error = _build_request(prompt, style)
+    if error:
+        return error
     
-    if not api_key:
-        return {
-            "success": False,
-            "error": "NANOBANANA_API_KEY not configured in environment variables"
-        }
+    if not _breaker.allow():
+        return _breaker.unavailable("error")
     
     try:
-        # Nanobanana API endpoint (adjust URL if different)
-        api_url = os.getenv("NANOBANANA_API_URL", "https://api.nanobanana.com/v1/generate")
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
+        response = get_session().post(**request_args, timeout=30)
+        _breaker.record(response.status_code)
+        return _parse_response(response)
+            
+    except requests.exceptions.RequestException as e:
+        _breaker.record_failure()
+        return {
+            "success": False,
+            "error": f"Request failed: {str(e)}"
         }
-        
-        payload = {
-            "prompt": prompt,
-            "style": style or "default"
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Unexpected error: {str(e)}"
         }
+
+
+async def agenerate_image(prompt: str, style: Optional[str] = None) -> Dict:
+    """
+    Async variant of generate_image using the pooled async client.
+    
+    Args:
+        prompt: Text description of the image to generate
+        style: Optional style parameter
         
-        response = requests.post(api_url, json=payload, headers=headers, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "image_url": data.get("image_url") or data.get("url"),
-                "image_data": data.get("image_data"),  # base64 if provided
-                "metadata": data.get("metadata", {})
-            }
-        else:
-            return {
-                "success": False,
-                "error": f"API returned status {response.status_code}: {response.text}"
-            }
+    Returns:
+        Dictionary with image_url or error message
+    """
+    request_args, error = _build_request(prompt, style)
+    if error:
+        return error
+    
+    if not _breaker.allow():
+        return _breaker.unavailable("error")
+    
+    try:
+        response = await get_async_client().post(**request_args, timeout=30)
+        _breaker.record(response.status_code)
+        return _parse_response(response)
             
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
+        _breaker.record_failure()
         return {
             "success": False,
             "error": f"Request failed: {str(e)}"
@@ -64,3 +83,44 @@ def generate_image(prompt: str, style: Optional[str] = None) -> Dict:
             "error": f"Unexpected error: {str(e)}"
         }
 
+
+def _build_request(prompt: str, style: Optional[str]) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """Return (request kwargs, None) or (None, error dict) if not configured."""
+    api_key = os.getenv("NANOBANANA_API_KEY")
+    
+    if not api_key:
+        return None, {
+            "success": False,
+            "error": "NANOBANANA_API_KEY not configured in environment variables"
+        }
+    
+    # Nanobanana API endpoint (adjust URL if different)
+    api_url = os.getenv("NANOBANANA_API_URL", "https://api.nanobanana.com/v1/generate")
+    
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    payload = {
+        "prompt": prompt,
+        "style": style or "default"
+    }
+    return {"url": api_url, "json": payload, "headers": headers}, None
+
+
+def _parse_response(response) -> Dict:
+    """Build the generate_image result from a nanobanana response."""
+    if response.status_code == 200:
+        data = response.json()
+        return {
+            "success": True,
+            "image_url": data.get("image_url") or data.get("url"),
+            "image_data": data.get("image_data"),  # base64 if provided
+            "metadata": data.get("metadata", {})
+        }
+    else:
+        return {
+            "success": False,
+            "error": f"API returned status {response.status_code}: {response.text}"
+        }
@@ -0,0 +1,233 @@
+"""Event-loop stall detector.
+
+A heartbeat coroutine measures how late the event loop wakes it up (loop lag).
+A watchdog thread notices when the heartbeat is overdue by more than the
+threshold and, while the loop is still stuck, captures the loop thread's stack
+and the request route of the task that is running. When the loop recovers the
+stall is recorded with its duration, route and blocking call site.
+
+Opt-in via environment variables:
+    LOOP_MONITOR_ENABLED=1          turn the monitor on
+    LOOP_MONITOR_THRESHOLD_MS=100   lag that counts as a stall
+    LOOP_MONITOR_INTERVAL_MS=50     heartbeat interval
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +Inf)
+LAG_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+
+class LagHistogram:
+    """Cumulative-friendly lag histogram with fixed millisecond buckets."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, lag_ms: float) -> None:
+        self.counts[bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+        self.total += 1
+        self.sum_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{b}" for b in LAG_BUCKETS_MS] + ["le_inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "avg_ms": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class LoopMonitor:
+    """Measures event-loop lag and names the call site that blocked the loop."""
+
+    def __init__(self, enabled: bool = False, threshold_ms: float = 100.0,
+                 interval_ms: float = 50.0, max_events: int = 50):
+        self.enabled = enabled
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+
+        self.loop_histogram = LagHistogram()
+        self.route_histograms: Dict[str, LagHistogram] = {}
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.stall_count = 0
+
+        self._tasks: Dict[asyncio.Task, Dict[str, Any]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._beat_due = 0.0
+        self._pending: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_env(cls) -> "LoopMonitor":
+        return cls(
+            enabled=os.getenv("LOOP_MONITOR_ENABLED", "").lower() in ("1", "true", "yes"),
+            threshold_ms=float(os.getenv("LOOP_MONITOR_THRESHOLD_MS", "100")),
+            interval_ms=float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50")),
+        )
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread."""
+        if not self.enabled or self._heartbeat is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat_due = time.monotonic() + self.interval
+        self._stop.clear()
+        self._heartbeat = self._loop.create_task(self._run_heartbeat(), name="loop-monitor-heartbeat")
+        self._watchdog = threading.Thread(target=self._run_watchdog, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and watchdog."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    # Request tracking (used by LoopMonitorMiddleware)
+
+    def track(self, scope: Dict[str, Any]) -> Optional[asyncio.Task]:
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks[task] = scope
+        return task
+
+    def untrack(self, task: Optional[asyncio.Task]) -> None:
+        if task is not None:
+            self._tasks.pop(task, None)
+
+    # Measurement
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            start = time.monotonic()
+            self._beat_due = start + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - start - self.interval)
+            self._record(lag)
+
+    def _run_watchdog(self) -> None:
+        poll = max(self.threshold / 4, 0.005)
+        while not self._stop.wait(poll):
+            overdue = time.monotonic() - self._beat_due
+            if overdue >= self.threshold and self._pending is None:
+                self._pending = self._capture()
+
+    def _capture(self) -> Dict[str, Any]:
+        """Snapshot the loop thread's stack and current task while it is blocked."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame) if frame is not None else []
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        scope = self._tasks.get(task) if task is not None else None
+        return {
+            "route": _route_name(scope) if scope else None,
+            "task": task.get_name() if task is not None else None,
+            "call_site": _call_site(stack),
+            "stack": [f"{f.filename}:{f.lineno} in {f.name}" for f in stack[-15:]],
+        }
+
+    def _record(self, lag: float) -> None:
+        lag_ms = lag * 1000
+        pending, self._pending = self._pending, None
+        with self._lock:
+            self.loop_histogram.observe(lag_ms)
+            if lag < self.threshold:
+                return
+            capture = pending or {"route": None, "task": None, "call_site": None, "stack": []}
+            route = capture["route"] or "<no request>"
+            self.route_histograms.setdefault(route, LagHistogram()).observe(lag_ms)
+            self.stall_count += 1
+            event = {"lag_ms": round(lag_ms, 1), "at": time.time(), **capture, "route": route}
+            self.stalls.append(event)
+        logger.warning(
+            "Event loop blocked for %.0f ms (route=%s, call site=%s)",
+            lag_ms, route, capture["call_site"] or "unknown",
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return lag histograms and recent stalls for /metrics."""
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            return {
+                "enabled": True,
+                "threshold_ms": self.threshold * 1000,
+                "interval_ms": self.interval * 1000,
+                "stall_count": self.stall_count,
+                "loop_lag": self.loop_histogram.snapshot(),
+                "routes": {route: h.snapshot() for route, h in self.route_histograms.items()},
+                "recent_stalls": list(self.stalls),
+            }
+
+
+class LoopMonitorMiddleware:
+    """ASGI middleware that maps the running task to its request route."""
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = self.monitor.track(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.untrack(task)
+
+
+def _route_name(scope: Dict[str, Any]) -> str:
+    """Prefer the route template (/api/x/{id}) over the raw path."""
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+def _call_site(stack: List[traceback.FrameSummary]) -> Optional[str]:
+    """Innermost frame in project code, i.e. the line that made the blocking call."""
+    for frame in reversed(stack):
+        filename = os.path.abspath(frame.filename)
+        if (filename.startswith(_PROJECT_ROOT) and "site-packages" not in filename
+                and filename != os.path.abspath(__file__)):
+            return f"{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return None
+
+
+# Process-wide monitor configured from the environment
+monitor = LoopMonitor.from_env()
@@ -0,0 +1,200 @@
+"""Per-platform generation specs for /generate-content.
+
+The endpoint used to ask Gemini for all four pieces in one free-form reply,
+then wrap the whole reply into every platform and slice it to 500 / 150
+characters for Facebook and Instagram, paying for output tokens that were
+thrown away. Each platform is now generated by its own request, run
+concurrently. Each request carries:
+
+- a JSON response schema, so the section is parsed straight into `outputs`
+  instead of being cut out of prose,
+- a `max_output_tokens` cap sized to that platform's length, and
+- a character target from the platform's rules in the prompt, with the
+  platform's hard limit enforced on the parsed text.
+
+Length rules used (characters):
+    facebook   ~480 shown before "See more" (post limit 63,206), 3 hashtags
+    instagram  caption limit 2,200, ~125 shown in feed; 300 targeted, 10 hashtags
+    master     2-3 paragraph draft, ~1,200
+    wordpress  HTML article body, ~3,500; cut only after a closing block tag
+"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+_STRING = {"type": "string"}
+
+
+@dataclass(frozen=True)
+class PlatformSpec:
+    """How one platform's section is requested, capped and formatted."""
+
+    target_chars: int
+    max_chars: int
+    max_output_tokens: int
+    guidance: str
+    schema: Dict[str, Any]
+    max_hashtags: int = 0
+    # Model routing task (see MODEL_ROUTES in ghostwriter_agent/config.py)
+    task: str = "caption"
+
+
+def _hashtag_schema(limit: int) -> Dict[str, Any]:
+    return {"type": "array", "items": _STRING, "max_items": limit}
+
+
+PLATFORM_SPECS: Dict[str, PlatformSpec] = {
+    "master": PlatformSpec(
+        target_chars=1200,
+        max_chars=2000,
+        max_output_tokens=400,
+        guidance="a master content piece of 2-3 short paragraphs",
+        schema={"type": "object", "properties": {"body": _STRING}, "required": ["body"]},
+        task="long_form",
+    ),
+    "facebook": PlatformSpec(
+        target_chars=480,
+        max_chars=63206,
+        max_output_tokens=200,
+        guidance="an engaging Facebook post with a few emojis",
+        schema={"type": "object", "properties": {"text": _STRING, "hashtags": _hashtag_schema(3)},
+                "required": ["text", "hashtags"]},
+        max_hashtags=3,
+    ),
+    "wordpress": PlatformSpec(
+        target_chars=3500,
+        max_chars=6000,
+        # ~3.5 characters per token of HTML, plus the title and JSON escaping
+        max_output_tokens=1600,
+        guidance="a WordPress blog post body in HTML (<p>, <h2>, <ul> only; no <html>/<body>)",
+        schema={"type": "object", "properties": {"title": _STRING, "html": _STRING},
+                "required": ["title", "html"]},
+        task="long_form",
+    ),
+    "instagram": PlatformSpec(
+        target_chars=300,
+        max_chars=2200,
+        max_output_tokens=150,
+        guidance="a short, catchy Instagram caption whose first sentence works on its own",
+        schema={"type": "object", "properties": {"caption": _STRING, "hashtags": _hashtag_schema(10)},
+                "required": ["caption", "hashtags"]},
+        max_hashtags=10,
+    ),
+}
+
+# Closing tags a WordPress body may be cut after without leaving an element open
+_BLOCK_END = re.compile(r"</(?:p|ul|ol|h2)>", re.IGNORECASE)
+
+# Main text field of each section, used to salvage a reply cut off by the token cap
+_TEXT_FIELD = {"master": "body", "facebook": "text", "wordpress": "html", "instagram": "caption"}
+
+
+def section_prompt(platform: str, topic: str, tone: Optional[str]) -> str:
+    """Prompt for one platform's section."""
+    spec = PLATFORM_SPECS[platform]
+    prompt = (
+        f'Write {spec.guidance} about "{topic}" with a {tone} tone.\n'
+        f"Keep it under {spec.target_chars} characters."
+    )
+    if spec.max_hashtags:
+        prompt += f" Give at most {spec.max_hashtags} hashtags separately, not in the text."
+    return prompt
+
+
+def generation_config(platform: str, structured: bool = True) -> Dict[str, Any]:
+    """Gemini generation config: output cap, plus the JSON schema unless streaming plain text."""
+    spec = PLATFORM_SPECS[platform]
+    config: Dict[str, Any] = {"max_output_tokens": spec.max_output_tokens}
+    if structured:
+        config["response_mime_type"] = "application/json"
+        config["response_schema"] = spec.schema
+    return config
+
+
+def clip(text: str, limit: int) -> str:
+    """Cut `text` to at most `limit` characters, at a word boundary."""
+    text = text.strip()
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 1].rsplit(None, 1)[0] if " " in text[:limit - 1] else text[:limit - 1]
+    return cut.rstrip(" ,;:") + "…"
+
+
+def clip_html(html: str, limit: int) -> str:
+    """
+    Cut an HTML body to at most `limit` characters after its last closing block tag.
+
+    Also drops an unfinished trailing element (a reply cut off by the token
+    cap), so the result never ends inside a tag or an open <p>/<ul>.
+    """
+    html = html.strip()
+    head = html[:limit]
+    ends = list(_BLOCK_END.finditer(head))
+    if len(html) <= limit and (not ends or "<" not in head[ends[-1].end():]):
+        return html  # complete, or plain text with no markup to break
+    if not ends:
+        return f"<p>{clip(re.sub(r'<[^>]*>?', ' ', head), limit - 7)}</p>"
+    return head[:ends[-1].end()]
+
+
+def parse_section(platform: str, text: str) -> Dict[str, Any]:
+    """
+    Parse a section reply into its schema fields.
+
+    A reply cut off by `max_output_tokens` is not valid JSON; the text field
+    written so far is salvaged from it.
+
+    Raises:
+        ValueError: if the reply holds no usable text
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        field = _TEXT_FIELD[platform]
+        match = re.search(rf'"{field}"\s*:\s*"((?:[^"\\]|\\.)*)', text)
+        if not match:
+            raise ValueError(f"Unparseable {platform} section")
+        data = {field: _unescape(match.group(1))}
+    if not isinstance(data, dict) or not str(data.get(_TEXT_FIELD[platform]) or "").strip():
+        raise ValueError(f"Empty {platform} section")
+    return data
+
+
+def _unescape(raw: str) -> str:
+    """Decode a JSON string body that may end mid escape sequence."""
+    for end in range(len(raw), max(len(raw) - 6, -1), -1):
+        try:
+            return json.loads(f'"{raw[:end]}"')
+        except ValueError:
+            continue
+    return raw
+
+
+def _hashtags(tags: Any, limit: int) -> List[str]:
+    if isinstance(tags, str):
+        tags = tags.split()
+    cleaned = []
+    for tag in tags or []:
+        tag = "".join(str(tag).split()).lstrip("#")
+        if tag:
+            cleaned.append(f"#{tag}")
+    return cleaned[:limit]
+
+
+def format_section(platform: str, topic: str, tone: Optional[str], data: Dict[str, Any]) -> str:
+    """Render parsed section fields as the platform's output, within its character limit."""
+    spec = PLATFORM_SPECS[platform]
+    if platform == "master":
+        return f"## {topic}\n\n{clip(data['body'], spec.max_chars)}\n\n**Tone: {tone}**"
+    if platform == "wordpress":
+        return f"<h1>{data.get('title') or topic}</h1>\n\n{clip_html(data['html'], spec.max_chars)}"
+
+    tags = " ".join(_hashtags(data.get("hashtags"), spec.max_hashtags))
+    if platform == "facebook":
+        head = f"💡 {topic}\n\n"
+        body = clip(data["text"], spec.max_chars - len(head) - len(tags) - 2)
+    else:
+        head = f"🔥 {topic}!\n\n"
+        body = clip(data["caption"], spec.max_chars - len(head) - len(tags) - 2)
+    return f"{head}{body}\n\n{tags}".rstrip()
@@ -0,0 +1,219 @@
+"""Due-post dispatcher: publishes scheduled posts when their time comes.
+
+Pending posts are kept in a min-heap of (due_at, user_id, post_id). The heap
+is filled from the store's (status, due_at) index for a rolling horizon, so
+memory and startup cost stay bounded no matter how many posts are pending,
+and no user's posts are scanned. The loop sleeps until the earliest entry is
+due (or a newly saved post is due sooner), then publishes everything due with
+bounded concurrency through the shared publishing service. A post whose
+platform is behind an open circuit breaker is pushed back until the breaker
+probes again, without using up one of its attempts. Threads and Facebook
+posts saved without a user token (including every post saved before tokens
+were stored) are left Scheduled for a manual publish rather than failed.
+Refills page past posts already queued, in flight or waiting for a token, so
+a backlog of those cannot stall newer posts or keep the loop spinning. Store
+calls run in worker threads, off the event loop.
+
+Environment variables:
+    POST_DISPATCHER_ENABLED=1         run the dispatcher (default on)
+    POST_DISPATCHER_CONCURRENCY=8     max posts published at once
+    POST_DISPATCHER_HORIZON=3600      seconds of upcoming posts kept in memory
+    POST_DISPATCHER_BATCH=10000       max posts loaded per refill
+    POST_DISPATCHER_MAX_ATTEMPTS=3    attempts before a post is marked Failed
+    POST_DISPATCHER_MAX_LATENESS=86400  posts overdue by more than this are left alone
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .post_store import PostStore, normalize_due_time, post_store
+from .publishing import ProviderUnavailable, PublishError, has_credentials, publish_post
+
+logger = logging.getLogger(__name__)
+
+HeapEntry = Tuple[float, str, str]
+
+
+class PostDispatcher:
+    """In-process scheduler that publishes posts when they are due."""
+
+    def __init__(self, store: PostStore, concurrency: int = 8, horizon: float = 3600.0,
+                 batch_size: int = 10000, max_attempts: int = 3, retry_delay: float = 60.0,
+                 max_lateness: float = 86400.0, enabled: bool = True):
+        self.store = store
+        self.concurrency = concurrency
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_lateness = max_lateness
+        self.enabled = enabled
+
+        self._heap: List[HeapEntry] = []
+        self._queued: Set[Tuple[str, str]] = set()
+        self._loaded_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._dispatching: Set[Tuple[str, str]] = set()
+        self._attempts: Dict[Tuple[str, str], int] = {}
+        # Posts left Scheduled for lack of a token; refills do not queue them again
+        self._needs_auth: Set[Tuple[str, str]] = set()
+        self.stats = {"published": 0, "failed": 0, "retried": 0, "skipped": 0, "deferred": 0,
+                      "needs_auth": 0}
+
+    @classmethod
+    def from_env(cls, store: PostStore) -> "PostDispatcher":
+        return cls(
+            store,
+            concurrency=int(os.getenv("POST_DISPATCHER_CONCURRENCY", "8")),
+            horizon=float(os.getenv("POST_DISPATCHER_HORIZON", "3600")),
+            batch_size=int(os.getenv("POST_DISPATCHER_BATCH", "10000")),
+            max_attempts=int(os.getenv("POST_DISPATCHER_MAX_ATTEMPTS", "3")),
+            max_lateness=float(os.getenv("POST_DISPATCHER_MAX_LATENESS", "86400")),
+            enabled=os.getenv("POST_DISPATCHER_ENABLED", "1").lower() not in ("0", "false", "no"),
+        )
+
+    # Lifecycle
+
+    def start(self) -> None:
+        if not self.enabled or self._runner is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._runner = asyncio.create_task(self._run(), name="post-dispatcher")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    # Scheduling
+
+    def schedule(self, user_id: str, post: Dict[str, Any]) -> None:
+        """Queue a newly saved post if it falls inside the loaded horizon."""
+        due_at = normalize_due_time(post.get("dateTime"))
+        if due_at is None or due_at > self._loaded_until:
+            return  # picked up by a later refill
+        self._push(due_at, user_id, post["id"])
+
+    def _push(self, due_at: float, user_id: str, post_id: str) -> bool:
+        key = (user_id, post_id)
+        if key in self._queued or key in self._needs_auth:
+            return False
+        self._queued.add(key)
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (due_at, user_id, post_id))
+        if self._wakeup is not None and (earliest is None or due_at < earliest):
+            self._wakeup.set()
+        return True
+
+    async def _refill(self, now: float) -> None:
+        """Load up to `batch_size` new posts due within the horizon from the (status, due_at) index."""
+        until = now + self.horizon
+        after, loaded = None, 0
+        while True:
+            rows = await asyncio.to_thread(
+                self.store.due_post_keys, "Scheduled", now - self.max_lateness, until, self.batch_size, after
+            )
+            for due_at, user_id, post_id in rows:
+                if (user_id, post_id) not in self._dispatching and self._push(due_at, user_id, post_id):
+                    loaded += 1
+            if len(rows) < self.batch_size:
+                self._loaded_until = until
+                return
+            after = rows[-1]
+            if loaded >= self.batch_size:
+                # Later posts are loaded once these are dispatched
+                self._loaded_until = after[0]
+                return
+
+    async def _run(self) -> None:
+        while True:
+            now = time.time()
+            if now >= self._loaded_until or not self._heap:
+                await self._refill(now)
+
+            while self._heap and self._heap[0][0] <= now:
+                _, user_id, post_id = heapq.heappop(self._heap)
+                self._queued.discard((user_id, post_id))
+                self._dispatching.add((user_id, post_id))
+                await self._semaphore.acquire()
+                task = asyncio.create_task(self._dispatch(user_id, post_id))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            next_due = self._heap[0][0] if self._heap else self._loaded_until
+            timeout = max(0.0, min(next_due, self._loaded_until) - time.time())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self, user_id: str, post_id: str) -> None:
+        key = (user_id, post_id)
+        try:
+            credentials = await asyncio.to_thread(self.store.get_credentials, user_id, post_id)
+            post = await asyncio.to_thread(self.store.get_post, user_id, post_id)
+            if post and not has_credentials(post.get("platform", ""), credentials):
+                # Not an attempt: retrying cannot succeed and failing would drop the user's schedule
+                self._attempts.pop(key, None)
+                self._needs_auth.add(key)
+                self.stats["needs_auth"] += 1
+                return
+            await publish_post(user_id, post_id, require_status="Scheduled", store=self.store, **credentials)
+            self._attempts.pop(key, None)
+            self.stats["published"] += 1
+        except ProviderUnavailable as e:
+            self.stats["deferred"] += 1
+            self._push(time.time() + max(e.retry_after, 1.0), user_id, post_id)
+        except PublishError as e:
+            if e.status_code in (404, 409):
+                # Deleted, already published, or being published elsewhere
+                self._attempts.pop(key, None)
+                self.stats["skipped"] += 1
+            else:
+                await self._retry_or_fail(user_id, post_id, e.message)
+        except Exception as e:
+            logger.exception("Scheduled publish of %s/%s failed", user_id, post_id)
+            await self._retry_or_fail(user_id, post_id, str(e))
+        finally:
+            self._dispatching.discard(key)
+            self._semaphore.release()
+
+    async def _retry_or_fail(self, user_id: str, post_id: str, error: str) -> None:
+        key = (user_id, post_id)
+        attempts = self._attempts.get(key, 0) + 1
+        if attempts < self.max_attempts:
+            self._attempts[key] = attempts
+            self.stats["retried"] += 1
+            self._push(time.time() + self.retry_delay * 2 ** (attempts - 1), user_id, post_id)
+            return
+        self._attempts.pop(key, None)
+        self.stats["failed"] += 1
+        await asyncio.to_thread(self.store.update_post, user_id, post_id, {"status": "Failed", "error": error})
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth and outcome counters for /metrics."""
+        return {
+            "enabled": self.enabled,
+            "queued": len(self._heap),
+            "in_flight": len(self._inflight),
+            "next_due": self._heap[0][0] if self._heap else None,
+            **self.stats,
+        }
+
+
+# Process-wide dispatcher
+post_dispatcher = PostDispatcher.from_env(post_store)
@@ -0,0 +1,374 @@
+"""Indexed scheduled-post store backed by SQLite (WAL mode).
+
+Each post is one row keyed by (user_id, post_id) with indexed status and
+normalized due time, so single-post reads and updates are B-tree lookups
+instead of rewriting the user's whole JSON file. The full post (in the shape
+the frontend expects) is kept as JSON in the `data` column.
+
+Publish credentials (Meta user / page tokens) saved with a post are kept in
+the separate `credentials` column, in plaintext, until the post is Published,
+Failed or deleted; the column is then cleared. `secure_delete` overwrites the
+freed bytes in the database file.
+
+Calls block for up to `busy_timeout` (30s) while another worker holds the
+write lock, so async code runs them with `asyncio.to_thread` (and publishes
+under `aclaim`) rather than on the event loop.
+
+One-shot migration from the legacy `scheduled_posts/<user_id>.json` files:
+    python -m backend.services.post_store migrate --dir scheduled_posts
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_posts (
+    user_id    TEXT NOT NULL,
+    post_id    TEXT NOT NULL,
+    platform   TEXT,
+    status     TEXT NOT NULL,
+    due_at     REAL,
+    data       TEXT NOT NULL,
+    credentials TEXT,
+    UNIQUE (user_id, post_id)
+);
+CREATE INDEX IF NOT EXISTS idx_scheduled_posts_status_due
+    ON scheduled_posts (status, due_at);
+CREATE TABLE IF NOT EXISTS publish_jobs (
+    job_id     TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    data       TEXT NOT NULL
+);
+"""
+
+
+# Statuses after which a post is never published again, so its credentials are dropped
+TERMINAL_STATUSES = ("Published", "Failed")
+
+# Seconds after which an unfinished publish claim is considered abandoned
+CLAIM_TIMEOUT = float(os.getenv("POST_CLAIM_TIMEOUT", "300"))
+
+
+class PostClaimedError(Exception):
+    """Raised when a post is already being published by another request."""
+
+
+def normalize_due_time(value: Optional[str]) -> Optional[float]:
+    """Convert a post's `dateTime` to a UTC epoch timestamp.
+
+    Naive values (the frontend sends `YYYY-MM-DDTHH:MM:SS`) are taken as UTC.
+    Returns None if the value is missing or cannot be parsed.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class PostStore:
+    """SQLite store for scheduled posts, one connection per thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute("PRAGMA secure_delete=ON")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(scheduled_posts)")}
+                    if "credentials" not in columns:
+                        conn.execute("ALTER TABLE scheduled_posts ADD COLUMN credentials TEXT")
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that takes the database write lock up front."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Reads
+
+    def list_posts(self, user_id: str) -> List[Dict[str, Any]]:
+        """All posts for a user in the order they were saved."""
+        rows = self._connect().execute(
+            "SELECT data FROM scheduled_posts WHERE user_id = ? ORDER BY rowid", (user_id,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_post(self, user_id: str, post_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT data FROM scheduled_posts WHERE user_id = ? AND post_id = ?", (user_id, post_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def posts_by_status(self, status: str, due_before: Optional[float] = None,
+                        limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Posts with a status, earliest due first, each tagged with `userId`."""
+        query = "SELECT user_id, data FROM scheduled_posts WHERE status = ?"
+        params: List[Any] = [status]
+        if due_before is not None:
+            query += " AND due_at <= ?"
+            params.append(due_before)
+        query += " ORDER BY due_at"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self._connect().execute(query, params).fetchall()
+        return [{**json.loads(data), "userId": user_id} for user_id, data in rows]
+
+    def due_post_keys(self, status: str, due_after: float, due_before: float, limit: int,
+                      after: Optional[tuple] = None) -> List[tuple]:
+        """(due_at, user_id, post_id) for posts due in [due_after, due_before], earliest first.
+
+        Pass the last row of a page as `after` to get the next page.
+        """
+        query = "SELECT due_at, user_id, post_id FROM scheduled_posts WHERE status = ? AND due_at BETWEEN ? AND ?"
+        params: List[Any] = [status, due_after, due_before]
+        if after is not None:
+            query += " AND (due_at, user_id, post_id) > (?, ?, ?)"
+            params.extend(after)
+        query += " ORDER BY due_at, user_id, post_id LIMIT ?"
+        params.append(limit)
+        return self._connect().execute(query, params).fetchall()
+
+    def get_credentials(self, user_id: str, post_id: str) -> Dict[str, Any]:
+        """Publish credentials saved with a post (never part of the post JSON)."""
+        row = self._connect().execute(
+            "SELECT credentials FROM scheduled_posts WHERE user_id = ? AND post_id = ?", (user_id, post_id)
+        ).fetchone()
+        return json.loads(row[0]) if row and row[0] else {}
+
+    # Writes
+
+    def add_post(self, user_id: str, post: Dict[str, Any],
+                 credentials: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._transaction() as conn:
+            self._insert(conn, user_id, post, ignore_existing=False)
+            if credentials:
+                conn.execute(
+                    "UPDATE scheduled_posts SET credentials = ? WHERE user_id = ? AND post_id = ?",
+                    (json.dumps(credentials), user_id, post["id"]),
+                )
+        return post
+
+    def update_post(self, user_id: str, post_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge `fields` into a post. Returns the updated post, or None if missing.
+
+        Saved credentials are cleared once the post reaches a terminal status.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM scheduled_posts WHERE user_id = ? AND post_id = ?", (user_id, post_id)
+            ).fetchone()
+            if not row:
+                return None
+            post = {**json.loads(row[0]), **fields}
+            status = post.get("status", "Scheduled")
+            conn.execute(
+                "UPDATE scheduled_posts SET platform = ?, status = ?, due_at = ?, data = ?, "
+                "credentials = CASE WHEN ? THEN NULL ELSE credentials END "
+                "WHERE user_id = ? AND post_id = ?",
+                (post.get("platform"), status, normalize_due_time(post.get("dateTime")), json.dumps(post),
+                 status in TERMINAL_STATUSES, user_id, post_id),
+            )
+        return post
+
+    @contextmanager
+    def claim(self, user_id: str, post_id: str, status: str = "Publishing") -> Iterator[Optional[Dict[str, Any]]]:
+        """Mark a post as in flight for the duration of a publish.
+
+        Concurrent claims on the same post (from any worker process) raise
+        PostClaimedError. If the post still carries the claim status on exit,
+        its previous status is restored; callers mark success by updating the
+        status inside the block. Yields the post, or None if it does not exist.
+        """
+        post = self._take_claim(user_id, post_id, status)
+        if post is None:
+            yield None
+            return
+        try:
+            yield post
+        finally:
+            self._release_claim(user_id, post_id, status)
+
+    @asynccontextmanager
+    async def aclaim(self, user_id: str, post_id: str,
+                     status: str = "Publishing") -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """`claim` for async callers: the write lock is taken and released in a worker thread."""
+        post = await asyncio.to_thread(self._take_claim, user_id, post_id, status)
+        if post is None:
+            yield None
+            return
+        try:
+            yield post
+        finally:
+            await asyncio.to_thread(self._release_claim, user_id, post_id, status)
+
+    def _take_claim(self, user_id: str, post_id: str, status: str) -> Optional[Dict[str, Any]]:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM scheduled_posts WHERE user_id = ? AND post_id = ?", (user_id, post_id)
+            ).fetchone()
+            if not row:
+                return None
+            post = json.loads(row[0])
+            if post.get("status") == status and time.time() - post.get("claimedAt", 0) < CLAIM_TIMEOUT:
+                raise PostClaimedError(f"Post {post_id} is already being published")
+            previous = post.get("previousStatus") if post.get("status") == status else post.get("status")
+            claimed = {**post, "status": status, "previousStatus": previous, "claimedAt": time.time()}
+            conn.execute(
+                "UPDATE scheduled_posts SET status = ?, data = ? WHERE user_id = ? AND post_id = ?",
+                (status, json.dumps(claimed), user_id, post_id),
+            )
+        return post
+
+    def _release_claim(self, user_id: str, post_id: str, status: str) -> None:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM scheduled_posts WHERE user_id = ? AND post_id = ?", (user_id, post_id)
+            ).fetchone()
+            if row:
+                current = json.loads(row[0])
+                if current.get("status") == status:
+                    current["status"] = current.get("previousStatus") or "Scheduled"
+                current.pop("previousStatus", None)
+                current.pop("claimedAt", None)
+                conn.execute(
+                    "UPDATE scheduled_posts SET status = ?, data = ? WHERE user_id = ? AND post_id = ?",
+                    (current["status"], json.dumps(current), user_id, post_id),
+                )
+
+    def delete_post(self, user_id: str, post_id: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM scheduled_posts WHERE user_id = ? AND post_id = ?", (user_id, post_id)
+            )
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, user_id: str, post: Dict[str, Any], ignore_existing: bool) -> int:
+        verb = "INSERT OR IGNORE" if ignore_existing else "INSERT"
+        cursor = conn.execute(
+            f"{verb} INTO scheduled_posts (user_id, post_id, platform, status, due_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, post["id"], post.get("platform"), post.get("status", "Scheduled"),
+             normalize_due_time(post.get("dateTime")), json.dumps(post)),
+        )
+        return cursor.rowcount
+
+    # Publish jobs (shared across worker processes)
+
+    def save_job(self, job: Dict[str, Any]) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO publish_jobs (job_id, updated_at, data) VALUES (?, ?, ?)",
+                (job["id"], time.time(), json.dumps(job)),
+            )
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT data FROM publish_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def prune_jobs(self, older_than: float) -> int:
+        """Delete job records last updated before `older_than` (epoch seconds)."""
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM publish_jobs WHERE updated_at < ?", (older_than,))
+        return cursor.rowcount
+
+    # Migration
+
+    def migrate_json_dir(self, posts_dir: str) -> Dict[str, int]:
+        """Import legacy `<user_id>.json` files, then rename them to `.json.migrated`.
+
+        Safe to run repeatedly: posts already in the store are skipped.
+        """
+        stats = {"files": 0, "posts": 0, "skipped": 0}
+        directory = Path(posts_dir)
+        if not directory.is_dir():
+            return stats
+        for path in sorted(directory.glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    posts = json.load(f)
+            except (OSError, ValueError):
+                continue
+            user_id = path.stem
+            with self._transaction() as conn:
+                for post in posts if isinstance(posts, list) else []:
+                    if not isinstance(post, dict) or not post.get("id"):
+                        stats["skipped"] += 1
+                        continue
+                    if self._insert(conn, user_id, post, ignore_existing=True):
+                        stats["posts"] += 1
+                    else:
+                        stats["skipped"] += 1
+            try:
+                path.rename(path.with_name(path.name + ".migrated"))
+            except OSError:
+                pass
+            stats["files"] += 1
+        return stats
+
+
+# Process-wide store used by the API
+POSTS_DIR = os.getenv("SCHEDULED_POSTS_DIR", "scheduled_posts")
+post_store = PostStore(os.getenv("SCHEDULED_POSTS_DB", os.path.join(POSTS_DIR, "posts.db")))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Scheduled-post store maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import legacy per-user JSON files.")
+    migrate.add_argument("--dir", default=POSTS_DIR, help="Directory with <user_id>.json files.")
+    migrate.add_argument("--db", default=post_store.path, help="SQLite database path.")
+    args = parser.parse_args(argv)
+
+    stats = PostStore(args.db).migrate_json_dir(args.dir)
+    print(f"Migrated {stats['posts']} post(s) from {stats['files']} file(s); skipped {stats['skipped']}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
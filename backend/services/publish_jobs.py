@@ -0,0 +1,239 @@
+"""Background publish jobs for the publish-* endpoints.
+
+A publish makes two or three sequential provider round trips (Meta container
+then publish, or a WordPress create), so holding the HTTP request open ties
+frontend latency to provider latency. Instead the endpoints can submit a job
+and return 202 with its id; a bounded pool of worker tasks runs the shared
+publishing service and records progress in the post store, where
+`GET /api/jobs/{id}` reads it from any worker process.
+
+Credentials only travel through the in-memory queue and are never written to
+the job record. Record writes run in worker threads, one at a time per job,
+so they neither block the event loop nor land out of order.
+
+A job whose platform is behind an open circuit breaker is not failed: it goes
+back to "queued" and is re-queued once the breaker probes again, up to
+PUBLISH_JOB_MAX_DEFERRALS times. The manual publish endpoints use the same
+path when a synchronous publish hits an open breaker.
+
+Environment variables:
+    PUBLISH_JOB_WORKERS=4        concurrent publish jobs per process
+    PUBLISH_JOB_QUEUE=1000       max jobs waiting before submissions are refused
+    PUBLISH_JOB_TTL=86400        seconds finished job records are kept
+    PUBLISH_JOB_MAX_DEFERRALS=10  provider-outage deferrals before a job fails
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .post_store import PostStore, post_store
+from .publishing import ProviderUnavailable, PublishError, publish_post
+
+logger = logging.getLogger(__name__)
+
+
+class PublishJobs:
+    """Job registry plus a fixed pool of publish workers."""
+
+    def __init__(self, store: PostStore, workers: int = 4, max_queue: int = 1000, ttl: float = 86400.0,
+                 max_deferrals: int = 10):
+        self.store = store
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.max_deferrals = max_deferrals
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+        # job id -> (task re-queueing it, job) for jobs waiting out a provider outage
+        self._deferred: Dict[str, Tuple[asyncio.Task, Dict[str, Any]]] = {}
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0, "deferred": 0}
+
+    @classmethod
+    def from_env(cls, store: PostStore) -> "PublishJobs":
+        return cls(
+            store,
+            workers=int(os.getenv("PUBLISH_JOB_WORKERS", "4")),
+            max_queue=int(os.getenv("PUBLISH_JOB_QUEUE", "1000")),
+            ttl=float(os.getenv("PUBLISH_JOB_TTL", "86400")),
+            max_deferrals=int(os.getenv("PUBLISH_JOB_MAX_DEFERRALS", "10")),
+        )
+
+    # Lifecycle
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self.store.prune_jobs(time.time() - self.ttl)
+        self._queue = asyncio.Queue(self.max_queue)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"publish-job-{i}") for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs that never started would otherwise stay "queued" forever
+        holds = [task for task, _ in self._deferred.values()]
+        for task in holds:
+            task.cancel()
+        await asyncio.gather(*holds, return_exceptions=True)
+        for _, job in list(self._deferred.values()):
+            await self._finish(job, error=PublishError("Server shut down before the job ran", 503))
+        self._deferred.clear()
+        while self._queue is not None and not self._queue.empty():
+            job, _ = self._queue.get_nowait()
+            await self._finish(job, error=PublishError("Server shut down before the job ran", 503))
+
+    # Jobs
+
+    async def submit(self, user_id: str, post_id: str, platform: str, delay: float = 0.0,
+                     **credentials: Any) -> Dict[str, Any]:
+        """
+        Queue a publish and return its job record.
+
+        Args:
+            user_id: Owner of the post
+            post_id: Post to publish
+            platform: Platform the post must belong to
+            delay: Seconds to hold the job before queueing it (provider outage)
+            **credentials: access_token / page_id / page_access_token for publish_post
+
+        Returns:
+            The new job record (status "queued")
+
+        Raises:
+            PublishError: 503 if the pool is not running or the queue is full
+        """
+        if self._queue is None or not self._tasks:
+            raise PublishError("Publish workers are not running", 503)
+        job = {
+            "id": f"job-{uuid.uuid4()}",
+            "status": "queued",
+            "progress": "queued",
+            "user_id": user_id,
+            "post_id": post_id,
+            "platform": platform,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "url": None,
+            "post": None,
+            "error": None,
+            "status_code": None,
+            "deferrals": 0,
+            "not_before": None,
+        }
+        if len(self._deferred) >= self.max_queue if delay > 0 else self._queue.full():
+            self.stats["rejected"] += 1
+            raise PublishError("Too many publish jobs queued, try again later", 503)
+        if delay > 0:
+            self._defer(job, credentials, delay)
+        else:
+            # Record the job before a worker can pick it up and write its progress
+            await self._save(job)
+            try:
+                self._queue.put_nowait((job, credentials))
+            except asyncio.QueueFull:  # filled up while the record was written
+                self.stats["rejected"] += 1
+                error = PublishError("Too many publish jobs queued, try again later", 503)
+                await self._finish(job, error=error)
+                raise error
+        self.stats["submitted"] += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get_job, job_id)
+
+    def _defer(self, job: Dict[str, Any], credentials: Dict[str, Any], delay: float) -> None:
+        """Hold a job until its provider's breaker probes again, then queue it."""
+        job.update({"status": "queued", "progress": "waiting for provider", "not_before": time.time() + delay})
+        task = asyncio.create_task(self._hold(job, credentials, delay), name=f"hold-{job['id']}")
+        self._deferred[job["id"]] = (task, job)
+        self.stats["deferred"] += 1
+
+    async def _hold(self, job: Dict[str, Any], credentials: Dict[str, Any], delay: float) -> None:
+        await self._save(job)
+        await asyncio.sleep(delay)
+        job["progress"] = "queued"
+        await self._save(job)
+        self._deferred.pop(job["id"], None)
+        try:
+            self._queue.put_nowait((job, credentials))
+        except asyncio.QueueFull:
+            await self._finish(job, error=PublishError("Too many publish jobs queued, try again later", 503))
+
+    async def _worker(self) -> None:
+        while True:
+            job, credentials = await self._queue.get()
+            self._running += 1
+            try:
+                await self._run(job, credentials)
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any], credentials: Dict[str, Any]) -> None:
+        job.update({"status": "running", "started_at": time.time()})
+
+        async def progress(stage: str) -> None:
+            job["progress"] = stage
+            await self._save(job)
+
+        try:
+            result = await publish_post(
+                job["user_id"], job["post_id"], platform=job["platform"],
+                store=self.store, on_progress=progress, **credentials
+            )
+        except ProviderUnavailable as e:
+            if job["deferrals"] >= self.max_deferrals:
+                await self._finish(job, error=e)
+                return
+            job["deferrals"] += 1
+            self._defer(job, credentials, max(e.retry_after, 1.0))
+        except PublishError as e:
+            await self._finish(job, error=e)
+        except asyncio.CancelledError:
+            await self._finish(job, error=PublishError("Server shut down while publishing", 503))
+            raise
+        except Exception as e:
+            logger.exception("Publish job %s failed", job["id"])
+            await self._finish(job, error=PublishError(f"Error publishing: {e}", 500))
+        else:
+            await self._finish(job, result=result)
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        # A copy, so later progress updates cannot change what this write stores
+        await asyncio.to_thread(self.store.save_job, dict(job))
+
+    async def _finish(self, job: Dict[str, Any], result: Optional[Dict[str, Any]] = None,
+                      error: Optional[PublishError] = None) -> None:
+        job["finished_at"] = time.time()
+        if error is None:
+            job.update({"status": "succeeded", "progress": "done", "url": result["url"], "post": result["post"]})
+            self.stats["succeeded"] += 1
+        else:
+            job.update({"status": "failed", "progress": "failed",
+                        "error": error.message, "status_code": error.status_code})
+            self.stats["failed"] += 1
+        await self._save(job)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth and outcome counters for /metrics."""
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "waiting_for_provider": len(self._deferred),
+            "running": self._running,
+            **self.stats,
+        }
+
+
+# Process-wide job pool
+publish_jobs = PublishJobs.from_env(post_store)
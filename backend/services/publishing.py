@@ -0,0 +1,202 @@
+"""Publish stored scheduled posts through the platform helpers.
+
+Shared by the manual publish endpoints and the due-post dispatcher, so both
+claim the post, call the provider and record the result the same way.
+
+While a platform's circuit breaker is open (see helpers/circuit_breaker.py)
+the helpers fail fast and the publish raises ProviderUnavailable, so callers
+can queue it for after `retry_after` instead of reporting a failure.
+
+Store reads and writes run in worker threads, so a publish waiting on another
+worker's write lock does not stall the event loop.
+"""
+import asyncio
+import re
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from helpers.facebook_api import apublish_to_facebook
+from helpers.threads_api import apublish_to_threads
+from helpers.wordpress_api import WordPressAPI
+
+from .post_store import PostClaimedError, PostStore, post_store
+
+PLATFORM_NAMES = {"wordpress": "WordPress", "threads": "Threads", "facebook": "Facebook"}
+
+# Meta platforms publish with the user's token (any one listed); WordPress uses the server's WP_* settings
+REQUIRED_CREDENTIALS = {"threads": ("access_token",), "facebook": ("access_token", "page_access_token")}
+
+_WP_AUTH_GUIDANCE = (
+    " Hint: Ensure WP_USER has Author or higher role, and WP_PASSWORD is an Application Password. "
+    "If the site is not using HTTPS, enable application passwords on HTTP or switch to HTTPS."
+)
+
+
+class PublishError(Exception):
+    """A publish attempt failed; `status_code` is the HTTP status to report."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ProviderUnavailable(PublishError):
+    """The platform's circuit breaker is open; try again in `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message, 503)
+        self.retry_after = retry_after
+
+
+def has_credentials(platform: str, credentials: Dict[str, Any]) -> bool:
+    """Whether `credentials` are enough to publish to `platform`."""
+    required = REQUIRED_CREDENTIALS.get(platform.lower())
+    return not required or any(credentials.get(key) for key in required)
+
+
+async def publish_post(
+    user_id: str,
+    post_id: str,
+    platform: Optional[str] = None,
+    access_token: Optional[str] = None,
+    page_id: Optional[str] = None,
+    page_access_token: Optional[str] = None,
+    require_status: Optional[str] = None,
+    store: PostStore = post_store,
+    on_progress: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Publish a stored post and mark it Published.
+
+    Args:
+        user_id: Owner of the post
+        post_id: Post to publish
+        platform: If given, the post must belong to this platform
+        access_token: Threads/Facebook user token
+        page_id: Optional Facebook page ID
+        page_access_token: Optional Facebook page token
+        require_status: If given, only publish posts currently in this status
+        store: Post store to read and update
+        on_progress: Optional coroutine function awaited with each publish stage name
+
+    Returns:
+        Dict with the updated post and the published URL
+
+    Raises:
+        ProviderUnavailable: if the platform's circuit breaker is open
+        PublishError: with the HTTP status code to report
+    """
+    post = await asyncio.to_thread(store.get_post, user_id, post_id)
+    if not post:
+        raise PublishError("Post not found", 404)
+
+    post_platform = post.get("platform", "").lower()
+    if platform and post_platform != platform:
+        raise PublishError(
+            f"Can only publish {PLATFORM_NAMES.get(platform, platform)} posts. This is a {post.get('platform')} post."
+        )
+    if post_platform not in PLATFORM_NAMES:
+        raise PublishError(f"Publishing to {post.get('platform')} is not supported.")
+
+    wp_client = WordPressAPI()
+    if post_platform == "wordpress" and not wp_client.is_configured():
+        raise PublishError(
+            "WordPress credentials not configured. Please set WP_SITE, WP_USER, and WP_PASSWORD in .env"
+        )
+
+    progress = on_progress or _no_progress
+    try:
+        # Claim the post so concurrent requests/workers cannot publish it twice
+        await progress("claiming")
+        async with store.aclaim(user_id, post_id) as claimed:
+            if claimed is None:
+                raise PublishError("Post not found", 404)
+            if require_status and claimed.get("status") != require_status:
+                raise PublishError(f"Post is {claimed.get('status')}, not {require_status}.", 409)
+
+            await progress(f"publishing to {PLATFORM_NAMES[post_platform]}")
+            if post_platform == "wordpress":
+                fields = await _publish_wordpress(wp_client, claimed)
+            elif post_platform == "threads":
+                fields = await _publish_threads(claimed, access_token)
+            else:
+                fields = await _publish_facebook(claimed, access_token, page_id, page_access_token)
+
+            await progress("recording result")
+            fields.update({"status": "Published", "publishedAt": datetime.utcnow().isoformat()})
+            await asyncio.to_thread(store.update_post, user_id, post_id, fields)
+    except PostClaimedError as e:
+        raise PublishError(str(e), 409)
+
+    return {
+        "post": await asyncio.to_thread(store.get_post, user_id, post_id),
+        "url": fields.get(f"{post_platform}Url"),
+    }
+
+
+async def _no_progress(stage: str) -> None:
+    pass
+
+
+async def _publish_wordpress(wp_client: WordPressAPI, post: Dict[str, Any]) -> Dict[str, Any]:
+    # Extract title from content or use date
+    content = post.get("content", "")
+    title = content.split('\n')[0][:100] if content else f"Post from {datetime.utcnow().strftime('%B %d, %Y')}"
+
+    # Remove HTML tags from title if present
+    title = re.sub(r'<[^>]+>', '', title).strip()
+
+    # Create as draft first to avoid stricter publish permissions
+    result = await wp_client.acreate_post(title=title, content=content, status="draft")
+    _check_circuit(result)
+
+    if result.get("success"):
+        fields = {}
+        if result.get("url") or result.get("post_id"):
+            fields["wordpressUrl"] = result.get("url", "")
+            fields["wordpressId"] = result.get("post_id", "")
+        return fields
+    if result.get("status_code"):
+        # Provide clearer guidance for common auth/role issues
+        guidance = _WP_AUTH_GUIDANCE if result["status_code"] in (401, 403) else ""
+        raise PublishError(f"WordPress API error: {result.get('message')}.{guidance}", result["status_code"])
+    raise PublishError(f"Error publishing to WordPress: {result.get('message')}", 500)
+
+
+async def _publish_threads(post: Dict[str, Any], access_token: Optional[str]) -> Dict[str, Any]:
+    image_url = post.get("imageUrl")
+    result = await apublish_to_threads(
+        text=post.get("content", ""),
+        access_token=access_token,
+        media_url=image_url,
+        media_type="IMAGE" if image_url else "TEXT"
+    )
+    _check_circuit(result)
+    if not result.get("success"):
+        raise PublishError(result.get("message", "Failed to publish to Threads"))
+    return {"threadsUrl": result.get("url", ""), "threadsId": result.get("thread_id", "")}
+
+
+async def _publish_facebook(
+    post: Dict[str, Any],
+    access_token: Optional[str],
+    page_id: Optional[str],
+    page_access_token: Optional[str],
+) -> Dict[str, Any]:
+    result = await apublish_to_facebook(
+        message=post.get("content", ""),
+        access_token=access_token,
+        page_id=page_id,
+        page_access_token=page_access_token,
+        image_url=post.get("imageUrl")
+    )
+    _check_circuit(result)
+    if not result.get("success"):
+        raise PublishError(result.get("message", "Failed to publish to Facebook"))
+    return {"facebookUrl": result.get("url", ""), "facebookId": result.get("post_id", "")}
+
+
+def _check_circuit(result: Dict[str, Any]) -> None:
+    if result.get("circuit_open"):
+        raise ProviderUnavailable(result["message"], result["retry_after"])
@@ -0,0 +1,109 @@
+"""Request-scoped cancellation when the client disconnects.
+
+Starlette keeps running a handler after its client has gone, so a user who
+navigated away mid-generation still paid for the whole Gemini / ADK /
+nanobanana call. For the model- and provider-backed routes, this ASGI
+middleware runs the handler as a task while a reader forwards the request
+body and then waits for `http.disconnect`. If the client disconnects before
+the response is complete, the handler task is cancelled.
+
+The cancellation propagates through everything the handler awaits:
+- a model limiter slot, queued or held,
+- hedged attempts and the agent pipeline's stage tasks,
+- a shared single-flight call, once no other request is waiting on it.
+
+Cancelled requests are counted per route for /metrics.
+
+Environment variables:
+    CANCEL_ON_DISCONNECT=1   cancel handlers of disconnected clients
+"""
+import asyncio
+import os
+from typing import Any, Dict, Tuple
+
+# Routes whose handlers spend model / provider quota
+CANCEL_PATHS: Tuple[str, ...] = (
+    "/api/generate-content",
+    "/api/generate-image",
+    "/api/chat",
+    "/api/agents/",
+)
+
+
+class DisconnectTracker:
+    """Which requests are cancelled on disconnect, and how many were."""
+
+    def __init__(self, enabled: bool = True, paths: Tuple[str, ...] = CANCEL_PATHS):
+        self.enabled = enabled
+        self.paths = paths
+        self.stats = {"disconnects": 0, "cancelled": 0}
+        self.by_route: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "DisconnectTracker":
+        return cls(enabled=os.getenv("CANCEL_ON_DISCONNECT", "1").lower() in ("1", "true", "yes"))
+
+    def applies(self, scope: Dict[str, Any]) -> bool:
+        return self.enabled and scope["type"] == "http" and scope.get("path", "").startswith(self.paths)
+
+    def record(self, scope: Dict[str, Any], cancelled: bool) -> None:
+        self.stats["disconnects"] += 1
+        if cancelled:
+            self.stats["cancelled"] += 1
+            route = scope.get("route")
+            name = f"{scope.get('method', '')} {getattr(route, 'path', None) or scope.get('path', '')}"
+            self.by_route[name] = self.by_route.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Disconnect and cancellation counters for /metrics."""
+        return {"enabled": self.enabled, **self.stats, "cancelled_by_route": dict(self.by_route)}
+
+
+class CancelOnDisconnectMiddleware:
+    """ASGI middleware that cancels the handler when its client disconnects."""
+
+    def __init__(self, app, tracker: DisconnectTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if not self.tracker.applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        messages: asyncio.Queue = asyncio.Queue()
+        response_complete = False
+
+        async def send_wrapper(message):
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        handler = asyncio.ensure_future(self.app(scope, messages.get, send_wrapper))
+
+        async def read():
+            # Forward the body, then wait for the client to go away
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    if not response_complete:
+                        cancel = not handler.done()
+                        self.tracker.record(scope, cancel)
+                        if cancel:
+                            handler.cancel()
+                    return
+
+        reader = asyncio.ensure_future(read())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not reader.done():
+                raise  # the server itself is cancelling this request
+        finally:
+            reader.cancel()
+
+
+# Process-wide tracker configured from the environment
+tracker = DisconnectTracker.from_env()
@@ -0,0 +1,202 @@
+"""In-memory LRU cache with write-behind for chat session histories.
+
+Active chat sessions are served from memory instead of re-reading and
+rewriting `sessions/<id>.json` on every turn. New turns are applied to the
+cached history immediately and queued as pending writes; a background task
+flushes the queue every few seconds with the same locked read-modify-write
+as before (appending to what is on disk, or replacing it when the frontend
+sent an explicit history), so turns written by other worker processes are
+not overwritten. Pending writes are flushed on shutdown.
+
+Entries are evicted least-recently-used when the cache is full and after
+TTL seconds without access; pending writes are kept separately, so eviction
+never drops an unflushed turn. With several workers a cached history can miss
+turns another worker added until its entry expires; nothing is lost on disk.
+
+Environment variables:
+    SESSION_CACHE_SIZE=1024        max sessions kept in memory
+    SESSION_CACHE_TTL=1800         seconds an idle session stays cached
+    SESSION_FLUSH_INTERVAL=2       seconds between background flushes
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_store import read_json, update_json
+
+logger = logging.getLogger(__name__)
+
+SESSION_DIR = Path("sessions")
+SESSION_MAX_TURNS = 12
+
+# (base history that replaces the stored one, or None to append; turns to add)
+Pending = Tuple[Optional[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+
+class SessionCache:
+    """Bounded LRU of session histories in front of the sessions directory."""
+
+    def __init__(self, directory: Path, max_sessions: int = 1024, ttl: float = 1800.0,
+                 flush_interval: float = 2.0, max_turns: int = SESSION_MAX_TURNS):
+        self.directory = Path(directory)
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.max_turns = max_turns
+
+        # session_id -> (history, last access time), least recently used first
+        self._entries: "OrderedDict[str, Tuple[List[Dict[str, Any]], float]]" = OrderedDict()
+        self._dirty: Dict[str, Pending] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "flushes": 0, "writes": 0, "write_errors": 0}
+
+    @classmethod
+    def from_env(cls, directory: Path = SESSION_DIR) -> "SessionCache":
+        return cls(
+            directory,
+            max_sessions=int(os.getenv("SESSION_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("SESSION_CACHE_TTL", "1800")),
+            flush_interval=float(os.getenv("SESSION_FLUSH_INTERVAL", "2")),
+        )
+
+    # Lifecycle
+
+    def start(self) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run(), name="session-cache-flush")
+
+    async def stop(self) -> None:
+        """Stop the background task and force a final flush."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await asyncio.to_thread(self.flush)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self._expire(time.monotonic())
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                logger.exception("Session flush failed")
+
+    # Reads and writes
+
+    def get(self, session_id: str) -> List[Dict[str, Any]]:
+        """Return a copy of the session history, loading it from disk on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._entries[session_id] = (entry[0], now)
+                self._entries.move_to_end(session_id)
+                self.stats["hits"] += 1
+                return list(entry[0])
+
+        self.stats["misses"] += 1
+        history = read_json(self._path(session_id), default=[])
+        history = history if isinstance(history, list) else []
+        with self._lock:
+            # Turns not yet flushed are newer than what is on disk
+            pending = self._dirty.get(session_id)
+            if pending is not None:
+                history = self._apply(history, pending)
+            self._store(session_id, history, now)
+        return list(history)
+
+    def append(self, session_id: str, turns: List[Dict[str, Any]],
+               base: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Add turns to a session and queue them for writing.
+
+        Args:
+            session_id: Session to update
+            turns: New turns to append
+            base: Explicit history from the frontend; replaces the stored history
+        """
+        now = time.monotonic()
+        pending: Pending = (list(base) if base is not None else None, list(turns))
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None or base is not None:
+                current = entry[0] if entry is not None else []
+                self._store(session_id, self._apply(current, pending), now)
+            previous = self._dirty.get(session_id)
+            self._dirty[session_id] = self._combine(previous, pending) if previous else pending
+
+        if self._flusher is None:
+            # No background task (e.g. scripts/tests without the app lifespan): write through
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all pending turns to disk; returns the number of sessions written."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        written = 0
+        for session_id, pending in dirty.items():
+            try:
+                update_json(self._path(session_id), lambda current, p=pending: self._apply(
+                    current if isinstance(current, list) else [], p), default=[])
+                written += 1
+            except Exception:
+                logger.exception("Could not write session %s", session_id)
+                self.stats["write_errors"] += 1
+                with self._lock:
+                    newer = self._dirty.get(session_id)
+                    self._dirty[session_id] = self._combine(pending, newer) if newer else pending
+        self.stats["flushes"] += 1
+        self.stats["writes"] += written
+        return written
+
+    # Internals
+
+    def _path(self, session_id: str) -> Path:
+        return self.directory / f"{session_id}.json"
+
+    def _apply(self, history: List[Dict[str, Any]], pending: Pending) -> List[Dict[str, Any]]:
+        base, turns = pending
+        start = list(base) if base is not None else list(history)
+        return (start + turns)[-self.max_turns:]
+
+    @staticmethod
+    def _combine(first: Pending, second: Pending) -> Pending:
+        """Pending write equivalent to applying `first` then `second`."""
+        if second[0] is not None:
+            return second
+        return first[0], first[1] + second[1]
+
+    def _store(self, session_id: str, history: List[Dict[str, Any]], now: float) -> None:
+        # Caller holds self._lock
+        self._entries[session_id] = (history, now)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _expire(self, now: float) -> None:
+        with self._lock:
+            while self._entries:
+                session_id, (_, last_access) = next(iter(self._entries.items()))
+                if now - last_access <= self.ttl:
+                    break
+                del self._entries[session_id]
+                self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cache size and hit/flush counters for /metrics."""
+        return {"sessions": len(self._entries), "dirty": len(self._dirty), **self.stats}
+
+
+# Process-wide session cache
+session_cache = SessionCache.from_env()
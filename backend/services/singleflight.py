@@ -0,0 +1,100 @@
+"""Single-flight coalescing of identical in-flight upstream calls.
+
+When several tabs or teammates trigger the same generation at once, each
+request used to make its own Gemini / nanobanana / agent call. Requests are
+now keyed by a canonical hash of the arguments that reach the upstream call;
+while a call for a key is in flight, identical requests wait for it instead
+of starting their own, and all receive its result (or its exception).
+
+The upstream call runs as its own task and waiters await it through
+`asyncio.shield`, so one waiter being cancelled does not fail the others.
+Followers get a deep copy of the result so no caller can mutate another's
+response. Nothing is cached once the call completes; see content_cache for that.
+
+Waiters are counted per key. When the last one is cancelled (its client
+disconnected), the upstream call is cancelled too instead of running on for
+nobody.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+def flight_key(namespace: str, payload: Any) -> str:
+    """Canonical hash of a request payload within a namespace."""
+    canonical = json.dumps([namespace, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Shares one in-flight upstream call among identical concurrent requests."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, namespace: str, payload: Any, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn()` unless an identical call is already in flight, then share its result.
+
+        Args:
+            namespace: Upstream name, also the metrics bucket ("generate-content", "image", ...)
+            payload: JSON-serializable arguments that determine the upstream result
+            fn: Zero-argument coroutine function making the upstream call
+
+        Returns:
+            The upstream result
+        """
+        key = flight_key(namespace, payload)
+        stats = self.stats.setdefault(namespace, {"requests": 0, "upstream_calls": 0, "saved_calls": 0,
+                                                  "cancelled_calls": 0})
+        stats["requests"] += 1
+
+        task = self._inflight.get(key)
+        follower = task is not None
+        if follower:
+            stats["saved_calls"] += 1
+        else:
+            stats["upstream_calls"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1 and not task.done():
+                # Nobody else wants the result; new requests start a fresh call
+                stats["cancelled_calls"] += 1
+                task.cancel()
+                del self._inflight[key]
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+        return copy.deepcopy(result) if follower else result
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited failure is not logged as lost
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-upstream request and saved-call counters for /metrics."""
+        return {
+            "in_flight": len(self._inflight),
+            "saved_calls": sum(s["saved_calls"] for s in self.stats.values()),
+            "by_upstream": {name: dict(s) for name, s in self.stats.items()},
+        }
+
+
+# Process-wide coalescer
+singleflight = SingleFlight()
@@ -0,0 +1,124 @@
+"""Memoized results for the early stages of the full agent cycle.
+
+Within a day, trend_watcher's output for a brand topic and
+content_strategist's output for a (trends, brand) pair barely change, yet
+every /agents/run-full-cycle call paid for both through the LLM. Their
+results are now kept for a per-stage freshness window, so a re-run only
+pays for content_creator onward. Stages without a window (the creator,
+image, publisher and evaluator stages) always run.
+
+Entries are keyed by stage name and a hash of the stage's prompt. A stage
+prompt already contains the upstream outputs it was built from, so when
+trends change the strategist re-runs too. Entries can be dropped explicitly
+by stage and/or topic (DELETE /api/agents/stage-cache), and a cycle
+requested with `bypass_cache` skips memoized results and stores fresh ones.
+The memo is in memory per worker process.
+
+Environment variables:
+    STAGE_MEMO_TTL=trend_watcher=43200,content_strategist=86400
+                                 freshness window in seconds per stage
+    STAGE_MEMO_SIZE=1024         max memoized stage results per process
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .content_cache import normalize_text
+
+DEFAULT_STAGE_TTLS = "trend_watcher=43200,content_strategist=86400"
+
+
+def parse_ttls(value: str) -> Dict[str, float]:
+    """Parse "stage=seconds,stage=seconds" into a dict."""
+    ttls = {}
+    for item in value.split(","):
+        if "=" in item:
+            stage, seconds = item.split("=", 1)
+            ttls[stage.strip()] = float(seconds)
+    return ttls
+
+
+class StageMemo:
+    """Bounded store of stage outputs, each fresh for its stage's window."""
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 1024):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        # (stage, prompt digest) -> (stored at, normalized topic, output text)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidated": 0}
+
+    @classmethod
+    def from_env(cls) -> "StageMemo":
+        return cls(
+            parse_ttls(os.getenv("STAGE_MEMO_TTL", DEFAULT_STAGE_TTLS)),
+            max_entries=int(os.getenv("STAGE_MEMO_SIZE", "1024")),
+        )
+
+    def memoizes(self, stage: str) -> bool:
+        return self.ttls.get(stage, 0) > 0
+
+    @staticmethod
+    def _key(stage: str, prompt: str) -> Tuple[str, str]:
+        return stage, hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def get(self, stage: str, prompt: str) -> Optional[str]:
+        """Memoized output of `stage` for `prompt`, or None if absent or stale."""
+        if not self.memoizes(stage):
+            return None
+        key = self._key(stage, prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttls[stage]:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, stage: str, prompt: str, output: str, topic: str = "") -> None:
+        if not self.memoizes(stage):
+            return
+        with self._lock:
+            key = self._key(stage, prompt)
+            self._entries[key] = (time.time(), normalize_text(topic), output)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats["stores"] += 1
+
+    def invalidate(self, stage: Optional[str] = None, topic: Optional[str] = None) -> int:
+        """
+        Drop memoized results.
+
+        Args:
+            stage: Only drop this stage's results (all stages if omitted)
+            topic: Only drop results for this brand topic (all topics if omitted)
+
+        Returns:
+            Number of entries dropped
+        """
+        wanted = normalize_text(topic) if topic else None
+        with self._lock:
+            doomed = [
+                key for key, (_, entry_topic, _) in self._entries.items()
+                if (stage is None or key[0] == stage) and (wanted is None or entry_topic == wanted)
+            ]
+            for key in doomed:
+                del self._entries[key]
+            self.stats["invalidated"] += len(doomed)
+        return len(doomed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Freshness windows and hit/miss counters for /metrics."""
+        return {"entries": len(self._entries), "ttls": dict(self.ttls), **self.stats}
+
+
+# Process-wide stage memo
+stage_memo = StageMemo.from_env()
@@ -0,0 +1,219 @@
+"""Near-duplicate topic lookup with MinHash signatures and LSH buckets.
+
+Exact-key caching misses "AI in healthcare" vs "AI for healthcare". Every
+generated topic is indexed by a MinHash signature over character 3-grams of
+its normalized words (stopwords dropped, plural "s" stripped). Signatures
+use one-permutation hashing: each 3-gram is hashed once and kept as the
+minimum of the slot its hash falls in, and empty slots are filled from the
+next non-empty slot (rotation densification). That costs one hash per 3-gram
+instead of one per 3-gram per slot.
+
+The signature is split into bands; topics sharing any band land in the same
+bucket, so a lookup only looks at a bounded set of candidates instead of every
+cached topic. Candidates are ranked by the number of bands they share, and
+only the best few are compared slot by slot to estimate Jaccard similarity.
+Each bucket keeps its newest BUCKET_CAP topics, which bounds lookup cost when
+many cached topics are near-identical. No external embedding service is
+involved; see `python -m benchmarks.bench_topic_index` for latency at 100k
+topics.
+
+The index is in memory per process and rebuilt from the content cache at
+startup (so Python's per-process string hashing is fine); matches point at
+content-cache keys, so expired drafts drop out. Past TOPIC_INDEX_MAX topics
+the oldest are evicted, so a long-running server keeps indexing new topics.
+
+Environment variables:
+    TOPIC_SIMILARITY_THRESHOLD=0.6  min estimated similarity to offer a draft
+    TOPIC_SIMILAR_LIMIT=3           max drafts offered per request
+    TOPIC_INDEX_MAX=200000          max topics indexed per process (oldest evicted)
+"""
+import logging
+import operator
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+BUCKET_CAP = 16
+# Candidates (by shared bands) whose full signatures are compared per lookup
+VERIFY_CANDIDATES = 12
+_EMPTY = 1 << 32
+_MASK = 0xFFFFFFFF
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at by for from how in into is of on or the to vs what why with your".split()
+)
+
+
+def shingles(topic: str) -> List[str]:
+    """Character 3-grams of the topic's significant words."""
+    words = []
+    for word in _WORD.findall((topic or "").lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    text = f" {' '.join(words)} "
+    if len(text) <= 3:
+        return [text] if words else []
+    return sorted({text[i:i + 3] for i in range(len(text) - 2)})
+
+
+class TopicIndex:
+    """MinHash/LSH index from topics to content-cache keys."""
+
+    def __init__(self, bands: int = 16, rows: int = 4, threshold: float = 0.6,
+                 limit: int = 3, max_entries: int = 200000):
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        self.limit = limit
+        self.max_entries = max_entries
+
+        self._slots = bands * rows
+        # entry id -> (kind, cache key, topic, signature), oldest first
+        self._entries: Dict[int, Tuple[str, str, str, array]] = {}
+        self._ids: Dict[str, int] = {}
+        self._next_id = 0
+        # One dict per band: bucket hash -> entry id, or list of ids on collision
+        self._buckets: List[Dict[int, Union[int, List[int]]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "matches": 0, "evicted": 0}
+
+    @classmethod
+    def from_env(cls) -> "TopicIndex":
+        return cls(
+            threshold=float(os.getenv("TOPIC_SIMILARITY_THRESHOLD", "0.6")),
+            limit=int(os.getenv("TOPIC_SIMILAR_LIMIT", "3")),
+            max_entries=int(os.getenv("TOPIC_INDEX_MAX", "200000")),
+        )
+
+    def signature(self, topic: str) -> Optional[array]:
+        """One-permutation MinHash signature of the topic's 3-grams."""
+        grams = shingles(topic)
+        if not grams:
+            return None
+        slots = self._slots
+        values = [_EMPTY] * slots
+        for gram in grams:
+            h = hash(gram) & 0xFFFFFFFFFFFFFFFF
+            slot = h % slots
+            value = (h // slots) & _MASK
+            if value < values[slot]:
+                values[slot] = value
+        # Rotation densification: an empty slot borrows the next filled one
+        filled = list(values)
+        for slot in range(slots):
+            if filled[slot] == _EMPTY:
+                distance = 1
+                while filled[(slot + distance) % slots] == _EMPTY:
+                    distance += 1
+                values[slot] = (filled[(slot + distance) % slots] + distance * 0x9E3779B1) & _MASK
+        return array("I", values)
+
+    def _band_keys(self, kind: str, signature: array) -> Iterable[int]:
+        raw = signature.tobytes()
+        step = self.rows * signature.itemsize
+        for band in range(self.bands):
+            yield hash((kind, raw[band * step:(band + 1) * step]))
+
+    def add(self, kind: str, key: str, topic: str) -> None:
+        """Index `topic` as pointing at content-cache entry `key`, evicting the oldest topic if full."""
+        signature = self.signature(topic)
+        if signature is None:
+            return
+        with self._lock:
+            if key in self._ids:
+                self._remove(self._ids[key])  # re-cached: index it as the newest
+            while self._entries and len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evicted"] += 1
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (kind, key, topic, signature)
+            self._ids[key] = entry_id
+            for buckets, band_key in zip(self._buckets, self._band_keys(kind, signature)):
+                current = buckets.get(band_key)
+                if current is None:
+                    buckets[band_key] = entry_id
+                elif isinstance(current, list):
+                    current.append(entry_id)
+                    if len(current) > BUCKET_CAP:
+                        del current[0]
+                else:
+                    buckets[band_key] = [current, entry_id]
+
+    def _remove(self, entry_id: int) -> None:
+        kind, key, _, signature = self._entries.pop(entry_id)
+        del self._ids[key]
+        for buckets, band_key in zip(self._buckets, self._band_keys(kind, signature)):
+            current = buckets.get(band_key)
+            if current == entry_id:
+                del buckets[band_key]
+            elif isinstance(current, list) and entry_id in current:
+                current.remove(entry_id)
+                if len(current) == 1:
+                    buckets[band_key] = current[0]
+
+    def load(self, topics: Iterable[Tuple[str, str, str]]) -> int:
+        """Index (kind, cache key, topic) tuples, e.g. from ContentCache.iter_topics()."""
+        count = 0
+        for kind, key, topic in topics:
+            self.add(kind, key, topic)
+            count += 1
+        logger.info("Topic index loaded %d cached topics", count)
+        return count
+
+    def query(self, kind: str, topic: str, exclude_key: Optional[str] = None) -> List[Tuple[float, str, str]]:
+        """
+        Find indexed topics similar to `topic`.
+
+        Args:
+            kind: Index namespace ("content", "agent-cycle")
+            topic: Topic to look up
+            exclude_key: Cache key to leave out (e.g. the exact-match key)
+
+        Returns:
+            Up to `limit` (similarity, cache key, topic) tuples at or above the
+            threshold, most similar first
+        """
+        self.stats["lookups"] += 1
+        signature = self.signature(topic)
+        if signature is None:
+            return []
+        shared = Counter()
+        for buckets, band_key in zip(self._buckets, self._band_keys(kind, signature)):
+            found = buckets.get(band_key)
+            if found is None:
+                continue
+            if isinstance(found, list):
+                shared.update(found)
+            else:
+                shared[found] += 1
+
+        size = len(signature)
+        matches = []
+        for entry_id, _ in shared.most_common(VERIFY_CANDIDATES):
+            entry_kind, key, entry_topic, entry_signature = self._entries[entry_id]
+            if entry_kind != kind or key == exclude_key:
+                continue
+            similarity = sum(map(operator.eq, signature, entry_signature)) / size
+            if similarity >= self.threshold:
+                matches.append((round(similarity, 3), key, entry_topic))
+        matches.sort(reverse=True)
+        if matches:
+            self.stats["matches"] += 1
+        return matches[:self.limit]
+
+    def snapshot(self):
+        """Index size and lookup counters for /metrics."""
+        return {"topics": len(self._entries), "threshold": self.threshold, **self.stats}
+
+
+# Process-wide topic index
+topic_index = TopicIndex.from_env()
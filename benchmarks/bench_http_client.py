@@ -0,0 +1,118 @@
+"""Concurrent throughput benchmark for the provider HTTP client layer.
+
+Starts a local HTTP server that answers every request after a fixed delay
+(standing in for a slow nanobanana / Meta call), then fires N concurrent
+image generations from one event loop two ways:
+
+- blocking: the sync `generate_image` called inside coroutines, which is what
+  the `async def` endpoints used to do. Each call stalls the loop, so requests
+  run one after another.
+- async: `agenerate_image` on the pooled keep-alive async client.
+
+Usage:
+    python -m benchmarks.bench_http_client --requests 50 --delay 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from backend.services.image_generator import agenerate_image, generate_image  # noqa: E402
+from helpers.http_client import aclose_async_client  # noqa: E402
+
+_BODY = b'{"image_url": "https://example.com/image.png"}'
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, delay: float) -> None:
+    """Minimal keep-alive HTTP/1.1 responder."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(delay)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(_BODY)).encode() + b"\r\n\r\n" + _BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _start_server(delay: float) -> int:
+    """Run the slow server on its own thread and loop; return its port."""
+    ready = threading.Event()
+    port_box = {}
+
+    def _run() -> None:
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(
+            asyncio.start_server(lambda r, w: _handle(r, w, delay), "127.0.0.1", 0)
+        )
+        port_box["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=_run, daemon=True).start()
+    ready.wait()
+    return port_box["port"]
+
+
+async def _blocking(n: int) -> float:
+    async def one() -> dict:
+        return generate_image("benchmark prompt")
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(n)))
+    elapsed = time.perf_counter() - start
+    assert all(r.get("success") for r in results), results[0]
+    return elapsed
+
+
+async def _async(n: int) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(agenerate_image("benchmark prompt") for _ in range(n)))
+    elapsed = time.perf_counter() - start
+    assert all(r.get("success") for r in results), results[0]
+    await aclose_async_client()
+    return elapsed
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark blocking vs async provider calls.")
+    parser.add_argument("--requests", type=int, default=50, help="Concurrent requests per run.")
+    parser.add_argument("--delay", type=float, default=0.2, help="Simulated provider latency in seconds.")
+    args = parser.parse_args(argv)
+
+    port = _start_server(args.delay)
+    os.environ["NANOBANANA_API_KEY"] = "benchmark"
+    os.environ["NANOBANANA_API_URL"] = f"http://127.0.0.1:{port}/v1/generate"
+
+    blocking = asyncio.run(_blocking(args.requests))
+    non_blocking = asyncio.run(_async(args.requests))
+
+    print(f"{args.requests} concurrent requests, {args.delay * 1000:.0f} ms provider latency")
+    print(f"  blocking requests in event loop: {blocking:7.2f} s  {args.requests / blocking:8.1f} req/s")
+    print(f"  pooled async client:             {non_blocking:7.2f} s  {args.requests / non_blocking:8.1f} req/s")
+    print(f"  speedup: {blocking / non_blocking:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
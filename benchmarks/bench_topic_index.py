@@ -0,0 +1,81 @@
+"""Lookup latency benchmark for the MinHash/LSH topic index.
+
+Builds an index of N synthetic topics (random combinations of subject,
+domain and angle words), then times lookups for near-duplicate rephrasings
+and for unrelated topics.
+
+Usage:
+    python -m benchmarks.bench_topic_index --topics 100000 --queries 2000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from backend.services.topic_index import TopicIndex  # noqa: E402
+
+SUBJECTS = ["AI", "machine learning", "blockchain", "remote work", "sustainability", "cybersecurity",
+            "cloud computing", "social media", "e-commerce", "data privacy", "automation", "5G",
+            "electric vehicles", "mental health", "personal finance", "content marketing", "SEO",
+            "quantum computing", "robotics", "nutrition", "solar energy", "edtech", "telemedicine"]
+DOMAINS = ["healthcare", "retail", "banking", "education", "manufacturing", "logistics", "agriculture",
+           "real estate", "travel", "hospitality", "gaming", "media", "insurance", "government",
+           "startups", "nonprofits", "fashion", "sports", "construction", "energy", "law", "music"]
+ANGLES = ["trends", "tips", "mistakes", "myths", "case studies", "predictions", "guide", "checklist",
+          "tools", "strategies", "challenges", "benefits", "risks", "best practices", "statistics"]
+YEARS = ["", "2024", "2025", "2026", "for beginners", "for small business", "at scale"]
+
+
+def _topic(rng: random.Random) -> str:
+    return " ".join(part for part in (rng.choice(SUBJECTS), "in", rng.choice(DOMAINS),
+                                      rng.choice(ANGLES), rng.choice(YEARS), str(rng.randrange(1000))) if part)
+
+
+def _time(index: TopicIndex, topics) -> list:
+    latencies = []
+    for topic in topics:
+        start = time.perf_counter()
+        index.query("content", topic)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def _report(label: str, latencies: list) -> None:
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{label:<12} p50 {p50:.3f} ms   p99 {p99:.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = TopicIndex(max_entries=args.topics)
+    indexed = []
+    start = time.perf_counter()
+    for i in range(args.topics):
+        topic = _topic(rng)
+        indexed.append(topic)
+        index.add("content", f"key-{i}", topic)
+    print(f"indexed {args.topics} topics in {time.perf_counter() - start:.1f}s")
+
+    near = [rng.choice(indexed).replace(" in ", " for ", 1) for _ in range(args.queries)]
+    unrelated = [f"{rng.choice(ANGLES)} about topic {rng.randrange(10**6)}" for _ in range(args.queries)]
+    _report("near-dup", _time(index, near))
+    _report("unrelated", _time(index, unrelated))
+    found = sum(1 for topic in near if index.query("content", topic))
+    print(f"near-duplicates matched: {found}/{len(near)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,13 @@ from .sub_agents import (
     build_evaluator_agent,
 )
 
-# Build sub-agents
-trend_watcher = build_trend_watcher_agent()
-content_strategist = build_content_strategist_agent()
-content_creator = build_content_creator_agent()
-publisher_agent = build_publisher_agent()
-evaluator_agent = build_evaluator_agent()
+# Build sub-agents. Each stores its result in session state (output_key) and
+# reads its upstream result from there, so none re-reads the conversation.
+trend_watcher = build_trend_watcher_agent(include_contents="none")
+content_strategist = build_content_strategist_agent(include_contents="none")
+content_creator = build_content_creator_agent(include_contents="none")
+publisher_agent = build_publisher_agent(include_contents="none")
+evaluator_agent = build_evaluator_agent(include_contents="none")
 
 # Main orchestrator: now LlmAgent (not plain Agent)
 interactive_ghostwriter_agent = LlmAgent(
@@ -1,10 +1,68 @@
 # ghostwriter_agent/config.py
 import os
+from typing import AsyncGenerator
+
 from dotenv import load_dotenv
 from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from helpers.model_limiter import model_limiter
+from helpers.model_router import ModelRouter, Route, parse_routes
 
 load_dotenv()  # loads GOOGLE_API_KEY from .env if present
 
-model = Gemini(model="gemini-2.5-flash-lite")
-imageModel = Gemini(model="gemini-2.5-flash-image")
+# Model per task type: primary first, then cheaper tiers used for failover and
+# while the primary misses the latency budget (seconds, p95). Override the
+# models with MODEL_ROUTES="chat=gemini-2.0-flash>gemini-2.0-flash-lite,...";
+# chat included, so there is no separate CHAT_MODEL setting.
+MODEL_ROUTES = parse_routes(os.getenv("MODEL_ROUTES"), {
+    "chat": Route(("gemini-2.0-flash", "gemini-2.0-flash-lite"), latency_budget=4.0),
+    "caption": Route(("gemini-2.0-flash", "gemini-2.0-flash-lite"), latency_budget=4.0),
+    "long_form": Route(("gemini-2.0-flash", "gemini-2.0-flash-lite"), latency_budget=15.0),
+    "agent": Route(("gemini-2.5-flash-lite", "gemini-2.0-flash-lite"), latency_budget=10.0),
+    "evaluator": Route(("gemini-2.5-flash-lite", "gemini-2.0-flash-lite"), latency_budget=8.0),
+    "image": Route(("gemini-2.5-flash-image",), latency_budget=30.0),
+})
+
+model_router = ModelRouter.from_env(MODEL_ROUTES)
+
+
+class LimitedGemini(Gemini):
+    """Gemini whose calls take a slot from the shared model limiter.
+
+    The fairness key is the `current_key` context variable, set by whoever
+    starts the agent run (see backend/services/agent_registry.py). The model
+    is chosen per call by `model_router` for `task`; a call that fails before
+    producing a response is retried on the route's next model.
+    """
+
+    task: str = "agent"
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async with model_limiter.slot("agent"):
+            candidates = model_router.candidates(self.task)
+            for attempt, name in enumerate(candidates):
+                llm_request.model = name
+                produced = False
+                try:
+                    with model_router.track(self.task, name):
+                        async for response in super().generate_content_async(llm_request, stream):
+                            produced = True
+                            yield response
+                    return
+                except Exception:
+                    if produced or attempt == len(candidates) - 1:
+                        raise
+                    model_router.failed_over(self.task)
+
+
+def _routed(task: str) -> LimitedGemini:
+    return LimitedGemini(model=MODEL_ROUTES[task].primary, task=task)
+
 
+model = _routed("agent")
+evaluatorModel = _routed("evaluator")
+imageModel = _routed("image")
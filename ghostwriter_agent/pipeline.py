@@ -0,0 +1,322 @@
+"""Code-driven stage pipeline for one full GhostWriter cycle.
+
+`interactive_ghostwriter_agent` lets an orchestrator LLM decide which
+sub-agent to delegate to next, which costs an extra model round trip per
+hand-off. The cycle's shape never changes, so here it is a fixed DAG:
+
+    trend_watcher -> content_strategist -> (content_creator || image_generator)
+                  -> publisher -> evaluator
+
+Each stage starts as soon as the stages it depends on have finished, so
+content_creator and image_generator run concurrently. A failed stage is
+recorded and the stages that depend on it are skipped; the rest still run.
+Every stage reports when it started (relative to the cycle) and how long it
+took.
+
+Stages hand off structured state instead of free text. Each stage's reply
+is parsed into a typed value under its `output_key` (`trends`, `brief`,
+`assets`, ...), cut down to the fields downstream agents use, and passed
+to the stages that read it as ADK session state. The agents' instructions
+pull it in through `{key?}` placeholders, so every agent sees a short
+message plus only the fields it needs, not the upstream transcripts. The
+result reports prompt tokens for this hand-off next to what re-sending
+every upstream reply would have cost (`tokens`).
+
+The pipeline does not know how agents are run: `Pipeline.run` is given a
+`run_agent(agent, prompt, state)` coroutine function (the backend passes
+`agent_registry.run`), which keeps it testable without a model. It may
+also be given a `memo` with `get(stage, prompt)` / `set(stage, prompt,
+output, topic)` (the backend passes `stage_memo`); a stage whose output is
+memoized for the same message and state is served from it and reported as
+"cached".
+
+A cycle can be given a `deadline` (seconds). It is split into per-stage
+budgets by stage `weight`: each stage must finish by the time that leaves
+the weighted longest path of stages after it their share of the deadline.
+A stage that finishes early leaves the time to later stages, and one that
+overruns is cut off so the rest still get theirs. A stage cut off is
+reported as "timeout". Its output is replaced by a memoized one if there is
+one, or by the stage's `default`, so downstream stages can still run. The
+result lists the stages that `completed` and whether it is `partial`.
+"""
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .prompts import (
+    CREATOR_STAGE_PROMPT,
+    EVALUATE_STAGE_PROMPT,
+    IMAGE_STAGE_PROMPT,
+    PUBLISH_STAGE_PROMPT,
+    STRATEGY_STAGE_PROMPT,
+    TREND_STAGE_PROMPT,
+)
+
+RunAgent = Callable[[str, str, Dict[str, str]], Awaitable[str]]
+
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step: which agent to run, on what, and what it hands off.
+
+    `reads` are the state keys the agent's instruction uses; the stages that
+    produce them are its dependencies. `compact` picks the fields of the
+    parsed reply that downstream stages need. `weight` is the stage's share
+    of a cycle deadline relative to the others, and `default(inputs)` gives a
+    stand-in reply for when it runs out of time.
+    """
+
+    name: str
+    agent: str
+    template: str
+    output_key: str
+    reads: Tuple[str, ...] = ()
+    compact: Optional[Callable[[Dict[str, Any]], Any]] = None
+    weight: float = 1.0
+    default: Optional[Callable[[Dict[str, Any]], str]] = None
+
+    def prompt(self, inputs: Dict[str, Any]) -> str:
+        """Fill the message template from the cycle inputs."""
+        return self.template.format(**inputs)
+
+    def typed(self, output: str) -> Any:
+        """The handed-off value of a reply: its compacted JSON, or the text if that is empty."""
+        data = extract_json(output)
+        value = self.compact(data) if data is not None and self.compact else data
+        return value if value else output.strip()
+
+
+class Pipeline:
+    """Runs a DAG of agent stages, each as soon as its dependencies finish."""
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages = list(stages)
+        producers: Dict[str, str] = {}
+        self.after: Dict[str, Tuple[str, ...]] = {}
+        for stage in self.stages:
+            if stage.name in self.after:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            missing = [key for key in stage.reads if key not in producers]
+            if missing:
+                # Inputs must come from earlier stages, which also rules out cycles
+                raise ValueError(f"Stage {stage.name} reads state no earlier stage produces: {missing}")
+            self.after[stage.name] = tuple(dict.fromkeys(producers[key] for key in stage.reads))
+            producers[stage.output_key] = stage.name
+
+    def finish_by(self, deadline: float) -> Dict[str, float]:
+        """Seconds into the cycle by which each stage must finish to meet `deadline`."""
+        weights = {stage.name: stage.weight for stage in self.stages}
+        # Weighted longest path of stages that still have to run after each one
+        tail = {name: 0.0 for name in weights}
+        for stage in reversed(self.stages):
+            for dep in self.after[stage.name]:
+                tail[dep] = max(tail[dep], weights[stage.name] + tail[stage.name])
+        total = max(weights[name] + tail[name] for name in weights)
+        return {name: deadline * (total - tail[name]) / total for name in weights}
+
+    def ancestors(self, name: str) -> List[str]:
+        """Every stage `name` transitively depends on."""
+        found: List[str] = []
+        pending = list(self.after[name])
+        while pending:
+            dep = pending.pop()
+            if dep not in found:
+                found.append(dep)
+                pending.extend(self.after[dep])
+        return found
+
+    async def run(self, inputs: Dict[str, Any], run_agent: RunAgent, memo: Optional[Any] = None,
+                  refresh: bool = False,
+                  count_tokens: Callable[[str], int] = estimate_tokens,
+                  deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run every stage once.
+
+        Args:
+            inputs: Values available to all stage templates (e.g. `topic`)
+            run_agent: Coroutine function `(agent name, message, state) -> final text`
+            memo: Optional store of earlier stage outputs
+            refresh: Skip memoized outputs (fresh ones are still stored)
+            count_tokens: Token counter for the hand-off comparison
+            deadline: Optional time budget for the whole cycle, in seconds
+
+        Returns:
+            Dict with `outputs` (stage name -> reply text of finished stages),
+            `state` (output key -> typed, compacted value),
+            `timings` (stage name -> status, start_ms, duration_ms, and
+            budget_ms / fallback under a deadline), `errors` (stage name ->
+            message), `tokens` (prompt tokens sent with structured hand-off
+            vs. re-sending upstream replies), `completed` (stages that ran or
+            were served from the memo), `partial` and the cycle's `total_ms`
+        """
+        started = time.perf_counter()
+        outputs: Dict[str, str] = {}
+        state: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        tokens: Dict[str, Dict[str, int]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        finish_by = self.finish_by(deadline) if deadline is not None else {}
+
+        async def run_stage(stage: Stage) -> bool:
+            upstream = [await tasks[dep] for dep in self.after[stage.name]]
+            if not all(upstream):
+                timings[stage.name] = {"status": "skipped"}
+                return False
+            stage_start = time.perf_counter()
+            prompt = stage.prompt(inputs)
+            stage_state = {key: _state_text(state[key]) for key in stage.reads}
+            memo_key = "\n".join([prompt, *(stage_state[key] for key in stage.reads)])
+            tokens[stage.name] = {
+                "handoff": count_tokens(memo_key),
+                "full_text": count_tokens("\n".join(
+                    [prompt, *(outputs[dep] for dep in self.ancestors(stage.name))]
+                )),
+            }
+
+            timing: Dict[str, Any] = {}
+            cached = memo.get(stage.name, memo_key) if memo is not None and not refresh else None
+            if cached is not None:
+                outputs[stage.name] = cached
+                status = "cached"
+            else:
+                budget = None
+                if stage.name in finish_by:
+                    budget = max(0.0, started + finish_by[stage.name] - stage_start)
+                    timing["budget_ms"] = round(budget * 1000, 1)
+                try:
+                    outputs[stage.name] = await asyncio.wait_for(run_agent(stage.agent, prompt, stage_state), budget)
+                    status = "ok"
+                except asyncio.TimeoutError:
+                    errors[stage.name] = f"Ran out of its {budget:.1f}s share of the cycle deadline"
+                    status = "timeout"
+                    fallback = memo.get(stage.name, memo_key) if memo is not None and refresh else None
+                    if fallback is not None:
+                        timing["fallback"] = "cached"
+                    elif stage.default is not None:
+                        fallback = stage.default(inputs)
+                        timing["fallback"] = "default"
+                    if fallback is not None:
+                        outputs[stage.name] = fallback
+                except Exception as e:
+                    errors[stage.name] = str(e)
+                    status = "failed"
+                if memo is not None and status == "ok":
+                    memo.set(stage.name, memo_key, outputs[stage.name], inputs.get("topic", ""))
+            usable = stage.name in outputs
+            if usable:
+                state[stage.output_key] = stage.typed(outputs[stage.name])
+            timings[stage.name] = {
+                "status": status,
+                "start_ms": round((stage_start - started) * 1000, 1),
+                "duration_ms": round((time.perf_counter() - stage_start) * 1000, 1),
+                **timing,
+            }
+            return usable
+
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        completed = [stage.name for stage in self.stages if timings[stage.name]["status"] in ("ok", "cached")]
+        return {
+            "outputs": outputs,
+            "state": state,
+            "timings": {stage.name: timings[stage.name] for stage in self.stages},
+            "errors": errors,
+            "completed": completed,
+            "partial": len(completed) < len(self.stages),
+            "tokens": {
+                "handoff": sum(counts["handoff"] for counts in tokens.values()),
+                "full_text": sum(counts["full_text"] for counts in tokens.values()),
+                "by_stage": tokens,
+            },
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+
+def _state_text(value: Any) -> str:
+    """How a handed-off value appears in an agent's instruction."""
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def extract_json(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parse the JSON object in an agent reply (bare, or in a ```json fence)."""
+    if not text:
+        return None
+    fenced = _JSON_FENCE.search(text)
+    candidate = fenced.group(1) if fenced else text
+    start, end = candidate.find("{"), candidate.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        value = json.loads(candidate[start:end + 1])
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _fields(*names: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Compactor keeping only the named top-level fields."""
+    return lambda data: {name: data[name] for name in names if name in data}
+
+
+def _compact_assets(data: Dict[str, Any]) -> Dict[str, Any]:
+    # The publisher posts captions; video scripts stay out of its prompt
+    assets = data.get("assets") if isinstance(data.get("assets"), dict) else {}
+    return {
+        channel: _fields("caption", "hashtags", "image_prompt")(asset) if isinstance(asset, dict) else asset
+        for channel, asset in assets.items()
+    }
+
+
+def _compact_publish_result(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [_fields("channel", "status")(item) for item in data.get("items", []) if isinstance(item, dict)]
+
+
+def _default_trends(inputs: Dict[str, Any]) -> str:
+    # Out of time for trend research: plan around the brand topic itself
+    return json.dumps({"selected_trends": [inputs["topic"]], "rationale": "Trend lookup ran out of time."})
+
+
+def _default_brief(inputs: Dict[str, Any]) -> str:
+    return json.dumps({"chosen_trend": inputs["topic"],
+                       "brief": f"A short, practical post about {inputs['topic']} for the brand's audience."})
+
+
+def _default_image(inputs: Dict[str, Any]) -> str:
+    return json.dumps({"refined_prompt": f"Clean editorial illustration about {inputs['topic']}", "style": "minimal"})
+
+
+# The full GhostWriter cycle; agent names are backend agent_registry names and
+# output keys match the agents' output_key / instruction placeholders. Content
+# creation writes every channel's assets and gets a double share of a deadline;
+# creation, publishing and evaluation have no stand-in output.
+FULL_CYCLE = Pipeline([
+    Stage("trend_watcher", "trend-watcher", TREND_STAGE_PROMPT, "trends",
+          compact=_fields("selected_trends"), default=_default_trends),
+    Stage("content_strategist", "content-strategist", STRATEGY_STAGE_PROMPT, "brief",
+          reads=("trends",), compact=_fields("chosen_trend", "brief"), default=_default_brief),
+    Stage("content_creator", "content-creator", CREATOR_STAGE_PROMPT, "assets",
+          reads=("brief",), compact=_compact_assets, weight=2.0),
+    Stage("image_generator", "image-generator", IMAGE_STAGE_PROMPT, "image",
+          reads=("brief",), compact=_fields("refined_prompt", "style"), default=_default_image),
+    Stage("publisher", "publisher", PUBLISH_STAGE_PROMPT, "publish_result",
+          reads=("assets", "image"), compact=_compact_publish_result),
+    Stage("evaluator", "evaluator", EVALUATE_STAGE_PROMPT, "evaluation",
+          reads=("publish_result",), compact=_fields("best_channel", "summary", "suggestions")),
+])
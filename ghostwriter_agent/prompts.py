@@ -28,3 +28,23 @@ SAMPLE_RUN_PROMPT = (
 
 
 DAILY_TITLE_TEMPLATE = "Daily Serving: {date}"
+
+
+# Per-stage messages for the code-driven full cycle (see pipeline.py).
+# Upstream results reach each agent through session state placeholders in
+# its instruction, so these stay short.
+
+TREND_STAGE_PROMPT = "Find trends for this brand topic: {topic}.{notes}"
+
+STRATEGY_STAGE_PROMPT = "Brand topic: {topic}. Plan the campaign from the selected trends."
+
+CREATOR_STAGE_PROMPT = "Brand topic: {topic}. Create the assets for the brief."
+
+IMAGE_STAGE_PROMPT = "Brand topic: {topic}. Create one cover image prompt for the brief."
+
+PUBLISH_STAGE_PROMPT = (
+    "Publish or schedule the assets with the cover image "
+    "(mock if no credentials are configured)."
+)
+
+EVALUATE_STAGE_PROMPT = "Evaluate the campaign that was just published."
@@ -2,13 +2,16 @@ from google.adk.agents import LlmAgent
 from ..config import model
 
 
-def build_content_creator_agent() -> LlmAgent:
+def build_content_creator_agent(include_contents: str = "default") -> LlmAgent:
     return LlmAgent(
         name="content_creator",
         model=model,
+        output_key="assets",
+        include_contents=include_contents,
         instruction=(
             "You are a senior ghost writer and short-form content creator.\n"
             "Input: a JSON brief with chosen_trend and per-channel plan.\n"
+            "Brief (if not given in the message): {brief?}\n"
             "For each channel, generate:\n"
             "- video_script: 30–45 seconds, in conversational tone.\n"
             "- caption: 1–3 short, punchy sentences.\n"
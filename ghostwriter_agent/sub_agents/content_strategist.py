@@ -2,13 +2,16 @@ from google.adk.agents import LlmAgent
 from ..config import model
 
 
-def build_content_strategist_agent() -> LlmAgent:
+def build_content_strategist_agent(include_contents: str = "default") -> LlmAgent:
     return LlmAgent(
         name="content_strategist",
         model=model,
+        output_key="brief",
+        include_contents=include_contents,
         instruction=(
             "You are a content strategist / ghost writer for a personal brand.\n"
             "You receive JSON with selected_trends from the previous agent.\n"
+            "Selected trends (if not given in the message): {trends?}\n"
             "Tasks:\n"
             "1. Choose ONE best trend that fits the brand's voice and long-term positioning.\n"
             "2. Define a mini content plan for four channels: Instagram, "
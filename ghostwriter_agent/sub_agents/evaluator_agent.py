@@ -1,15 +1,18 @@
 from google.adk.agents import LlmAgent
-from ..config import model
+from ..config import evaluatorModel
 from ..tools import analytics_tool
 
 
-def build_evaluator_agent() -> LlmAgent:
+def build_evaluator_agent(include_contents: str = "default") -> LlmAgent:
     return LlmAgent(
         name="evaluator_agent",
-        model=model,
+        model=evaluatorModel,
+        output_key="evaluation",
+        include_contents=include_contents,
         instruction=(
             "You are a performance analyst for ghost-written social campaigns.\n"
             "You must ALWAYS call get_mock_analytics to fetch performance metrics.\n"
+            "Published items (if not given in the message): {publish_result?}\n"
             "Then:\n"
             "1. Compute which channel performed best (views, engagement).\n"
             "2. Suggest 3 concrete improvements for the next campaign.\n"
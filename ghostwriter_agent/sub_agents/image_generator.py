@@ -2,13 +2,16 @@ from google.adk.agents import LlmAgent
 from ..config import imageModel
 
 
-def build_image_generator_agent() -> LlmAgent:
+def build_image_generator_agent(include_contents: str = "default") -> LlmAgent:
     return LlmAgent(
         name="image_generator",
         model=imageModel,
+        output_key="image",
+        include_contents=include_contents,
         instruction=(
             "You are an image generation agent for the ghost writer system.\n"
             "You receive image prompts and descriptions from content creators.\n"
+            "Campaign brief (if not given in the message): {brief?}\n"
             "Tasks:\n"
             "1. Refine and optimize image prompts for clarity and visual appeal.\n"
             "2. Suggest appropriate styles (e.g., 'professional', 'casual', 'minimalist', 'vibrant').\n"
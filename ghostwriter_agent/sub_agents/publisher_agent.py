@@ -3,13 +3,17 @@ from ..config import model
 from ..tools import publish_tool
 
 
-def build_publisher_agent() -> LlmAgent:
+def build_publisher_agent(include_contents: str = "default") -> LlmAgent:
     return LlmAgent(
         name="publisher_agent",
         model=model,
+        output_key="publish_result",
+        include_contents=include_contents,
         instruction=(
             "You are a publishing coordinator agent for the ghost writer system.\n"
             "You receive generated assets for all channels (WordPress, Threads, Facebook, etc.).\n"
+            "Assets (if not given in the message): {assets?}\n"
+            "Cover image (if not given in the message): {image?}\n"
             "1. Transform them into a payload for the publish_or_schedule tool: {\n"
             '   "items": [\n'
             '      {\n'
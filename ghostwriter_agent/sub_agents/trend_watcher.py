@@ -3,10 +3,12 @@ from ..config import model
 from ..tools import fetch_trends_tool
 
 
-def build_trend_watcher_agent() -> LlmAgent:
+def build_trend_watcher_agent(include_contents: str = "default") -> LlmAgent:
     return LlmAgent(
         name="trend_watcher",
         model=model,
+        output_key="trends",
+        include_contents=include_contents,
         instruction=(
             "You are a trend analysis agent for a specific personal brand / ghost writer.\n"
             "- Always call the fetch_trends tool with the brand's niche, "
@@ -1,3 +1,4 @@
+from contextvars import ContextVar
 from datetime import datetime
 import os
 from google.adk.tools import FunctionTool
@@ -5,14 +6,20 @@ from google.adk.tools import FunctionTool
 # local import for small templates
 from .prompts import DAILY_TITLE_TEMPLATE
 
+# Whether publish_or_schedule really posts. The backend's run-full-cycle
+# endpoint turns it off unless the request asks to publish; CLI runs keep it on.
+live_publish: ContextVar[bool] = ContextVar("live_publish", default=True)
+
 # ------------- TOOL FUNCTIONS -------------
 
 
 def fetch_trends(brand_topic: str) -> dict:
-    """Mock: return a few trending topics for the brand niche."""
+    """Mock: return a few trending topics for the brand niche.
+
+    Only the fields the trend watcher ranks on are returned, since the whole
+    payload is sent back to the model.
+    """
     return {
-        "status": "success",
-        "brand_topic": brand_topic,
         "trends": [
             {
                 "topic": "AI won’t replace you, but someone using AI will",
@@ -30,11 +37,10 @@ def fetch_trends(brand_topic: str) -> dict:
                 "velocity_score": 0.81,
             },
         ],
-        "as_of": datetime.utcnow().isoformat(),
     }
 
 
-def publish_or_schedule(payload: dict) -> dict:
+async def publish_or_schedule(payload: dict) -> dict:
     """
     Publish or schedule posts to various platforms including WordPress, Threads, and Facebook.
     
@@ -56,7 +62,20 @@ def publish_or_schedule(payload: dict) -> dict:
             }
         ]
     }
+
+    While `live_publish` is off, nothing is sent and every item is reported
+    as "dry_run".
     """
+    if not live_publish.get():
+        return {
+            "status": "success",
+            "items": [
+                {"channel": item.get("channel", "unknown").lower(), "status": "dry_run"}
+                for item in payload.get("items", [])
+            ],
+            "note": "Dry run: publishing is off for this run, nothing was sent.",
+        }
+
     scheduled_items = []
 
     for item in payload.get("items", []):
@@ -70,30 +89,26 @@ def publish_or_schedule(payload: dict) -> dict:
 
             if wp_site and wp_user and wp_password:
                 try:
-                    import requests
-                    from requests.auth import HTTPBasicAuth
+                    from helpers.wordpress_api import WordPressAPI
 
-                    wp_url = f"{wp_site.rstrip('/')}/wp-json/wp/v2/posts"
                     today = datetime.today().strftime("%B %d, %Y")
                     title = item.get("title") or DAILY_TITLE_TEMPLATE.format(date=today)
                     content = item.get("content") or item.get("caption") or ""
 
-                    payload_wp = {
-                        "title": title,
-                        "content": content,
-                        "status": item.get("status", "draft"),
-                    }
-
-                    resp = requests.post(
-                        wp_url, json=payload_wp, auth=HTTPBasicAuth(wp_user, wp_password)
+                    result = await WordPressAPI(wp_site, wp_user, wp_password).acreate_post(
+                        title=title,
+                        content=content,
+                        status=item.get("status", "draft"),
                     )
+                    if result.get("status_code") is None:
+                        raise RuntimeError(result.get("message"))
 
                     scheduled_items.append(
                         {
                             "channel": "wordpress",
-                            "status": "posted" if resp.status_code in (200, 201) else "error",
-                            "response_code": resp.status_code,
-                            "response": resp.json() if resp.headers.get("content-type", "").startswith("application/json") else resp.text,
+                            "status": "posted" if result.get("success") else "error",
+                            "response_code": result.get("status_code"),
+                            "response": result.get("response"),
                         }
                     )
                     continue
@@ -112,13 +127,13 @@ def publish_or_schedule(payload: dict) -> dict:
             access_token = item.get("access_token")
             if access_token:
                 try:
-                    from helpers.threads_api import publish_to_threads
+                    from helpers.threads_api import apublish_to_threads
                     
                     content = item.get("content") or item.get("caption") or ""
                     image_url = item.get("image_url")
                     media_type = "IMAGE" if image_url else "TEXT"
                     
-                    result = publish_to_threads(
+                    result = await apublish_to_threads(
                         text=content,
                         access_token=access_token,
                         media_url=image_url,
@@ -159,14 +174,14 @@ def publish_or_schedule(payload: dict) -> dict:
             access_token = item.get("access_token")
             if access_token:
                 try:
-                    from helpers.facebook_api import publish_to_facebook
+                    from helpers.facebook_api import apublish_to_facebook
                     
                     content = item.get("content") or item.get("caption") or ""
                     image_url = item.get("image_url")
                     page_id = item.get("page_id")
                     page_access_token = item.get("page_access_token")
                     
-                    result = publish_to_facebook(
+                    result = await apublish_to_facebook(
                         message=content,
                         access_token=access_token,
                         page_id=page_id,
@@ -223,14 +238,12 @@ def publish_or_schedule(payload: dict) -> dict:
 def get_mock_analytics() -> dict:
     """Return fake engagement metrics so the Evaluator agent can learn."""
     return {
-        "status": "success",
         "metrics": [
             {"channel": "TikTok", "views": 18450, "likes": 3200, "comments": 240},
             {"channel": "Instagram", "views": 8200, "likes": 970, "comments": 54},
             {"channel": "YouTubeShort", "views": 4200, "likes": 380, "comments": 21},
             {"channel": "LinkedIn", "views": 3100, "likes": 265, "comments": 19},
         ],
-        "as_of": datetime.utcnow().isoformat(),
     }
 
 
@@ -0,0 +1,157 @@
+"""
+Circuit Breaker Module
+Fail fast while an external provider (nanobanana, Meta Graph API, WordPress)
+is down, instead of every call waiting out its 30 second timeout.
+
+Each provider has one breaker shared by the sync and async helpers:
+
+- closed: calls go through; network errors, 5xx and 429 responses count as
+  failures, anything else resets the count,
+- open: after CIRCUIT_BREAKER_FAILURES consecutive failures, calls are
+  rejected without touching the network for CIRCUIT_BREAKER_RESET seconds,
+- half_open: after that, a single probe call is let through. Its outcome
+  closes the breaker or opens it for another reset period. A probe that never
+  reports back (its caller was cancelled) is replaced after the same period.
+
+Rejected calls get a result with `circuit_open: True` and `retry_after`, so
+callers can fall back (placeholder image, queued publish). `snapshot()`
+reports every breaker for /health.
+
+Environment variables:
+    CIRCUIT_BREAKER_ENABLED=1      guard provider calls (default on)
+    CIRCUIT_BREAKER_FAILURES=5     consecutive failures that open a breaker
+    CIRCUIT_BREAKER_RESET=30       seconds a breaker stays open before probing
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one provider; safe to share across threads."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 enabled: bool = True):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.stats = {"opened": 0, "rejected": 0, "probes": 0}
+
+    @classmethod
+    def from_env(cls, name: str) -> "CircuitBreaker":
+        return cls(
+            name,
+            failure_threshold=int(os.getenv("CIRCUIT_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_BREAKER_RESET", "30")),
+            enabled=os.getenv("CIRCUIT_BREAKER_ENABLED", "1").lower() not in ("0", "false", "no"),
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now (claims the probe when half open)."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self._state == OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    self.stats["rejected"] += 1
+                    return False
+                self._state = HALF_OPEN
+                self._probe_started = None
+            if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                self.stats["rejected"] += 1
+                return False
+            self._probe_started = now
+            self.stats["probes"] += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = CLOSED
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+                self.stats["opened"] += 1
+
+    def record(self, status_code: int) -> None:
+        """Record a provider response: 5xx and 429 mean the provider is struggling."""
+        if status_code >= 500 or status_code == 429:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a call through again."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN:
+                return max(0.0, self.reset_timeout - (now - self._opened_at))
+            if self._state == HALF_OPEN and self._probe_started is not None:
+                return max(0.0, self.reset_timeout - (now - self._probe_started))
+            return 0.0
+
+    def unavailable(self, key: str = "message") -> Dict[str, Any]:
+        """
+        Result for a call rejected without reaching the provider.
+
+        Args:
+            key: Result key the caller uses for its error text ("message" or "error")
+
+        Returns:
+            Dict with success False, circuit_open True and retry_after seconds
+        """
+        retry_after = round(self.retry_after(), 1)
+        return {
+            "success": False,
+            "circuit_open": True,
+            "retry_after": retry_after,
+            key: f"{self.name} is unavailable (circuit open), retry in {retry_after:.0f}s",
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State, failure count and counters for /health."""
+        return {
+            "state": self.state if self.enabled else "disabled",
+            "consecutive_failures": self._failures,
+            "retry_after_s": round(self.retry_after(), 1),
+            **self.stats,
+        }
+
+
+# One breaker per external provider, shared by the sync and async helpers
+breakers: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker.from_env(name) for name in ("nanobanana", "facebook", "threads", "wordpress")
+}
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Every provider breaker's snapshot, keyed by provider."""
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
@@ -2,9 +2,13 @@
 Facebook API Integration Module
 Handles posting content to Facebook Pages using the Meta Graph API.
 """
+import httpx
 import requests
 import os
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple
+
+from .circuit_breaker import breakers
+from .http_client import get_session, get_async_client
 
 
 class FacebookAPI:
@@ -31,6 +35,58 @@ class FacebookAPI:
         Returns:
             Dict with success status and message
         """
+        precheck = self._check_credentials()
+        if precheck:
+            return precheck
+        
+        try:
+            # Verify token and get page/user info
+            response = get_session().get(
+                f"{self.base_url}/me",
+                params={
+                    "access_token": self.access_token,
+                    "fields": "id,name"
+                },
+                timeout=10
+            )
+            return self._connection_result(response)
+                
+        except requests.exceptions.RequestException as e:
+            return {
+                "success": False,
+                "message": f"Connection error: {str(e)}"
+            }
+    
+    async def acheck_connection(self) -> Dict[str, Any]:
+        """
+        Async variant of check_connection using the pooled async client.
+        
+        Returns:
+            Dict with success status and message
+        """
+        precheck = self._check_credentials()
+        if precheck:
+            return precheck
+        
+        try:
+            response = await get_async_client().get(
+                f"{self.base_url}/me",
+                params={
+                    "access_token": self.access_token,
+                    "fields": "id,name"
+                },
+                timeout=10
+            )
+            return self._connection_result(response)
+                
+        except httpx.HTTPError as e:
+            return {
+                "success": False,
+                "message": f"Connection error: {str(e)}"
+            }
+    
+    def _check_credentials(self) -> Optional[Dict[str, Any]]:
+        """Return an error dict if app credentials or token are missing."""
         if not self.app_id or not self.app_secret:
             return {
                 "success": False,
@@ -42,42 +98,59 @@ class FacebookAPI:
                 "success": False,
                 "message": "Access token required. Please authenticate with Facebook."
             }
+        return None
+    
+    @staticmethod
+    def _connection_result(response) -> Dict[str, Any]:
+        """Build the check_connection result from a /me response."""
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "success": True,
+                "message": f"Connected to Facebook as {data.get('name', 'Unknown')}",
+                "id": data.get("id"),
+                "name": data.get("name")
+            }
+        else:
+            error = response.json().get("error", {})
+            return {
+                "success": False,
+                "message": f"Facebook API error: {error.get('message', 'Unknown error')}"
+            }
+    
+    def get_pages(self) -> Dict[str, Any]:
+        """
+        Get list of pages managed by the user.
+        
+        Returns:
+            Dict with success status and list of pages
+        """
+        if not self.access_token:
+            return {
+                "success": False,
+                "message": "Access token required"
+            }
         
         try:
-            # Verify token and get page/user info
-            response = requests.get(
-                f"{self.base_url}/me",
+            response = get_session().get(
+                f"{self.base_url}/me/accounts",
                 params={
                     "access_token": self.access_token,
-                    "fields": "id,name"
+                    "fields": "id,name,access_token"
                 },
                 timeout=10
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "message": f"Connected to Facebook as {data.get('name', 'Unknown')}",
-                    "id": data.get("id"),
-                    "name": data.get("name")
-                }
-            else:
-                error = response.json().get("error", {})
-                return {
-                    "success": False,
-                    "message": f"Facebook API error: {error.get('message', 'Unknown error')}"
-                }
+            return self._pages_result(response)
                 
         except requests.exceptions.RequestException as e:
             return {
                 "success": False,
-                "message": f"Connection error: {str(e)}"
+                "message": f"Network error: {str(e)}"
             }
     
-    def get_pages(self) -> Dict[str, Any]:
+    async def aget_pages(self) -> Dict[str, Any]:
         """
-        Get list of pages managed by the user.
+        Async variant of get_pages using the pooled async client.
         
         Returns:
             Dict with success status and list of pages
@@ -89,7 +162,7 @@ class FacebookAPI:
             }
         
         try:
-            response = requests.get(
+            response = await get_async_client().get(
                 f"{self.base_url}/me/accounts",
                 params={
                     "access_token": self.access_token,
@@ -97,28 +170,32 @@ class FacebookAPI:
                 },
                 timeout=10
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                pages = data.get("data", [])
-                return {
-                    "success": True,
-                    "pages": pages,
-                    "message": f"Found {len(pages)} page(s)"
-                }
-            else:
-                error = response.json().get("error", {})
-                return {
-                    "success": False,
-                    "message": f"Failed to get pages: {error.get('message', 'Unknown error')}"
-                }
+            return self._pages_result(response)
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {
                 "success": False,
                 "message": f"Network error: {str(e)}"
             }
     
+    @staticmethod
+    def _pages_result(response) -> Dict[str, Any]:
+        """Build the get_pages result from a /me/accounts response."""
+        if response.status_code == 200:
+            data = response.json()
+            pages = data.get("data", [])
+            return {
+                "success": True,
+                "pages": pages,
+                "message": f"Found {len(pages)} page(s)"
+            }
+        else:
+            error = response.json().get("error", {})
+            return {
+                "success": False,
+                "message": f"Failed to get pages: {error.get('message', 'Unknown error')}"
+            }
+    
     def create_post(
         self,
         message: str,
@@ -150,70 +227,71 @@ class FacebookAPI:
                 "message": "Access token required"
             }
         
-        # Determine endpoint (page or user feed)
-        endpoint = f"{self.base_url}/{page_id}/feed" if page_id else f"{self.base_url}/me/feed"
+        breaker = breakers["facebook"]
+        if not breaker.allow():
+            return breaker.unavailable()
         
         try:
-            post_data = {
-                "message": message,
-                "access_token": token,
-                "published": str(published).lower()
-            }
-            
-            if link:
-                post_data["link"] = link
-            
-            # Handle image posting
-            if image_url:
-                # For images, use photos endpoint
-                photo_endpoint = f"{self.base_url}/{page_id}/photos" if page_id else f"{self.base_url}/me/photos"
-                photo_data = {
-                    "url": image_url,
-                    "caption": message,
-                    "access_token": token,
-                    "published": str(published).lower()
-                }
+            post_endpoint, post_data = self._post_request(message, token, page_id, link, image_url, published)
+            response = get_session().post(post_endpoint, data=post_data, timeout=30)
+            breaker.record(response.status_code)
+            return self._post_result(response, page_id)
                 
-                response = requests.post(
-                    photo_endpoint,
-                    data=photo_data,
-                    timeout=30
-                )
-            else:
-                # Regular post
-                response = requests.post(
-                    endpoint,
-                    data=post_data,
-                    timeout=30
-                )
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure()
+            return {
+                "success": False,
+                "message": f"Network error: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Unexpected error: {str(e)}"
+            }
+    
+    async def acreate_post(
+        self,
+        message: str,
+        page_id: Optional[str] = None,
+        page_access_token: Optional[str] = None,
+        link: Optional[str] = None,
+        image_url: Optional[str] = None,
+        published: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Async variant of create_post using the pooled async client.
+        
+        Args:
+            message: The text content of the post
+            page_id: Facebook Page ID (if None, posts to user's feed)
+            page_access_token: Page-specific access token
+            link: Optional link to share
+            image_url: Optional image URL
+            published: Whether to publish immediately (True) or save as draft (False)
             
-            if response.status_code == 200:
-                result = response.json()
-                post_id = result.get("id", "")
-                
-                # Construct URL
-                if page_id and "_" in post_id:
-                    page_id_part, post_id_part = post_id.split("_")
-                    post_url = f"https://www.facebook.com/{page_id_part}/posts/{post_id_part}"
-                else:
-                    post_url = f"https://www.facebook.com/{post_id.replace('_', '/posts/')}"
-                
-                return {
-                    "success": True,
-                    "message": "Successfully posted to Facebook",
-                    "post_id": post_id,
-                    "url": post_url
-                }
-            else:
-                error = response.json().get("error", {})
-                return {
-                    "success": False,
-                    "message": f"Failed to create post: {error.get('message', 'Unknown error')}",
-                    "error_code": error.get("code"),
-                    "error_type": error.get("type")
-                }
+        Returns:
+            Dict with success status, post ID, and URL
+        """
+        token = page_access_token or self.access_token
+        
+        if not token:
+            return {
+                "success": False,
+                "message": "Access token required"
+            }
+        
+        breaker = breakers["facebook"]
+        if not breaker.allow():
+            return breaker.unavailable()
+        
+        try:
+            post_endpoint, post_data = self._post_request(message, token, page_id, link, image_url, published)
+            response = await get_async_client().post(post_endpoint, data=post_data, timeout=30)
+            breaker.record(response.status_code)
+            return self._post_result(response, page_id)
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
+            breaker.record_failure()
             return {
                 "success": False,
                 "message": f"Network error: {str(e)}"
@@ -224,6 +302,69 @@ class FacebookAPI:
                 "message": f"Unexpected error: {str(e)}"
             }
     
+    def _post_request(
+        self,
+        message: str,
+        token: str,
+        page_id: Optional[str],
+        link: Optional[str],
+        image_url: Optional[str],
+        published: bool
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Return the (endpoint, form data) pair for a feed or photo post."""
+        # Handle image posting
+        if image_url:
+            # For images, use photos endpoint
+            photo_endpoint = f"{self.base_url}/{page_id}/photos" if page_id else f"{self.base_url}/me/photos"
+            photo_data = {
+                "url": image_url,
+                "caption": message,
+                "access_token": token,
+                "published": str(published).lower()
+            }
+            return photo_endpoint, photo_data
+        
+        # Regular post (page or user feed)
+        endpoint = f"{self.base_url}/{page_id}/feed" if page_id else f"{self.base_url}/me/feed"
+        post_data = {
+            "message": message,
+            "access_token": token,
+            "published": str(published).lower()
+        }
+        
+        if link:
+            post_data["link"] = link
+        return endpoint, post_data
+    
+    @staticmethod
+    def _post_result(response, page_id: Optional[str]) -> Dict[str, Any]:
+        """Build the create_post result from a feed or photo response."""
+        if response.status_code == 200:
+            result = response.json()
+            post_id = result.get("id", "")
+            
+            # Construct URL
+            if page_id and "_" in post_id:
+                page_id_part, post_id_part = post_id.split("_")
+                post_url = f"https://www.facebook.com/{page_id_part}/posts/{post_id_part}"
+            else:
+                post_url = f"https://www.facebook.com/{post_id.replace('_', '/posts/')}"
+            
+            return {
+                "success": True,
+                "message": "Successfully posted to Facebook",
+                "post_id": post_id,
+                "url": post_url
+            }
+        else:
+            error = response.json().get("error", {})
+            return {
+                "success": False,
+                "message": f"Failed to create post: {error.get('message', 'Unknown error')}",
+                "error_code": error.get("code"),
+                "error_type": error.get("type")
+            }
+    
     def delete_post(self, post_id: str) -> Dict[str, Any]:
         """
         Delete a Facebook post.
@@ -241,7 +382,7 @@ class FacebookAPI:
             }
         
         try:
-            response = requests.delete(
+            response = get_session().delete(
                 f"{self.base_url}/{post_id}",
                 params={"access_token": self.access_token},
                 timeout=10
@@ -324,3 +465,63 @@ def get_facebook_pages(access_token: str) -> Dict[str, Any]:
     """
     client = FacebookAPI(access_token=access_token)
     return client.get_pages()
+
+
+async def apublish_to_facebook(
+    message: str,
+    access_token: str,
+    page_id: Optional[str] = None,
+    page_access_token: Optional[str] = None,
+    link: Optional[str] = None,
+    image_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Async variant of publish_to_facebook for the backend event loop.
+    
+    Args:
+        message: The post message
+        access_token: User access token
+        page_id: Optional page ID to post to
+        page_access_token: Optional page-specific token
+        link: Optional link to share
+        image_url: Optional image URL
+        
+    Returns:
+        Dict with success status and details
+    """
+    client = FacebookAPI(access_token=access_token)
+    return await client.acreate_post(
+        message=message,
+        page_id=page_id,
+        page_access_token=page_access_token,
+        link=link,
+        image_url=image_url
+    )
+
+
+async def acheck_facebook_connection(access_token: str) -> Dict[str, Any]:
+    """
+    Async variant of check_facebook_connection.
+    
+    Args:
+        access_token: User or page access token
+        
+    Returns:
+        Dict with connection status
+    """
+    client = FacebookAPI(access_token=access_token)
+    return await client.acheck_connection()
+
+
+async def aget_facebook_pages(access_token: str) -> Dict[str, Any]:
+    """
+    Async variant of get_facebook_pages.
+    
+    Args:
+        access_token: User access token
+        
+    Returns:
+        Dict with list of pages
+    """
+    client = FacebookAPI(access_token=access_token)
+    return await client.aget_pages()
@@ -0,0 +1,89 @@
+"""
+Shared HTTP Client Module
+Pooled keep-alive connections for every outbound provider call (Meta Graph API,
+WordPress REST API, nanobanana).
+
+The backend uses the async client so a slow provider never blocks the event
+loop. The CLI and the ADK tools keep using the sync session.
+"""
+import asyncio
+import os
+import threading
+from typing import Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Pool sizing (per host for the sync session, total for the async client)
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide pooled requests session.
+
+    Returns:
+        A requests.Session with keep-alive connection pools mounted
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Get the pooled async client for the running event loop.
+
+    httpx connection pools are bound to the loop that opened them, so a new
+    client is created if the loop changed (e.g. successive asyncio.run calls).
+
+    Returns:
+        An httpx.AsyncClient with keep-alive connection pools
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_SIZE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+async def aclose_async_client() -> None:
+    """Close the async client and release its pooled connections."""
+    global _async_client, _async_client_loop
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+    _async_client_loop = None
+
+
+def close_session() -> None:
+    """Close the sync session and release its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
@@ -0,0 +1,246 @@
+"""
+Adaptive Model Call Limiter
+Central concurrency limit and fair queue for every Gemini call (backend
+endpoints and ADK agent runs).
+
+Nothing used to bound how many model requests the backend fired at once, so
+under load the provider answered with 429s and every user suffered. Calls
+now take a slot from this limiter. The limit adapts AIMD-style:
+
+- a successful call grows it by 1/limit (about +1 per round of calls) while
+  the limiter is saturated,
+- a 429 / RESOURCE_EXHAUSTED halves it,
+- a call much slower than usual for its kind (over MODEL_LATENCY_TOLERANCE x
+  that kind's running average) shrinks it by 10%.
+
+Only calls started after the last decrease can shrink it again, so a burst of
+429s from one overloaded moment counts once.
+
+Calls that cannot start wait in per-key FIFO queues served round-robin, keyed
+by user_id / session_id. One batch user with fifty queued generations then
+delays an interactive chat by at most one slot, not fifty. Queue depth, wait
+times and the current limit are in `snapshot()`.
+
+The fairness key is passed explicitly, or taken from `current_key`, a context
+variable set by whoever starts an agent run (ADK calls the model deep inside
+the runner).
+
+Endpoints with a template fallback check `overloaded()` before queueing. Once
+MODEL_SHED_QUEUE calls are queued, or the oldest queued call has waited
+MODEL_SHED_WAIT seconds, they answer with the template right away instead of
+waiting behind a saturated provider (0 disables either threshold).
+Only queue signals are used: calls queue only while every slot is taken, so
+a queue already implies in-flight saturation, while a full limiter with an
+empty queue still starts the next call at once and has nothing to shed.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+# Fairness key of the work currently running (user_id / session_id)
+current_key: contextvars.ContextVar[str] = contextvars.ContextVar("model_limiter_key", default="anonymous")
+
+# Successful calls per kind before its latency average is trusted
+_WARMUP_CALLS = 10
+_LATENCY_ALPHA = 0.05
+_WAIT_ALPHA = 0.1
+
+
+class ModelBusy(Exception):
+    """The model queue is full, or a call waited longer than the queue timeout."""
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether a provider error is an HTTP 429 / RESOURCE_EXHAUSTED."""
+    return getattr(error, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+class ModelLimiter:
+    """AIMD concurrency limit with round-robin queues per fairness key."""
+
+    def __init__(self, initial_limit: int = 8, min_limit: int = 1, max_limit: int = 64,
+                 latency_tolerance: float = 2.0, max_queue: int = 1000, queue_timeout: float = 30.0,
+                 shed_queue: int = 100, shed_wait: float = 5.0):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.shed_queue = shed_queue
+        self.shed_wait = shed_wait
+
+        self._in_flight = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        # queued future -> time it was enqueued
+        self._enqueued: Dict[asyncio.Future, float] = {}
+        # kind -> (successful calls, running average latency in seconds)
+        self._latency: Dict[str, list] = {}
+        self._last_decrease = 0.0
+        self._avg_wait = 0.0
+        self._max_wait = 0.0
+        self.stats = {"granted": 0, "waited": 0, "rejected": 0, "timeouts": 0,
+                      "rate_limited": 0, "slow_calls": 0, "decreases": 0, "shed": 0}
+
+    @classmethod
+    def from_env(cls) -> "ModelLimiter":
+        return cls(
+            initial_limit=int(os.getenv("MODEL_CONCURRENCY_INITIAL", "8")),
+            min_limit=int(os.getenv("MODEL_CONCURRENCY_MIN", "1")),
+            max_limit=int(os.getenv("MODEL_CONCURRENCY_MAX", "64")),
+            latency_tolerance=float(os.getenv("MODEL_LATENCY_TOLERANCE", "2.0")),
+            max_queue=int(os.getenv("MODEL_QUEUE_MAX", "1000")),
+            queue_timeout=float(os.getenv("MODEL_QUEUE_TIMEOUT", "30")),
+            shed_queue=int(os.getenv("MODEL_SHED_QUEUE", "100")),
+            shed_wait=float(os.getenv("MODEL_SHED_WAIT", "5")),
+        )
+
+    def _capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def oldest_wait(self) -> float:
+        """Seconds the longest-queued call has been waiting (0 when nothing is queued)."""
+        if not self._enqueued:
+            return 0.0
+        return time.monotonic() - min(self._enqueued.values())
+
+    def overloaded(self) -> bool:
+        """
+        Whether a call with a cheap fallback should be shed instead of queued.
+
+        Counts a shed in `stats` when it returns True.
+        """
+        if ((self.shed_queue and self._queued >= self.shed_queue)
+                or (self.shed_wait and self.oldest_wait() >= self.shed_wait)):
+            self.stats["shed"] += 1
+            return True
+        return False
+
+    @asynccontextmanager
+    async def slot(self, kind: str = "model", key: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Hold one model-call slot for the duration of the block.
+
+        Args:
+            kind: Call type ("generate-content", "chat", "agent", ...); latency is tracked per kind
+            key: Fairness key; defaults to `current_key`
+
+        Raises:
+            ModelBusy: if the queue is full or the wait exceeds the queue timeout
+        """
+        await self._acquire(key or current_key.get())
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limited(e):
+                self.stats["rate_limited"] += 1
+                self._decrease(started, 0.5)
+            raise
+        else:
+            self._observe(kind, time.monotonic() - started, started)
+        finally:
+            self._release()
+
+    async def _acquire(self, key: str) -> None:
+        if not self._queued and self._in_flight < self._capacity():
+            self._in_flight += 1
+            self.stats["granted"] += 1
+            return
+        if self._queued >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise ModelBusy("Model request queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(future)
+        self._queued += 1
+        enqueued = self._enqueued[future] = time.monotonic()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except BaseException as e:
+            # Leave the queue first; `_grant` skips the future if it is already cancelled
+            self._discard(key, future)
+            if future.done() and not future.cancelled():
+                self._release()  # granted just as the caller gave up
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["timeouts"] += 1
+                raise ModelBusy(f"Waited over {self.queue_timeout:g}s for a model slot") from None
+            raise
+
+        waited = time.monotonic() - enqueued
+        self.stats["waited"] += 1
+        self._avg_wait += _WAIT_ALPHA * (waited - self._avg_wait)
+        self._max_wait = max(self._max_wait, waited)
+
+    def _discard(self, key: str, future: asyncio.Future) -> None:
+        waiters = self._queues.get(key)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            self._queued -= 1
+            del self._enqueued[future]
+            if not waiters:
+                del self._queues[key]
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        """Hand free slots to queued calls, one key at a time."""
+        while self._queues and self._in_flight < self._capacity():
+            key, waiters = next(iter(self._queues.items()))
+            future = waiters.popleft()
+            self._queued -= 1
+            del self._enqueued[future]
+            if waiters:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if future.done():
+                continue  # cancelled or timed out, not yet out of the queue
+            self._in_flight += 1
+            self.stats["granted"] += 1
+            future.set_result(None)
+
+    def _observe(self, kind: str, latency: float, started: float) -> None:
+        calls_avg = self._latency.setdefault(kind, [0, latency])
+        calls_avg[0] += 1
+        if calls_avg[0] > _WARMUP_CALLS and latency > self.latency_tolerance * calls_avg[1]:
+            self.stats["slow_calls"] += 1
+            self._decrease(started, 0.9)
+            return
+        calls_avg[1] += _LATENCY_ALPHA * (latency - calls_avg[1])
+        # Additive increase, only while the limit is what holds calls back
+        if self._queued or self._in_flight >= self._capacity():
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._grant()
+
+    def _decrease(self, started: float, factor: float) -> None:
+        if started < self._last_decrease:
+            return  # this call was already in flight when the limit last dropped
+        self._last_decrease = time.monotonic()
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        self.stats["decreases"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Limit, queue depth and wait times for /metrics."""
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "queued_keys": len(self._queues),
+            "oldest_wait_ms": round(self.oldest_wait() * 1000, 1),
+            "avg_wait_ms": round(self._avg_wait * 1000, 1),
+            "max_wait_ms": round(self._max_wait * 1000, 1),
+            "avg_latency_ms": {kind: round(avg * 1000, 1) for kind, (_, avg) in self._latency.items()},
+            **self.stats,
+        }
+
+
+# Process-wide limiter shared by every model call
+model_limiter = ModelLimiter.from_env()
@@ -0,0 +1,212 @@
+"""
+Model Router
+Picks the Gemini model for each task type from a routing table and keeps
+rolling latency / error stats per model.
+
+Each route lists models in preference order, the primary first and cheaper
+tiers after it, plus a latency budget. The router then:
+
+- fails over: when a call errors, the same request is retried on the next
+  model in the route,
+- cascades: while the primary is unhealthy (over MODEL_ROUTE_MAX_ERROR_RATE
+  errors, or p95 latency over the route's budget, across its last calls for
+  that task), calls start on the first healthy cheaper tier. Every
+  `probe_every`-th call still goes to the primary so it can recover.
+
+Health only counts calls that finished within the last MODEL_ROUTE_HORIZON
+seconds, so after an outage the primary is healthy again once its bad samples
+age out, however few calls it got meanwhile.
+
+Stats are kept per (task, model), because a model that is fast enough for
+captions may be too slow for chat replies. `snapshot()` reports them for
+tuning cost against latency.
+
+Environment variables:
+    MODEL_ROUTE_MAX_ERROR_RATE=0.5   error rate above which a model is unhealthy
+    MODEL_ROUTE_HORIZON=60           seconds a call counts towards model health
+"""
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Route:
+    """Models for one task type, preferred first, and the p95 latency (seconds) the primary must meet."""
+
+    models: Tuple[str, ...]
+    latency_budget: float
+
+    @property
+    def primary(self) -> str:
+        return self.models[0]
+
+
+def parse_routes(spec: Optional[str], routes: Dict[str, Route]) -> Dict[str, Route]:
+    """
+    Override route models from a "task=model>fallback,task2=model" string.
+
+    Args:
+        spec: Override string (e.g. the MODEL_ROUTES env var); empty keeps `routes`
+        routes: Default routing table
+
+    Returns:
+        Routing table with the listed tasks' models replaced (budgets are kept)
+
+    Raises:
+        ValueError: if the string names an unknown task or has no models
+    """
+    routes = dict(routes)
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        task, _, models = item.partition("=")
+        task = task.strip()
+        names = tuple(name.strip() for name in models.split(">") if name.strip())
+        if task not in routes or not names:
+            raise ValueError(f"Invalid model route: {item!r}")
+        routes[task] = Route(names, routes[task].latency_budget)
+    return routes
+
+
+class ModelRouter:
+    """Routing table with per-model health, failover and cascade to cheaper tiers."""
+
+    def __init__(self, routes: Dict[str, Route], window: int = 50, min_samples: int = 5,
+                 max_error_rate: float = 0.5, probe_every: int = 10, horizon: float = 60.0):
+        self.routes = routes
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.probe_every = probe_every
+        self.horizon = horizon
+        # (task, model) -> recent (finished at, latency seconds, succeeded), oldest first
+        self._samples: Dict[Tuple[str, str], Deque[Tuple[float, float, bool]]] = {}
+        self._counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {
+            task: {"calls": 0, "cascaded": 0, "failovers": 0} for task in routes
+        }
+
+    @classmethod
+    def from_env(cls, routes: Dict[str, Route]) -> "ModelRouter":
+        return cls(
+            routes,
+            max_error_rate=float(os.getenv("MODEL_ROUTE_MAX_ERROR_RATE", "0.5")),
+            horizon=float(os.getenv("MODEL_ROUTE_HORIZON", "60")),
+        )
+
+    def _recent(self, task: str, model: str) -> Deque[Tuple[float, float, bool]]:
+        """The model's samples for `task`, after dropping those older than the horizon."""
+        samples = self._samples.get((task, model))
+        if samples is None:
+            return deque()
+        cutoff = time.monotonic() - self.horizon
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return samples
+
+    def _p95(self, task: str, model: str) -> Optional[float]:
+        latencies = sorted(latency for _, latency, ok in self._recent(task, model) if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)]
+
+    def healthy(self, task: str, model: str) -> bool:
+        """Whether `model` currently meets the task's error and latency limits."""
+        samples = self._recent(task, model)
+        if len(samples) < self.min_samples:
+            return True
+        errors = sum(1 for _, _, ok in samples if not ok)
+        if errors / len(samples) > self.max_error_rate:
+            return False
+        p95 = self._p95(task, model)
+        return p95 is None or p95 <= self.routes[task].latency_budget
+
+    def candidates(self, task: str) -> List[str]:
+        """
+        Models to try for one call, in order.
+
+        Raises:
+            KeyError: if `task` has no route
+        """
+        route = self.routes[task]
+        stats = self.stats[task]
+        stats["calls"] += 1
+        healthy = [model for model in route.models if self.healthy(task, model)]
+        if not healthy or healthy[0] == route.primary or stats["calls"] % self.probe_every == 0:
+            return list(route.models)
+        stats["cascaded"] += 1
+        return healthy + [model for model in route.models if model not in healthy]
+
+    @contextmanager
+    def track(self, task: str, model: str) -> Iterator[None]:
+        """Record the latency and outcome of one model call made in the block."""
+        started = time.monotonic()
+        counts = self._counts.setdefault((task, model), {"calls": 0, "errors": 0})
+        counts["calls"] += 1
+        ok = failed = False
+        try:
+            yield
+            ok = True
+        except Exception:
+            failed = True
+            counts["errors"] += 1
+            raise
+        finally:
+            # A cancelled call (lost hedge, client gone) says nothing about the model
+            if ok or failed:
+                samples = self._samples.setdefault((task, model), deque(maxlen=self.window))
+                finished = time.monotonic()
+                samples.append((finished, finished - started, ok))
+
+    def failed_over(self, task: str) -> None:
+        self.stats[task]["failovers"] += 1
+
+    async def call(self, task: str, fn: Callable[[str], Awaitable[T]]) -> T:
+        """
+        Run `fn(model)` on the task's models until one succeeds.
+
+        Args:
+            task: Routing table key ("chat", "caption", "long_form", ...)
+            fn: Coroutine function making the call with the given model name
+
+        Returns:
+            The first successful result
+
+        Raises:
+            Exception: the last model's error, if every model failed
+        """
+        models = self.candidates(task)
+        for attempt, model in enumerate(models):
+            try:
+                with self.track(task, model):
+                    return await fn(model)
+            except Exception:
+                if attempt == len(models) - 1:
+                    raise
+                self.failed_over(task)
+        raise RuntimeError(f"No models routed for {task}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-task routing stats and per-model latency / error rates for /metrics."""
+        tasks = {}
+        for task, route in self.routes.items():
+            models = {}
+            for model in route.models:
+                samples = self._recent(task, model)
+                p95 = self._p95(task, model)
+                models[model] = {
+                    **self._counts.get((task, model), {"calls": 0, "errors": 0}),
+                    "error_rate": round(sum(1 for _, _, ok in samples if not ok) / len(samples), 3) if samples else 0.0,
+                    "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                    "healthy": self.healthy(task, model),
+                }
+            tasks[task] = {"latency_budget_ms": round(route.latency_budget * 1000), **self.stats[task],
+                           "models": models}
+        return tasks
@@ -2,11 +2,15 @@
 Threads API Integration Module
 Handles posting content to Threads (Instagram Threads) using the Meta Graph API.
 """
+import httpx
 import requests
 import os
 from typing import Dict, Optional, Any
 from datetime import datetime
 
+from .circuit_breaker import breakers
+from .http_client import get_session, get_async_client
+
 
 class ThreadsAPI:
     """Client for interacting with the Threads API."""
@@ -32,46 +36,82 @@ class ThreadsAPI:
         Returns:
             Dict with success status and message
         """
-        if not self.app_id or not self.app_secret:
-            return {
-                "success": False,
-                "message": "Threads API credentials not configured"
-            }
+        precheck = self._check_credentials()
+        if precheck:
+            return precheck
         
-        if not self.access_token:
+        try:
+            # Verify token by getting user info
+            response = get_session().get(
+                f"{self.base_url}/me",
+                params={"access_token": self.access_token},
+                timeout=10
+            )
+            return self._connection_result(response)
+                
+        except requests.exceptions.RequestException as e:
             return {
                 "success": False,
-                "message": "User access token required. Please authenticate with Threads."
+                "message": f"Connection error: {str(e)}"
             }
+    
+    async def acheck_connection(self) -> Dict[str, Any]:
+        """
+        Async variant of check_connection using the pooled async client.
+        
+        Returns:
+            Dict with success status and message
+        """
+        precheck = self._check_credentials()
+        if precheck:
+            return precheck
         
         try:
-            # Verify token by getting user info
-            response = requests.get(
+            response = await get_async_client().get(
                 f"{self.base_url}/me",
                 params={"access_token": self.access_token},
                 timeout=10
             )
-            
-            if response.status_code == 200:
-                user_data = response.json()
-                return {
-                    "success": True,
-                    "message": f"Connected to Threads as {user_data.get('username', 'Unknown')}",
-                    "user_id": user_data.get("id"),
-                    "username": user_data.get("username")
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": f"Threads API error: {response.json().get('error', {}).get('message', 'Unknown error')}"
-                }
+            return self._connection_result(response)
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {
                 "success": False,
                 "message": f"Connection error: {str(e)}"
             }
     
+    def _check_credentials(self) -> Optional[Dict[str, Any]]:
+        """Return an error dict if app credentials or token are missing."""
+        if not self.app_id or not self.app_secret:
+            return {
+                "success": False,
+                "message": "Threads API credentials not configured"
+            }
+        
+        if not self.access_token:
+            return {
+                "success": False,
+                "message": "User access token required. Please authenticate with Threads."
+            }
+        return None
+    
+    @staticmethod
+    def _connection_result(response) -> Dict[str, Any]:
+        """Build the check_connection result from a /me response."""
+        if response.status_code == 200:
+            user_data = response.json()
+            return {
+                "success": True,
+                "message": f"Connected to Threads as {user_data.get('username', 'Unknown')}",
+                "user_id": user_data.get("id"),
+                "username": user_data.get("username")
+            }
+        else:
+            return {
+                "success": False,
+                "message": f"Threads API error: {response.json().get('error', {}).get('message', 'Unknown error')}"
+            }
+    
     def create_post(
         self,
         text: str,
@@ -95,7 +135,13 @@ class ThreadsAPI:
                 "message": "User access token required. Please authenticate with Threads."
             }
         
+        breaker = breakers["threads"]
+        if not breaker.allow():
+            return breaker.unavailable()
+        
         try:
+            session = get_session()
+            
             # Step 1: Create media container
             user_id = self._get_user_id()
             if not user_id:
@@ -104,36 +150,20 @@ class ThreadsAPI:
                     "message": "Failed to get user ID"
                 }
             
-            container_data = {
-                "media_type": media_type,
-                "text": text,
-                "access_token": self.access_token
-            }
-            
-            if media_url and media_type != "TEXT":
-                if media_type == "IMAGE":
-                    container_data["image_url"] = media_url
-                elif media_type == "VIDEO":
-                    container_data["video_url"] = media_url
-            
-            # Create container
-            container_response = requests.post(
+            container_response = session.post(
                 f"{self.base_url}/{user_id}/threads",
-                data=container_data,
+                data=self._container_data(text, media_url, media_type),
                 timeout=30
             )
+            breaker.record(container_response.status_code)
             
             if container_response.status_code != 200:
-                error_msg = container_response.json().get("error", {}).get("message", "Unknown error")
-                return {
-                    "success": False,
-                    "message": f"Failed to create thread container: {error_msg}"
-                }
+                return self._container_error(container_response)
             
             container_id = container_response.json().get("id")
             
             # Step 2: Publish the thread
-            publish_response = requests.post(
+            publish_response = session.post(
                 f"{self.base_url}/{user_id}/threads_publish",
                 data={
                     "creation_id": container_id,
@@ -141,23 +171,85 @@ class ThreadsAPI:
                 },
                 timeout=30
             )
+            breaker.record(publish_response.status_code)
+            return self._publish_result(publish_response)
+                
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure()
+            return {
+                "success": False,
+                "message": f"Network error: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Unexpected error: {str(e)}"
+            }
+    
+    async def acreate_post(
+        self,
+        text: str,
+        media_url: Optional[str] = None,
+        media_type: str = "TEXT"
+    ) -> Dict[str, Any]:
+        """
+        Async variant of create_post using the pooled async client.
+        
+        Args:
+            text: The text content of the post
+            media_url: Optional URL to image/video
+            media_type: Type of media (TEXT, IMAGE, VIDEO)
             
-            if publish_response.status_code == 200:
-                thread_id = publish_response.json().get("id")
-                return {
-                    "success": True,
-                    "message": "Successfully posted to Threads",
-                    "thread_id": thread_id,
-                    "url": f"https://www.threads.net/t/{thread_id}"
-                }
-            else:
-                error_msg = publish_response.json().get("error", {}).get("message", "Unknown error")
+        Returns:
+            Dict with success status, post ID, and message
+        """
+        if not self.access_token:
+            return {
+                "success": False,
+                "message": "User access token required. Please authenticate with Threads."
+            }
+        
+        breaker = breakers["threads"]
+        if not breaker.allow():
+            return breaker.unavailable()
+        
+        try:
+            client = get_async_client()
+            
+            # Step 1: Create media container
+            user_id = await self._aget_user_id()
+            if not user_id:
                 return {
                     "success": False,
-                    "message": f"Failed to publish thread: {error_msg}"
+                    "message": "Failed to get user ID"
                 }
+            
+            container_response = await client.post(
+                f"{self.base_url}/{user_id}/threads",
+                data=self._container_data(text, media_url, media_type),
+                timeout=30
+            )
+            breaker.record(container_response.status_code)
+            
+            if container_response.status_code != 200:
+                return self._container_error(container_response)
+            
+            container_id = container_response.json().get("id")
+            
+            # Step 2: Publish the thread
+            publish_response = await client.post(
+                f"{self.base_url}/{user_id}/threads_publish",
+                data={
+                    "creation_id": container_id,
+                    "access_token": self.access_token
+                },
+                timeout=30
+            )
+            breaker.record(publish_response.status_code)
+            return self._publish_result(publish_response)
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
+            breaker.record_failure()
             return {
                 "success": False,
                 "message": f"Network error: {str(e)}"
@@ -168,16 +260,78 @@ class ThreadsAPI:
                 "message": f"Unexpected error: {str(e)}"
             }
     
+    def _container_data(self, text: str, media_url: Optional[str], media_type: str) -> Dict[str, Any]:
+        """Build the form data for the media container request."""
+        container_data = {
+            "media_type": media_type,
+            "text": text,
+            "access_token": self.access_token
+        }
+        
+        if media_url and media_type != "TEXT":
+            if media_type == "IMAGE":
+                container_data["image_url"] = media_url
+            elif media_type == "VIDEO":
+                container_data["video_url"] = media_url
+        return container_data
+    
+    @staticmethod
+    def _container_error(response) -> Dict[str, Any]:
+        """Build the error result for a failed container request."""
+        error_msg = response.json().get("error", {}).get("message", "Unknown error")
+        return {
+            "success": False,
+            "message": f"Failed to create thread container: {error_msg}"
+        }
+    
+    @staticmethod
+    def _publish_result(response) -> Dict[str, Any]:
+        """Build the create_post result from a threads_publish response."""
+        if response.status_code == 200:
+            thread_id = response.json().get("id")
+            return {
+                "success": True,
+                "message": "Successfully posted to Threads",
+                "thread_id": thread_id,
+                "url": f"https://www.threads.net/t/{thread_id}"
+            }
+        else:
+            error_msg = response.json().get("error", {}).get("message", "Unknown error")
+            return {
+                "success": False,
+                "message": f"Failed to publish thread: {error_msg}"
+            }
+    
     def _get_user_id(self) -> Optional[str]:
         """Get the user ID from the access token."""
         try:
-            response = requests.get(
+            response = get_session().get(
                 f"{self.base_url}/me",
                 params={"access_token": self.access_token},
                 timeout=10
             )
+            breakers["threads"].record(response.status_code)
             if response.status_code == 200:
                 return response.json().get("id")
+        except requests.exceptions.RequestException:
+            breakers["threads"].record_failure()
+        except:
+            pass
+        return None
+    
+    async def _aget_user_id(self) -> Optional[str]:
+        """Async variant of _get_user_id."""
+        try:
+            response = await get_async_client().get(
+                f"{self.base_url}/me",
+                params={"access_token": self.access_token},
+                timeout=10
+            )
+            breakers["threads"].record(response.status_code)
+            if response.status_code == 200:
+                return response.json().get("id")
+        except httpx.HTTPError:
+            breakers["threads"].record_failure()
         except:
             pass
         return None
@@ -217,3 +371,39 @@ def check_threads_connection(access_token: str) -> Dict[str, Any]:
     """
     client = ThreadsAPI(access_token=access_token)
     return client.check_connection()
+
+
+async def apublish_to_threads(
+    text: str,
+    access_token: str,
+    media_url: Optional[str] = None,
+    media_type: str = "TEXT"
+) -> Dict[str, Any]:
+    """
+    Async variant of publish_to_threads for the backend event loop.
+    
+    Args:
+        text: The text content
+        access_token: User's Threads access token
+        media_url: Optional media URL
+        media_type: TEXT, IMAGE, or VIDEO
+        
+    Returns:
+        Dict with success status and details
+    """
+    client = ThreadsAPI(access_token=access_token)
+    return await client.acreate_post(text=text, media_url=media_url, media_type=media_type)
+
+
+async def acheck_threads_connection(access_token: str) -> Dict[str, Any]:
+    """
+    Async variant of check_threads_connection.
+    
+    Args:
+        access_token: User's Threads access token
+        
+    Returns:
+        Dict with connection status
+    """
+    client = ThreadsAPI(access_token=access_token)
+    return await client.acheck_connection()
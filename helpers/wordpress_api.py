@@ -0,0 +1,138 @@
+"""
+WordPress API Integration Module
+Handles creating posts through the WordPress REST API with Application Passwords.
+"""
+import httpx
+import requests
+import os
+from typing import Dict, Optional, Any
+
+from .circuit_breaker import breakers
+from .http_client import get_session, get_async_client
+
+
+class WordPressAPI:
+    """Client for the WordPress REST API (`/wp-json/wp/v2`)."""
+
+    def __init__(self, site: str = None, username: str = None, app_password: str = None):
+        """
+        Initialize WordPress API client.
+
+        Args:
+            site: WordPress site URL (defaults to env var WP_SITE)
+            username: WordPress username (defaults to env var WP_USER)
+            app_password: Application Password (defaults to env var WP_PASSWORD)
+        """
+        self.site = (site or os.getenv("WP_SITE") or "").rstrip("/")
+        self.username = username or os.getenv("WP_USER")
+        self.app_password = app_password or os.getenv("WP_PASSWORD")
+        self.posts_url = f"{self.site}/wp-json/wp/v2/posts"
+
+    def is_configured(self) -> bool:
+        """Return True if site, username and password are all set."""
+        return bool(self.site and self.username and self.app_password)
+
+    def create_post(self, title: str, content: str, status: str = "draft") -> Dict[str, Any]:
+        """
+        Create a post on WordPress.
+
+        Args:
+            title: Post title
+            content: Post body (HTML allowed)
+            status: WordPress post status (draft, publish, ...)
+
+        Returns:
+            Dict with success status, HTTP status code, post ID and link
+        """
+        breaker = breakers["wordpress"]
+        if not breaker.allow():
+            return {**breaker.unavailable(), "status_code": None}
+
+        try:
+            response = get_session().post(
+                self.posts_url,
+                json={"title": title, "content": content, "status": status},
+                auth=(self.username, self.app_password),
+                timeout=30
+            )
+            breaker.record(response.status_code)
+            return self._post_result(response)
+
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure()
+            return {
+                "success": False,
+                "status_code": None,
+                "message": f"Network error: {str(e)}"
+            }
+
+    async def acreate_post(self, title: str, content: str, status: str = "draft") -> Dict[str, Any]:
+        """
+        Async variant of create_post using the pooled async client.
+
+        Args:
+            title: Post title
+            content: Post body (HTML allowed)
+            status: WordPress post status (draft, publish, ...)
+
+        Returns:
+            Dict with success status, HTTP status code, post ID and link
+        """
+        breaker = breakers["wordpress"]
+        if not breaker.allow():
+            return {**breaker.unavailable(), "status_code": None}
+
+        try:
+            response = await get_async_client().post(
+                self.posts_url,
+                json={"title": title, "content": content, "status": status},
+                auth=(self.username, self.app_password),
+                timeout=30
+            )
+            breaker.record(response.status_code)
+            return self._post_result(response)
+
+        except httpx.HTTPError as e:
+            breaker.record_failure()
+            return {
+                "success": False,
+                "status_code": None,
+                "message": f"Network error: {str(e)}"
+            }
+
+    @staticmethod
+    def _post_result(response) -> Dict[str, Any]:
+        """Build the create_post result from a /wp/v2/posts response."""
+        is_json = response.headers.get("content-type", "").startswith("application/json")
+        data = None
+        if is_json:
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+
+        if response.status_code in (200, 201):
+            data = data if isinstance(data, dict) else {}
+            return {
+                "success": True,
+                "status_code": response.status_code,
+                "post_id": data.get("id", ""),
+                "url": data.get("link", ""),
+                "response": data or response.text
+            }
+
+        if data is None:
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+
+        message = response.text
+        if isinstance(data, dict):
+            message = data.get("message", response.text)
+        return {
+            "success": False,
+            "status_code": response.status_code,
+            "message": message,
+            "response": data if data is not None else response.text
+        }
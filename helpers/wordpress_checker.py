@@ -1,16 +1,43 @@
-import requests
+import asyncio
 from urllib.parse import urljoin
 
+import httpx
+
+from .http_client import get_session, get_async_client
+
 def check_url(url):
     try:
-        r = requests.get(url, timeout=5, headers={"User-Agent": "Mozilla/5.0"})
+        r = get_session().get(url, timeout=5, headers={"User-Agent": "Mozilla/5.0"})
         return r
     except:
         return None
 
+async def acheck_url(url):
+    try:
+        r = await get_async_client().get(url, timeout=5, headers={"User-Agent": "Mozilla/5.0"})
+        return r
+    except (httpx.HTTPError, ValueError):
+        return None
+
 def is_wordpress(site):
     site = site.rstrip("/")
+    return _score(
+        check_url(urljoin(site, "/wp-json/")),
+        check_url(site),
+        check_url(urljoin(site, "/wp-login.php")),
+    )
+
+async def ais_wordpress(site):
+    """Async variant of is_wordpress; the three probes run concurrently."""
+    site = site.rstrip("/")
+    wp_json, home, login = await asyncio.gather(
+        acheck_url(urljoin(site, "/wp-json/")),
+        acheck_url(site),
+        acheck_url(urljoin(site, "/wp-login.php")),
+    )
+    return _score(wp_json, home, login)
 
+def _score(wp_json, home, login):
     signals = {
         "wp_json": False,
         "wp_content": False,
@@ -20,7 +47,7 @@ def is_wordpress(site):
     }
 
     # 1. Check wp-json (strongest)
-    r = check_url(urljoin(site, "/wp-json/"))
+    r = wp_json
     if r and r.status_code == 200:
         try:
             data = r.json()
@@ -30,7 +57,7 @@ def is_wordpress(site):
             pass
 
     # 2. Check wp-content reference on homepage
-    r = check_url(site)
+    r = home
     if r:
         html = r.text.lower()
         if "wp-content" in html or "wp-includes" in html:
@@ -41,7 +68,7 @@ def is_wordpress(site):
             signals["meta_generator"] = True
 
     # 3. Check login page existence
-    r = check_url(urljoin(site, "/wp-login.php"))
+    r = login
     if r and r.status_code in [200, 302]:
         signals["wp_login"] = True
 
@@ -60,12 +87,13 @@ def is_wordpress(site):
     }
 
 # Test ----------------------------------------
-sites = [
-    "https://zeatz.in",
-    "http://rohitconsultants.com",
-    "https://publicationsensemble.com/",
-    "https://luxeensemble.com"
-]
-
-for s in sites:
-    print(s, is_wordpress(s))
+if __name__ == "__main__":
+    sites = [
+        "https://zeatz.in",
+        "http://rohitconsultants.com",
+        "https://publicationsensemble.com/",
+        "https://luxeensemble.com"
+    ]
+
+    for s in sites:
+        print(s, is_wordpress(s))
@@ -12,3 +12,26 @@ def test_interactive_ghostwriter_agent_runs():
         assert resp.output_text  # at least something came back
 
     asyncio.run(_run())
+
+
+def test_publish_tool_dry_run_sends_nothing(monkeypatch):
+    from ghostwriter_agent import tools
+
+    monkeypatch.setenv("WP_SITE", "https://blog.example.com")
+    monkeypatch.setenv("WP_USER", "editor")
+    monkeypatch.setenv("WP_PASSWORD", "app-password")
+
+    async def no_post(*args, **kwargs):
+        raise AssertionError("WordPress was called during a dry run")
+
+    monkeypatch.setattr("helpers.wordpress_api.WordPressAPI.acreate_post", no_post)
+
+    async def _run():
+        token = tools.live_publish.set(False)
+        try:
+            return await tools.publish_or_schedule({"items": [{"channel": "WordPress", "content": "Hi"}]})
+        finally:
+            tools.live_publish.reset(token)
+
+    result = asyncio.run(_run())
+    assert result["items"] == [{"channel": "wordpress", "status": "dry_run"}]
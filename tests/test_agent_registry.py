@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.events import Event
+from google.genai import types
+
+from backend.services.agent_registry import AgentRegistry, AgentSpec, UnknownAgentError
+
+
+class CountingAgent(BaseAgent):
+    """Replies with the number of user messages seen in the session."""
+
+    async def _run_async_impl(self, ctx):
+        turns = sum(1 for event in ctx.session.events if event.author == "user")
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            content=types.Content(role="model", parts=[types.Part(text=f"turn {turns}")]),
+        )
+
+
+def test_registry_reuses_runner_and_continues_sessions():
+    builds = []
+
+    def factory():
+        builds.append(1)
+        return CountingAgent(name="counter")
+
+    registry = AgentRegistry({"counter": AgentSpec(factory, lambda request: "hi")}, max_sessions=2)
+
+    async def scenario():
+        first = await registry.run("counter", "hello", user_id="alice")
+        second = await registry.run("counter", "again", user_id="alice", session_id=first["session_id"])
+        other = await registry.run("counter", "hello", user_id="bob")
+        # A third session evicts the least recently used one (alice's)
+        await registry.run("counter", "hello", user_id="carol")
+        resumed = await registry.run("counter", "back", user_id="alice", session_id=first["session_id"])
+        return first, second, other, resumed
+
+    first, second, other, resumed = asyncio.run(scenario())
+
+    assert (first["result"], second["result"], other["result"]) == ("turn 1", "turn 2", "turn 1")
+    assert second["session_id"] == first["session_id"] != other["session_id"]
+    assert resumed["result"] == "turn 1"
+    assert len(builds) == 1
+    assert registry.stats["sessions_evicted"] >= 1
+
+    with pytest.raises(UnknownAgentError):
+        registry.spec("missing")
+
+
+class StateAgent(BaseAgent):
+    """Replies with the `brief` value from session state."""
+
+    async def _run_async_impl(self, ctx):
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            content=types.Content(role="model", parts=[types.Part(text=ctx.session.state.get("brief", "none"))]),
+        )
+
+
+def test_registry_sets_session_state_for_the_run():
+    registry = AgentRegistry({"state": AgentSpec(lambda: StateAgent(name="state"), lambda request: "hi")})
+
+    result = asyncio.run(registry.run("state", "go", state={"brief": '{"angle":"tips"}'}))
+
+    assert result["result"] == '{"angle":"tips"}'
@@ -0,0 +1,38 @@
+import pytest
+
+from backend.services.chat_context import ChatContext, ContextTooLarge
+
+
+def _history(count):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant",
+         "content": f"Turn {i} about our roasting process. " + "More detail here. " * 20}
+        for i in range(count)
+    ]
+
+
+def test_prompt_stays_within_budget_and_folds_older_turns():
+    context = ChatContext(budget=400, summary_tokens=120)
+    history = _history(10)
+
+    prompt, tokens = context.build_prompt("s1", "Small-batch coffee roaster", history)
+    assert tokens <= 400
+    assert "Turn 9 about" in prompt
+    assert "Summary of earlier conversation: User: Turn 0 about our roasting process." in prompt
+
+    # A much longer session costs the same
+    _, longer_tokens = context.build_prompt("s1", "Small-batch coffee roaster", _history(40))
+    assert longer_tokens <= 400
+    assert context.stats["folded_turns"] > 0
+
+
+def test_input_limits():
+    context = ChatContext(max_message_tokens=50, max_brand_tokens=20, max_history_turns=3)
+
+    with pytest.raises(ContextTooLarge):
+        context.check_message("word " * 500)
+    assert context.count_tokens(context.truncate_brand("brand " * 200)) <= 20
+
+    history = context.clamp_history(_history(10) + ["not a turn"])
+    assert len(history) == 2
+    assert all(context.count_tokens(turn["content"]) <= 50 for turn in history)
@@ -0,0 +1,51 @@
+import time
+
+from backend.services import image_generator
+from helpers.circuit_breaker import CircuitBreaker
+
+
+def test_breaker_opens_fails_fast_and_recovers_through_one_probe():
+    breaker = CircuitBreaker("nanobanana", failure_threshold=3, reset_timeout=0.2)
+
+    for status in (502, 503):
+        assert breaker.allow()
+        breaker.record(status)
+    breaker.record(404)  # the provider answered, so the count starts over
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    rejected = breaker.unavailable("error")
+    assert rejected["circuit_open"] is True and 0 < rejected["retry_after"] <= 0.2
+
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record(429)
+    assert breaker.state == "open"
+
+    time.sleep(0.25)
+    assert breaker.allow()
+    breaker.record(200)
+    assert breaker.state == "closed"
+    assert breaker.snapshot() == {"state": "closed", "consecutive_failures": 0, "retry_after_s": 0.0,
+                                  "opened": 2, "rejected": 2, "probes": 2}
+
+
+def test_open_breaker_skips_the_image_request(monkeypatch):
+    breaker = CircuitBreaker("nanobanana", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(image_generator, "_breaker", breaker)
+    monkeypatch.setenv("NANOBANANA_API_KEY", "key")
+
+    def no_network():
+        raise AssertionError("nanobanana was called while the circuit was open")
+
+    monkeypatch.setattr(image_generator, "get_session", no_network)
+
+    result = image_generator.generate_image("a lighthouse")
+    assert result["success"] is False and result["circuit_open"] is True
+    assert "nanobanana is unavailable" in result["error"]
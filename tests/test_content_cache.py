@@ -0,0 +1,25 @@
+import time
+
+from backend.services.content_cache import ContentCache, make_key
+
+
+def test_content_cache_key_normalization_and_tiers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    key = make_key("AI in Healthcare ", "Informative", "gemini-2.0-flash", "1")
+    assert key == make_key("ai  in healthcare", "informative", "gemini-2.0-flash", "1")
+    assert key != make_key("ai in healthcare", "informative", "gemini-2.0-flash", "2")
+
+    cache = ContentCache(path, max_entries=1)
+    assert cache.get(key) is None
+    cache.set(key, {"agent_text": "draft"})
+    cache.set("other", {"agent_text": "other"})  # evicts `key` from memory
+    assert cache.get(key) == {"agent_text": "draft"}
+    assert cache.get(key) == {"agent_text": "draft"}
+    assert (cache.stats["disk_hits"], cache.stats["memory_hits"], cache.stats["misses"]) == (1, 1, 1)
+
+    # A new process sees the on-disk tier; expired entries are misses
+    assert ContentCache(path).get(key) == {"agent_text": "draft"}
+    expired = ContentCache(path, ttl=0.01)
+    time.sleep(0.02)
+    assert expired.get(key) is None
+    assert expired.prune() == 2
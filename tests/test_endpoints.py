@@ -0,0 +1,333 @@
+import asyncio
+import json
+import sqlite3
+
+import google.generativeai as genai
+import pytest
+
+from backend.api import endpoints
+from backend.services.content_cache import ContentCache
+from backend.services.post_store import PostStore
+from backend.services.session_cache import SessionCache
+from backend.services.singleflight import SingleFlight
+from backend.services.stage_memo import StageMemo
+from backend.services.topic_index import TopicIndex
+from ghostwriter_agent.config import MODEL_ROUTES
+from helpers.model_limiter import ModelLimiter
+from helpers.model_router import ModelRouter
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    """Endpoints with fresh caches, so tests neither read nor write the real ones."""
+    monkeypatch.setattr(endpoints, "content_cache", ContentCache(str(tmp_path / "content_cache.db")))
+    monkeypatch.setattr(endpoints, "topic_index", TopicIndex())
+    monkeypatch.setattr(endpoints, "stage_memo", StageMemo({}))
+    monkeypatch.setattr(endpoints, "singleflight", SingleFlight())
+    monkeypatch.setattr(endpoints, "session_cache", SessionCache(tmp_path / "sessions"))
+    monkeypatch.setattr(endpoints, "model_limiter", ModelLimiter())
+    monkeypatch.setattr(endpoints, "model_router", ModelRouter(MODEL_ROUTES))
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+def fake_model(pieces, fail_after=None):
+    """GenerativeModel stand-in streaming `pieces`, raising after `fail_after` of them."""
+
+    class FakeModel:
+        calls = []
+
+        def __init__(self, name):
+            self.name = name
+
+        async def generate_content_async(self, prompt, stream=False, **kwargs):
+            FakeModel.calls.append(self.name)
+
+            async def chunks():
+                for i, piece in enumerate(pieces):
+                    if i == fail_after:
+                        raise RuntimeError("stream reset")
+                    await asyncio.sleep(0)
+                    yield Chunk(piece)
+
+            return chunks()
+
+    return FakeModel
+
+
+def read_sse(response):
+    """(event, data) pairs of a server-sent event StreamingResponse."""
+
+    async def body():
+        return "".join([part async for part in response.body_iterator])
+
+    events = []
+    for block in asyncio.run(body()).strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_full_cycle_runs_are_shared_per_user_and_survive_the_leader_leaving(isolated, monkeypatch):
+    stage_users = []
+
+    async def fake_run(agent, prompt, user_id="anonymous", state=None):
+        stage_users.append((agent, user_id))
+        await asyncio.sleep(0.02)
+        return {"result": "{}"}
+
+    monkeypatch.setattr(endpoints.agent_registry, "run", fake_run)
+
+    def cycle(user_id):
+        request = endpoints.AgentRunRequest(topic="AI in healthcare", user_id=user_id, deadline_ms=0)
+        return asyncio.create_task(endpoints.run_full_agent_cycle(request))
+
+    async def scenario():
+        leader, follower, other = cycle("alice"), cycle("alice"), cycle("bob")
+        await asyncio.sleep(0.01)
+        leader.cancel()  # alice's first tab disconnects
+        return await asyncio.gather(leader, follower, other, return_exceptions=True)
+
+    leader, follower, other = asyncio.run(scenario())
+
+    assert isinstance(leader, asyncio.CancelledError)
+    assert follower["success"] and other["success"]
+    assert follower["completed"] == other["completed"] and len(follower["completed"]) == len(endpoints.FULL_CYCLE.stages)
+    # One pipeline run per user, each charged to its own user
+    runs = {user: [agent for agent, who in stage_users if who == user] for user in ("alice", "bob")}
+    assert runs["alice"] == runs["bob"] and len(runs["alice"]) == len(endpoints.FULL_CYCLE.stages)
+
+
+def test_chat_stream_sends_tokens_then_done_with_the_saved_turns(isolated, monkeypatch):
+    monkeypatch.setattr(genai, "GenerativeModel", fake_model(["Lead with ", "your story."]))
+    request = endpoints.ChatRequest(brand_info="Handmade soap shop", message="Tagline ideas?", session_id="s-1")
+
+    events = read_sse(asyncio.run(endpoints.chat_stream_endpoint(request)))
+
+    assert [event for event, _ in events] == ["token", "token", "done"]
+    assert [data["text"] for _, data in events[:2]] == ["Lead with ", "your story."]
+    done = events[-1][1]
+    assert done["reply"] == "Lead with your story." and done["degraded"] is False
+    assert done["history_delta"] == [{"role": "user", "content": "Tagline ideas?"},
+                                     {"role": "assistant", "content": "Lead with your story."}]
+    assert endpoints.session_cache.get("s-1") == done["history_delta"]
+
+
+def test_chat_stream_reports_a_model_failure_mid_reply(isolated, monkeypatch):
+    monkeypatch.setattr(genai, "GenerativeModel", fake_model(["Lead with ", "your story."], fail_after=1))
+    request = endpoints.ChatRequest(brand_info="Handmade soap shop", message="Tagline ideas?", session_id="s-2")
+
+    events = read_sse(asyncio.run(endpoints.chat_stream_endpoint(request)))
+
+    assert [event for event, _ in events] == ["token", "error"]
+    error = events[-1][1]
+    assert error["partial_reply"] == "Lead with " and "stream reset" in error["detail"]
+    assert endpoints.session_cache.get("s-2") == []  # the cut-off reply is not saved
+
+
+def test_chat_stream_fails_over_before_the_first_token_and_frees_the_slot_early(isolated, monkeypatch):
+    primary, fallback = MODEL_ROUTES["chat"].models[:2]
+    streaming = fake_model(["Lead with ", "your story."])
+
+    class FlakyPrimary(streaming):
+        async def generate_content_async(self, prompt, stream=False, **kwargs):
+            if self.name == primary:
+                raise RuntimeError("503 unavailable")
+            return await super().generate_content_async(prompt, stream=stream, **kwargs)
+
+    monkeypatch.setattr(genai, "GenerativeModel", FlakyPrimary)
+    request = endpoints.ChatRequest(brand_info="Handmade soap shop", message="Tagline ideas?", session_id="s-3")
+
+    async def scenario():
+        response = await endpoints.chat_stream_endpoint(request)
+        first = await response.body_iterator.__anext__()
+        await asyncio.sleep(0.05)  # a slow client: the model has finished, the client has not read it all
+        in_flight = endpoints.model_limiter.snapshot()["in_flight"]
+        rest = [part async for part in response.body_iterator]
+        return first, in_flight, "".join(rest)
+
+    first, in_flight, rest = asyncio.run(scenario())
+
+    assert first.startswith("event: token") and "Lead with " in first
+    assert in_flight == 0
+    assert '"reply": "Lead with your story."' in rest
+    assert FlakyPrimary.calls == [fallback]
+    assert endpoints.model_router.snapshot()["chat"]["failovers"] == 1
+
+
+class ContentModel:
+    """GenerativeModel stand-in: streams the master draft, answers sections as JSON."""
+
+    sections = {
+        "body": {"body": "AI is changing how clinics work."},
+        "text": {"text": "Short Facebook post.", "hashtags": ["ai"]},
+        "html": {"title": "AI in Healthcare", "html": "<p>Long article.</p>"},
+        "caption": {"caption": "Catchy caption.", "hashtags": ["ai", "health"]},
+    }
+
+    def __init__(self, name):
+        self.name = name
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False, **kwargs):
+        if stream:
+            async def chunks():
+                for piece in ("AI is changing ", "how clinics work."):
+                    await asyncio.sleep(0.01)
+                    yield Chunk(piece)
+
+            return chunks()
+        fields = generation_config["response_schema"]["properties"]
+        field = next(name for name in self.sections if name in fields)
+        await asyncio.sleep(0.005 if field == "text" else 0.03)
+        return Chunk(json.dumps(self.sections[field]))
+
+
+def test_content_stream_sends_each_platform_once_then_the_summary(isolated, monkeypatch):
+    monkeypatch.setattr(genai, "GenerativeModel", ContentModel)
+    request = endpoints.ContentGenerationRequest(topic="AI in healthcare", tone="Friendly")
+
+    async def body():
+        response = await endpoints.generate_content_stream_endpoint(request)
+        return [json.loads(line) async for line in _lines(response.body_iterator)]
+
+    records = asyncio.run(body())
+
+    outputs = [record for record in records if record["type"] == "output"]
+    assert sorted(record["platform"] for record in outputs) == sorted(endpoints.CONTENT_PLATFORMS)
+    assert records[-1]["type"] == "summary" and records[-1]["cached"] is False
+    assert {"delta"} <= {record["type"] for record in records}
+    # Sections arrive as they finish, interleaved with the master draft
+    first_output = next(i for i, record in enumerate(records) if record["type"] == "output")
+    last_delta = max(i for i, record in enumerate(records) if record["type"] == "delta")
+    assert records[first_output]["platform"] == "facebook" and first_output < last_delta
+
+    summary = records[-1]["outputs"]
+    assert summary == {record["platform"]: record["content"] for record in outputs}
+    assert "AI is changing how clinics work." in summary["master"]
+    assert summary["wordpress"] == "<h1>AI in Healthcare</h1>\n\n<p>Long article.</p>"
+
+    # The finished stream is cached for the next identical request
+    _, cached = endpoints._cached_content_outputs(request)
+    assert cached == summary
+
+
+def test_content_stream_master_draft_fails_over_before_the_first_delta(isolated, monkeypatch):
+    primary = MODEL_ROUTES[endpoints.PLATFORM_SPECS["master"].task].primary
+    streamed = []
+
+    class FlakyPrimary(ContentModel):
+        async def generate_content_async(self, prompt, generation_config=None, stream=False, **kwargs):
+            if stream:
+                streamed.append(self.name)
+                if self.name == primary:
+                    raise RuntimeError("503 unavailable")
+            return await super().generate_content_async(prompt, generation_config, stream, **kwargs)
+
+    monkeypatch.setattr(genai, "GenerativeModel", FlakyPrimary)
+    request = endpoints.ContentGenerationRequest(topic="AI in healthcare", tone="Friendly")
+
+    async def body():
+        response = await endpoints.generate_content_stream_endpoint(request)
+        return [json.loads(line) async for line in _lines(response.body_iterator)]
+
+    records = asyncio.run(body())
+
+    assert streamed[0] == primary and len(streamed) == 2
+    assert "".join(record["text"] for record in records if record["type"] == "delta") == "AI is changing how clinics work."
+    assert records[-1]["degraded"] is False
+    assert endpoints.model_limiter.snapshot()["in_flight"] == 0
+    assert endpoints._cached_content_outputs(request)[1] is None  # fallback output is not cached
+
+
+def test_content_from_a_fallback_model_is_not_cached(isolated, monkeypatch):
+    caption_primary = MODEL_ROUTES["caption"].primary
+
+    class FlakyCaptions(ContentModel):
+        async def generate_content_async(self, prompt, generation_config=None, stream=False, **kwargs):
+            if self.name == caption_primary and "caption" in generation_config["response_schema"]["properties"]:
+                raise RuntimeError("503 unavailable")
+            return await super().generate_content_async(prompt, generation_config, stream, **kwargs)
+
+    monkeypatch.setattr(genai, "GenerativeModel", FlakyCaptions)
+    request = endpoints.ContentGenerationRequest(topic="AI in healthcare", tone="Friendly")
+
+    result = asyncio.run(endpoints.generate_content_endpoint(request))
+
+    assert result["degraded"] is False and "Catchy caption." in result["outputs"]["instagram"]
+    assert endpoints._cached_content_outputs(request)[1] is None
+
+    monkeypatch.setattr(genai, "GenerativeModel", ContentModel)
+    asyncio.run(endpoints.generate_content_endpoint(request))
+    assert endpoints._cached_content_outputs(request)[1] is not None
+
+
+async def _lines(chunks):
+    async for chunk in chunks:
+        for line in chunk.splitlines():
+            if line:
+                yield line
+
+
+def test_overloaded_model_sheds_content_and_chat_to_templates(isolated, monkeypatch):
+    limiter = ModelLimiter(initial_limit=1, max_limit=1, shed_queue=1)
+    monkeypatch.setattr(endpoints, "model_limiter", limiter)
+
+    class NoModel:
+        def __init__(self, name):
+            raise AssertionError("the model was called while overloaded")
+
+    monkeypatch.setattr(genai, "GenerativeModel", NoModel)
+    release = asyncio.Event()
+
+    async def busy_call():
+        async with limiter.slot("generate-content", key="batch"):
+            await release.wait()
+
+    async def scenario():
+        # One call holds the only slot and one waits behind it
+        busy = [asyncio.create_task(busy_call()) for _ in range(2)]
+        await asyncio.sleep(0)
+        content = await endpoints.generate_content_endpoint(
+            endpoints.ContentGenerationRequest(topic="AI in healthcare"))
+        chat = await endpoints.chat_endpoint(
+            endpoints.ChatRequest(brand_info="Handmade soap shop", message="Tagline ideas?"))
+        release.set()
+        await asyncio.gather(*busy)
+        return content, chat
+
+    content, chat = asyncio.run(scenario())
+
+    assert content["degraded"] is True and content["cached"] is False
+    assert content["outputs"] == endpoints._fallback_outputs("AI in healthcare", "Informative and Professional")
+    assert chat.degraded is True and chat.reply
+    assert limiter.snapshot()["shed"] == 2
+
+
+def test_scheduled_post_endpoints_wait_for_the_write_lock_off_the_event_loop(tmp_path, monkeypatch):
+    store = PostStore(str(tmp_path / "posts.db"))
+    store.list_posts("alice")  # create the schema
+    monkeypatch.setattr(endpoints, "post_store", store)
+    request = endpoints.ScheduledPostRequest(user_id="alice", platform="Threads", content="Hello",
+                                             date_time="2030-01-01T09:00:00")
+
+    async def scenario():
+        # Another worker holds the database write lock for 0.3s
+        holder = sqlite3.connect(store.path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        asyncio.get_running_loop().call_later(0.3, holder.execute, "COMMIT")
+        save = asyncio.create_task(endpoints.save_scheduled_post(request))
+        ticks = 0
+        while not save.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        holder.close()
+        return await save, ticks
+
+    saved, ticks = asyncio.run(scenario())
+
+    assert ticks >= 15  # the loop kept running while the save waited
+    assert saved["success"] and store.get_post("alice", saved["post"]["id"])["content"] == "Hello"
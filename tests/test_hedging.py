@@ -0,0 +1,92 @@
+import asyncio
+
+from backend.services.hedging import Hedger
+
+
+def _warm(hedger, route, latency, samples=20):
+    for _ in range(samples):
+        hedger._record(route, latency)
+
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    hedger = Hedger(enabled=True, budget=1.0)
+    _warm(hedger, "chat", 0.01)
+    attempts = []
+    cancelled = []
+
+    async def call():
+        attempt = len(attempts)
+        attempts.append(attempt)
+        try:
+            # The first attempt hangs; the hedge answers quickly
+            await asyncio.sleep(5 if attempt == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return f"reply-{attempt}"
+
+    assert asyncio.run(hedger.run("chat", call)) == "reply-1"
+    assert cancelled == [0]
+    assert hedger.stats["chat"] == {"calls": 1, "hedged": 1, "hedge_wins": 1, "budget_denied": 0}
+
+
+def test_failed_winner_falls_back_to_the_other_attempt():
+    hedger = Hedger(enabled=True, budget=1.0)
+    _warm(hedger, "chat", 0.01)
+    attempts = []
+
+    async def call():
+        attempts.append(None)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.05)
+            return "slow but fine"
+        raise RuntimeError("hedge failed")
+
+    assert asyncio.run(hedger.run("chat", call)) == "slow but fine"
+    assert hedger.stats["chat"]["hedge_wins"] == 0
+
+
+def test_budget_and_opt_in_limit_hedges():
+    async def call():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def burst(hedger):
+        return await asyncio.gather(*(hedger.run("generate-content:master", call) for _ in range(10)))
+
+    budgeted = Hedger(enabled=True, budget=0.25)
+    _warm(budgeted, "generate-content:master", 0.001)
+    assert asyncio.run(burst(budgeted)) == ["ok"] * 10
+    stats = budgeted.stats["generate-content:master"]
+    # 10 calls x 0.25 tokens buys two hedges
+    assert stats["hedged"] == 2 and stats["budget_denied"] == 8
+
+    disabled = Hedger(enabled=False, budget=1.0)
+    _warm(disabled, "generate-content:master", 0.001)
+    asyncio.run(burst(disabled))
+    assert disabled.stats["generate-content:master"]["hedged"] == 0
+
+
+def test_latency_excludes_slot_wait_and_keeps_the_cancelled_primary():
+    hedger = Hedger(enabled=True, budget=1.0)
+    _warm(hedger, "chat", 0.02)
+    attempts = []
+
+    async def call():
+        attempt = len(attempts)
+        attempts.append(attempt)
+        if attempt == 0:
+            hedger.started()
+            await asyncio.sleep(5)  # the primary hangs in the model
+        await asyncio.sleep(0.05)  # the hedge waits for a model slot
+        hedger.started()
+        await asyncio.sleep(0.01)
+        return "reply"
+
+    asyncio.run(hedger.run("chat", call))
+
+    latencies = list(hedger._latencies["chat"])[20:]
+    # The hedge's 10ms model call, then the primary's time until it lost (at least the hedge delay plus the hedge)
+    assert len(latencies) == 2
+    assert latencies[0] < 0.04
+    assert latencies[1] >= 0.08
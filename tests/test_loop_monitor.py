@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from backend.services.loop_monitor import LoopMonitor, LoopMonitorMiddleware
+
+
+def test_blocking_route_is_recorded_with_its_call_site():
+    monitor = LoopMonitor(enabled=True, threshold_ms=50, interval_ms=10)
+    app = FastAPI()
+    app.add_middleware(LoopMonitorMiddleware, monitor=monitor)
+
+    @app.get("/posts/{post_id}")
+    async def blocking_handler(post_id: str):
+        time.sleep(0.2)  # a sync call on the event loop
+        return {"id": post_id}
+
+    async def scenario():
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/posts/42")
+            await asyncio.sleep(0.05)  # let the heartbeat record the stall
+        finally:
+            await monitor.stop()
+        return response
+
+    assert asyncio.run(scenario()).json() == {"id": "42"}
+
+    snapshot = monitor.snapshot()
+    assert snapshot["stall_count"] == 1
+    stall = snapshot["recent_stalls"][0]
+    assert stall["route"] == "GET /posts/{post_id}"
+    assert stall["call_site"].startswith("tests/test_loop_monitor.py:")
+    assert stall["call_site"].endswith("in blocking_handler")
+    assert stall["lag_ms"] >= 150
+
+    route = snapshot["routes"]["GET /posts/{post_id}"]
+    assert route["count"] == 1 and route["buckets"]["le_250"] + route["buckets"]["le_500"] == 1
+    loop_lag = snapshot["loop_lag"]
+    assert loop_lag["count"] > 1 and sum(loop_lag["buckets"].values()) == loop_lag["count"]
+    assert loop_lag["buckets"]["le_250"] + loop_lag["buckets"]["le_500"] >= 1
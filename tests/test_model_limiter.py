@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from helpers.model_limiter import ModelBusy, ModelLimiter
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def test_queued_calls_are_served_round_robin_per_key():
+    limiter = ModelLimiter(initial_limit=1, max_limit=1)
+    order = []
+
+    async def call(key, name):
+        async with limiter.slot("chat", key=key):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        batch = [asyncio.create_task(call("batch", f"batch-{i}")) for i in range(5)]
+        await asyncio.sleep(0)
+        chat = asyncio.create_task(call("session-1", "chat"))
+        await asyncio.gather(*batch, chat)
+
+    asyncio.run(scenario())
+
+    # The chat call waits behind one batch call, not all five
+    assert order.index("chat") <= 2
+    snapshot = limiter.snapshot()
+    assert snapshot["queued"] == 0 and snapshot["in_flight"] == 0
+    assert snapshot["waited"] == 5
+
+
+def test_limit_adapts_to_rate_limits_and_saturation():
+    # High tolerance: scheduler jitter on 1ms calls must not count as slow calls
+    limiter = ModelLimiter(initial_limit=8, max_limit=16, latency_tolerance=1000)
+
+    async def failing():
+        async with limiter.slot("chat", key="a"):
+            await asyncio.sleep(0.01)
+            raise RateLimited("429 RESOURCE_EXHAUSTED")
+
+    async def ok():
+        async with limiter.slot("chat", key="a"):
+            await asyncio.sleep(0.001)
+
+    async def scenario():
+        # Eight concurrent 429s from the same moment halve the limit once
+        results = await asyncio.gather(*(failing() for _ in range(8)), return_exceptions=True)
+        assert all(isinstance(r, RateLimited) for r in results)
+        assert limiter.limit == 4
+        await asyncio.gather(*(ok() for _ in range(20)))
+
+    asyncio.run(scenario())
+
+    assert limiter.stats["rate_limited"] == 8
+    assert limiter.stats["decreases"] == 1
+    assert limiter.limit > 4
+
+
+def test_wait_beyond_queue_timeout_raises_busy():
+    limiter = ModelLimiter(initial_limit=1, max_limit=1, queue_timeout=0.02)
+
+    async def scenario():
+        async with limiter.slot("chat", key="a"):
+            with pytest.raises(ModelBusy):
+                async with limiter.slot("chat", key="b"):
+                    pass
+        # The abandoned waiter left nothing behind
+        async with limiter.slot("chat", key="b"):
+            pass
+
+    asyncio.run(scenario())
+    assert limiter.snapshot()["queued"] == 0
+    assert limiter.stats["timeouts"] == 1
+
+
+def test_overloaded_once_queue_depth_or_wait_passes_threshold():
+    limiter = ModelLimiter(initial_limit=1, max_limit=1, shed_queue=3, shed_wait=0.05)
+
+    async def hold(seconds):
+        async with limiter.slot("chat", key="a"):
+            await asyncio.sleep(seconds)
+
+    async def scenario():
+        assert not limiter.overloaded()
+        running = asyncio.create_task(hold(0.2))
+        await asyncio.sleep(0)
+        waiting = [asyncio.create_task(hold(0)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        # Two queued, waiting only briefly
+        assert not limiter.overloaded()
+        await asyncio.sleep(0.05)
+        assert limiter.overloaded()  # oldest wait passed shed_wait
+        waiting.append(asyncio.create_task(hold(0)))
+        await asyncio.sleep(0)
+        assert limiter.overloaded()  # and the queue reached shed_queue
+        await asyncio.gather(running, *waiting)
+        assert not limiter.overloaded()
+
+    asyncio.run(scenario())
+    assert limiter.stats["shed"] == 2
+    assert limiter.snapshot()["oldest_wait_ms"] == 0
+
+
+def test_waiter_cancelled_in_the_same_tick_as_a_release_does_not_leak_a_slot():
+    limiter = ModelLimiter(initial_limit=1, max_limit=1)
+    holder_may_exit = asyncio.Event()
+
+    async def holder():
+        async with limiter.slot("chat", key="a"):
+            await holder_may_exit.wait()
+
+    async def waiter():
+        async with limiter.slot("chat", key="b"):
+            pass
+
+    async def scenario():
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        assert limiter.snapshot()["queued"] == 1
+        # The waiter is cancelled in the same tick as the holder's release
+        queued.cancel()
+        holder_may_exit.set()
+        return await asyncio.gather(first, queued, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert results[0] is None and isinstance(results[1], asyncio.CancelledError)
+    snapshot = limiter.snapshot()
+    assert snapshot["in_flight"] == 0 and snapshot["queued"] == 0
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from helpers.model_router import ModelRouter, Route, parse_routes
+
+ROUTES = {"caption": Route(("flash", "flash-lite"), latency_budget=0.05)}
+
+
+def test_error_fails_over_to_next_tier():
+    router = ModelRouter(ROUTES)
+    calls = []
+
+    async def attempt(model):
+        calls.append(model)
+        if model == "flash":
+            raise RuntimeError("503 unavailable")
+        return f"from {model}"
+
+    assert asyncio.run(router.call("caption", attempt)) == "from flash-lite"
+    assert calls == ["flash", "flash-lite"]
+    snapshot = router.snapshot()["caption"]
+    assert snapshot["failovers"] == 1
+    assert snapshot["models"]["flash"]["errors"] == 1
+
+
+def test_slow_primary_cascades_with_periodic_probe():
+    router = ModelRouter(ROUTES, min_samples=3, probe_every=5)
+    delays = {"flash": 0.08, "flash-lite": 0.0}
+    used = []
+
+    async def attempt(model):
+        used.append(model)
+        await asyncio.sleep(delays[model])
+        return model
+
+    async def scenario():
+        for _ in range(10):
+            await router.call("caption", attempt)
+
+    asyncio.run(scenario())
+
+    # Three slow samples mark the primary unhealthy; only probes (calls 5 and 10) go back to it
+    assert used == ["flash"] * 3 + ["flash-lite", "flash", "flash-lite", "flash-lite", "flash-lite", "flash-lite", "flash"]
+    snapshot = router.snapshot()["caption"]
+    assert snapshot["cascaded"] == 5
+    assert snapshot["models"]["flash"]["healthy"] is False
+
+
+def test_primary_recovers_once_outage_samples_age_out():
+    router = ModelRouter(ROUTES, min_samples=3, probe_every=100, horizon=0.1)
+    outage = True
+    used = []
+
+    async def attempt(model):
+        used.append(model)
+        if model == "flash" and outage:
+            raise RuntimeError("503 unavailable")
+        return model
+
+    async def scenario():
+        nonlocal outage
+        for _ in range(5):
+            await router.call("caption", attempt)
+        outage = False
+        await router.call("caption", attempt)
+        time.sleep(0.15)  # no calls reach the primary while it is cascaded
+        await router.call("caption", attempt)
+
+    asyncio.run(scenario())
+
+    # Three failures cascade away from the primary; after the horizon it is tried first again
+    assert used[-2:] == ["flash-lite", "flash"]
+    assert router.snapshot()["caption"]["models"]["flash"]["healthy"] is True
+
+
+def test_parse_routes_overrides_models_only():
+    routes = parse_routes("caption=flash-lite>flash", ROUTES)
+    assert routes["caption"] == Route(("flash-lite", "flash"), latency_budget=0.05)
+    assert parse_routes("", ROUTES) == ROUTES
+    with pytest.raises(ValueError):
+        parse_routes("unknown=flash", ROUTES)
@@ -0,0 +1,74 @@
+"""Stress tests: concurrent worker processes must not lose updates."""
+import multiprocessing
+import time
+
+from backend.services.file_store import read_json, update_json
+from backend.services.post_store import PostClaimedError, PostStore
+
+WORKERS = 4
+ROUNDS = 50
+
+
+def _increment_counter(path, rounds):
+    for _ in range(rounds):
+        update_json(path, lambda data: {"count": data["count"] + 1}, default={"count": 0})
+
+
+def _write_posts(db_path, counter, rounds):
+    store = PostStore(db_path)
+    with counter.get_lock():
+        worker = counter.value
+        counter.value += 1
+    for i in range(rounds):
+        store.add_post("alice", {"id": f"post-{worker}-{i}", "platform": "Threads", "status": "Scheduled"})
+        store.update_post("alice", "shared", {f"worker{worker}_{i}": True})
+
+
+def _try_claim(db_path, results):
+    store = PostStore(db_path)
+    try:
+        with store.claim("alice", "shared"):
+            time.sleep(0.5)
+        results.put("claimed")
+    except PostClaimedError:
+        results.put("busy")
+
+
+def _run(target, *args):
+    processes = [multiprocessing.Process(target=target, args=args) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+
+def test_update_json_has_no_lost_updates(tmp_path):
+    path = tmp_path / "sessions" / "counter.json"
+    _run(_increment_counter, path, ROUNDS)
+    assert read_json(path) == {"count": WORKERS * ROUNDS}
+
+
+def test_post_store_has_no_lost_updates(tmp_path):
+    db_path = str(tmp_path / "posts.db")
+    store = PostStore(db_path)
+    store.add_post("alice", {"id": "shared", "platform": "Threads", "status": "Scheduled"})
+
+    _run(_write_posts, db_path, multiprocessing.Value("i", 0), ROUNDS)
+
+    assert len(store.list_posts("alice")) == WORKERS * ROUNDS + 1
+    shared = store.get_post("alice", "shared")
+    assert sum(key.startswith("worker") for key in shared) == WORKERS * ROUNDS
+
+
+def test_post_claim_is_exclusive_across_processes(tmp_path):
+    db_path = str(tmp_path / "posts.db")
+    store = PostStore(db_path)
+    store.add_post("alice", {"id": "shared", "platform": "Threads", "status": "Scheduled"})
+
+    results = multiprocessing.Queue()
+    _run(_try_claim, db_path, results)
+    outcomes = sorted(results.get(timeout=5) for _ in range(WORKERS))
+
+    assert outcomes == ["busy"] * (WORKERS - 1) + ["claimed"]
+    assert store.get_post("alice", "shared")["status"] == "Scheduled"
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from ghostwriter_agent.pipeline import FULL_CYCLE, extract_json
+
+REPLIES = {
+    "trend-watcher": '{"selected_trends": ["AI careers"], "rationale": "' + "long reasoning " * 50 + '"}',
+    "content-strategist": '```json\n{"chosen_trend": "AI careers", "brief": {"Instagram": {"angle": "tips"}}}\n```',
+    "content-creator": json.dumps({"assets": {"Instagram": {
+        "video_script": "script " * 100, "caption": "Hi", "hashtags": ["#ai"], "image_prompt": "laptop"}}}),
+    "image-generator": '{"refined_prompt": "laptop at dawn", "style": "vibrant", "suggestions": ["a", "b"]}',
+    "publisher": 'Scheduled. {"status": "success", "items": [{"channel": "instagram", "status": "scheduled", "mock_url": "x"}]}',
+}
+
+
+def test_full_cycle_runs_independent_stages_concurrently():
+    calls = []
+
+    async def run_agent(agent, prompt, state):
+        calls.append((agent, state))
+        await asyncio.sleep(0.05)
+        if agent == "evaluator":
+            raise RuntimeError("analytics down")
+        return REPLIES[agent]
+
+    result = asyncio.run(FULL_CYCLE.run({"topic": "AI careers", "notes": ""}, run_agent))
+
+    assert [agent for agent, _ in calls[:2]] == ["trend-watcher", "content-strategist"]
+    timings = result["timings"]
+    # content_creator and image_generator start together
+    assert abs(timings["content_creator"]["start_ms"] - timings["image_generator"]["start_ms"]) < 30
+    # Five sequential rounds of 50ms, not six
+    assert result["total_ms"] < 6 * 50
+    assert timings["evaluator"]["status"] == "failed"
+    assert result["errors"] == {"evaluator": "analytics down"}
+    assert result["outputs"]["publisher"] == REPLIES["publisher"]
+
+
+def test_stages_hand_off_compact_state():
+    received = {}
+
+    async def run_agent(agent, prompt, state):
+        received[agent] = state
+        return REPLIES.get(agent, "done")
+
+    result = asyncio.run(FULL_CYCLE.run({"topic": "AI careers", "notes": ""}, run_agent))
+
+    assert received["trend-watcher"] == {}
+    assert json.loads(received["content-strategist"]["trends"]) == {"selected_trends": ["AI careers"]}
+    assert set(received["publisher"]) == {"assets", "image"}
+    assert json.loads(received["publisher"]["assets"]) == {
+        "Instagram": {"caption": "Hi", "hashtags": ["#ai"], "image_prompt": "laptop"}}
+    assert json.loads(received["evaluator"]["publish_result"]) == [{"channel": "instagram", "status": "scheduled"}]
+    assert result["state"]["image"] == {"refined_prompt": "laptop at dawn", "style": "vibrant"}
+    tokens = result["tokens"]
+    assert tokens["handoff"] < tokens["full_text"]
+    assert tokens["by_stage"]["publisher"]["handoff"] < tokens["by_stage"]["publisher"]["full_text"]
+
+
+def test_failed_stage_skips_dependents():
+    async def run_agent(agent, prompt, state):
+        if agent == "image-generator":
+            raise RuntimeError("quota")
+        return "{}"
+
+    result = asyncio.run(FULL_CYCLE.run({"topic": "AI", "notes": ""}, run_agent))
+
+    assert result["timings"]["content_creator"]["status"] == "ok"
+    assert result["timings"]["publisher"] == {"status": "skipped"}
+    assert result["timings"]["evaluator"] == {"status": "skipped"}
+
+
+def test_deadline_cuts_slow_stages_and_keeps_going():
+    # Weights 1,1,2,(1),1,1 over a 0.6s deadline: trend_watcher must finish by 0.1s
+    assert round(FULL_CYCLE.finish_by(0.6)["trend_watcher"], 3) == 0.1
+    assert FULL_CYCLE.finish_by(0.6)["image_generator"] == FULL_CYCLE.finish_by(0.6)["content_creator"]
+
+    async def run_agent(agent, prompt, state):
+        await asyncio.sleep(5 if agent in ("trend-watcher", "publisher") else 0.01)
+        return REPLIES.get(agent, "{}")
+
+    result = asyncio.run(FULL_CYCLE.run({"topic": "AI careers", "notes": ""}, run_agent, deadline=0.6))
+
+    timings = result["timings"]
+    assert result["total_ms"] < 700
+    # The trend stage was replaced by its default, so the cycle carried on
+    assert timings["trend_watcher"]["status"] == "timeout"
+    assert timings["trend_watcher"]["fallback"] == "default"
+    assert result["state"]["trends"] == {"selected_trends": ["AI careers"]}
+    # The publisher has no stand-in, so evaluation is skipped
+    assert timings["publisher"]["status"] == "timeout" and "fallback" not in timings["publisher"]
+    assert timings["evaluator"] == {"status": "skipped"}
+    assert result["completed"] == ["content_strategist", "content_creator", "image_generator"]
+    assert result["partial"] is True
+
+
+def test_extract_json_reads_fenced_replies():
+    assert extract_json('Here:\n```json\n{"assets": {"Instagram": {}}}\n```') == {"assets": {"Instagram": {}}}
+    assert extract_json("no json here") is None
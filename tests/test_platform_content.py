@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from backend.services.platform_content import (
+    PLATFORM_SPECS,
+    clip_html,
+    format_section,
+    generation_config,
+    parse_section,
+)
+
+
+def test_sections_are_parsed_and_kept_within_platform_limits():
+    reply = json.dumps({"caption": "word " * 600, "hashtags": ["#ai", "career growth"] + ["x"] * 20})
+
+    output = format_section("instagram", "AI careers", "Fun", parse_section("instagram", reply))
+
+    assert len(output) <= PLATFORM_SPECS["instagram"].max_chars
+    assert output.startswith("🔥 AI careers!\n\n")
+    assert output.endswith("#ai #careergrowth #x #x #x #x #x #x #x #x")
+    assert "…" in output
+
+
+def test_truncated_reply_is_salvaged():
+    # max_output_tokens cut the JSON off mid-string
+    reply = '{"text": "Big news \\u00e9 for \\"AI\\" career'
+
+    assert parse_section("facebook", reply) == {"text": 'Big news é for "AI" career'}
+    with pytest.raises(ValueError):
+        parse_section("facebook", '{"hashtags": []}')
+
+
+def test_generation_config_caps_output_per_platform():
+    config = generation_config("instagram")
+    assert config["max_output_tokens"] < generation_config("wordpress")["max_output_tokens"]
+    assert config["response_mime_type"] == "application/json"
+    assert "response_schema" not in generation_config("master", structured=False)
+
+
+def test_truncated_wordpress_reply_ends_on_a_closed_block():
+    # The token cap cut the reply inside the second list item
+    reply = '{"title": "AI at work", "html": "<p>Intro.</p><h2>Tips</h2><ul><li>One</li><li>Tw'
+
+    output = format_section("wordpress", "AI", "Fun", parse_section("wordpress", reply))
+
+    assert output == "<h1>AI</h1>\n\n<p>Intro.</p><h2>Tips</h2>"  # salvage keeps the body only
+    long_html = "<p>" + "word " * 100 + "</p>" + "<ul><li>" + "item " * 2000 + "</li></ul>"
+    assert clip_html(long_html, 6000) == "<p>" + "word " * 100 + "</p>"
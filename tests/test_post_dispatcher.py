@@ -0,0 +1,129 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from backend.services import post_dispatcher as dispatcher_module
+from backend.services.post_dispatcher import PostDispatcher
+from backend.services.post_store import PostStore
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def test_dispatcher_publishes_due_posts_with_bounded_concurrency(tmp_path, monkeypatch):
+    store = PostStore(str(tmp_path / "posts.db"))
+    published = []
+    active = {"now": 0, "max": 0}
+
+    async def fake_publish(user_id, post_id, require_status=None, store=None, **credentials):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.05)
+        active["now"] -= 1
+        published.append((post_id, credentials.get("access_token"), time.time()))
+        store.update_post(user_id, post_id, {"status": "Published"})
+
+    monkeypatch.setattr(dispatcher_module, "publish_post", fake_publish)
+
+    async def scenario():
+        now = time.time()
+        for i in range(6):
+            store.add_post("alice", {"id": f"due-{i}", "platform": "threads",
+                                     "dateTime": _iso(now - 1), "status": "Scheduled"},
+                           {"access_token": "token"})
+        store.add_post("bob", {"id": "stale", "platform": "threads",
+                               "dateTime": _iso(now - 3 * 86400), "status": "Scheduled"})
+        store.add_post("bob", {"id": "later", "platform": "threads",
+                               "dateTime": _iso(now + 7200), "status": "Scheduled"})
+
+        dispatcher = PostDispatcher(store, concurrency=2, horizon=3600)
+        dispatcher.start()
+        await asyncio.sleep(0.1)
+
+        soon = {"id": "soon", "platform": "threads", "dateTime": _iso(time.time() + 0.3), "status": "Scheduled"}
+        store.add_post("bob", soon, {"access_token": "token"})
+        dispatcher.schedule("bob", soon)
+        await asyncio.sleep(0.6)
+        await dispatcher.stop()
+        return dispatcher, now
+
+    dispatcher, start = asyncio.run(scenario())
+
+    ids = [post_id for post_id, _, _ in published]
+    assert sorted(ids) == sorted([f"due-{i}" for i in range(6)] + ["soon"])
+    assert active["max"] == 2
+    assert all(token == "token" for post_id, token, _ in published if post_id.startswith("due-"))
+    soon_at = next(ts for post_id, _, ts in published if post_id == "soon")
+    assert soon_at >= start + 0.3
+    assert store.get_post("bob", "later")["status"] == "Scheduled"
+    assert store.get_post("bob", "stale")["status"] == "Scheduled"
+    assert dispatcher.snapshot()["published"] == 7
+
+
+def test_dispatcher_leaves_posts_without_meta_credentials_scheduled(tmp_path, monkeypatch):
+    store = PostStore(str(tmp_path / "posts.db"))
+    published = []
+
+    async def fake_publish(user_id, post_id, require_status=None, store=None, **credentials):
+        published.append(post_id)
+        store.update_post(user_id, post_id, {"status": "Published"})
+
+    monkeypatch.setattr(dispatcher_module, "publish_post", fake_publish)
+
+    async def scenario():
+        due = _iso(time.time() - 1)
+        store.add_post("alice", {"id": "no-token", "platform": "Threads", "dateTime": due, "status": "Scheduled"})
+        store.add_post("alice", {"id": "wordpress", "platform": "WordPress", "dateTime": due, "status": "Scheduled"})
+        dispatcher = PostDispatcher(store, max_attempts=1)
+        dispatcher.start()
+        await asyncio.sleep(0.1)
+        await dispatcher._refill(time.time())  # a later refill does not queue it again
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(scenario())
+
+    assert published == ["wordpress"]
+    assert store.get_post("alice", "no-token")["status"] == "Scheduled"
+    snapshot = dispatcher.snapshot()
+    assert (snapshot["needs_auth"], snapshot["failed"], snapshot["queued"]) == (1, 0, 0)
+
+
+def test_dispatcher_pages_past_a_full_batch_of_posts_without_credentials(tmp_path, monkeypatch):
+    store = PostStore(str(tmp_path / "posts.db"))
+    published = []
+    queries = []
+
+    async def fake_publish(user_id, post_id, require_status=None, store=None, **credentials):
+        published.append(post_id)
+        store.update_post(user_id, post_id, {"status": "Published"})
+
+    monkeypatch.setattr(dispatcher_module, "publish_post", fake_publish)
+    due_post_keys = store.due_post_keys
+
+    def counted(*args):
+        queries.append(args)
+        return due_post_keys(*args)
+
+    monkeypatch.setattr(store, "due_post_keys", counted)
+
+    async def scenario():
+        now = time.time()
+        for i in range(12):  # more than a batch, all due before the post that can be published
+            store.add_post("alice", {"id": f"no-token-{i:02d}", "platform": "Threads",
+                                     "dateTime": _iso(now - 60 + i), "status": "Scheduled"})
+        store.add_post("bob", {"id": "wordpress", "platform": "WordPress",
+                               "dateTime": _iso(now - 1), "status": "Scheduled"})
+        dispatcher = PostDispatcher(store, batch_size=5)
+        dispatcher.start()
+        await asyncio.sleep(0.3)
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(scenario())
+
+    assert published == ["wordpress"]
+    assert dispatcher.snapshot()["needs_auth"] == 12
+    assert len(queries) < 10  # the loop sleeps instead of re-querying the same batch
+    assert dispatcher._loaded_until > time.time()
@@ -0,0 +1,62 @@
+import json
+
+from backend.services.post_store import PostStore, normalize_due_time
+
+
+def _post(post_id, date_time="2025-11-20T09:30:00", status="Scheduled"):
+    return {
+        "id": post_id,
+        "platform": "Threads",
+        "content": f"content {post_id}",
+        "dateTime": date_time,
+        "status": status,
+    }
+
+
+def test_post_store_crud_and_due_index(tmp_path):
+    store = PostStore(str(tmp_path / "posts.db"))
+    store.add_post("alice", _post("post-2", "2025-11-21T09:30:00"))
+    store.add_post("alice", _post("post-1", "2025-11-20T09:30:00"))
+    store.add_post("bob", _post("post-3", "2025-11-19T09:30:00"))
+
+    assert [p["id"] for p in store.list_posts("alice")] == ["post-2", "post-1"]
+    assert store.get_post("alice", "post-3") is None
+
+    updated = store.update_post("alice", "post-1", {"status": "Published", "threadsUrl": "u"})
+    assert updated["status"] == "Published" and updated["content"] == "content post-1"
+    assert store.get_post("alice", "post-1")["threadsUrl"] == "u"
+    assert store.update_post("alice", "missing", {"status": "Published"}) is None
+
+    due = store.posts_by_status("Scheduled", due_before=normalize_due_time("2025-11-21T00:00:00"))
+    assert [(p["userId"], p["id"]) for p in due] == [("bob", "post-3")]
+
+    assert store.delete_post("alice", "post-2")
+    assert not store.delete_post("alice", "post-2")
+    assert store.list_posts("alice") == [updated]
+
+
+def test_migrate_json_dir_is_one_shot(tmp_path):
+    legacy = tmp_path / "scheduled_posts"
+    legacy.mkdir()
+    (legacy / "alice.json").write_text(json.dumps([_post("post-1"), _post("post-2")]), encoding="utf-8")
+
+    store = PostStore(str(legacy / "posts.db"))
+    assert store.migrate_json_dir(str(legacy)) == {"files": 1, "posts": 2, "skipped": 0}
+    assert (legacy / "alice.json.migrated").exists()
+    assert store.migrate_json_dir(str(legacy))["files"] == 0
+    assert [p["id"] for p in store.list_posts("alice")] == ["post-1", "post-2"]
+
+
+def test_credentials_are_dropped_once_a_post_is_done(tmp_path):
+    store = PostStore(str(tmp_path / "posts.db"))
+    store.add_post("alice", _post("post-1"), {"access_token": "user-token"})
+    store.add_post("alice", _post("post-2"), {"access_token": "user-token"})
+    assert store.get_credentials("alice", "post-1") == {"access_token": "user-token"}
+
+    store.update_post("alice", "post-1", {"status": "Publishing"})
+    assert store.get_credentials("alice", "post-1") == {"access_token": "user-token"}
+    store.update_post("alice", "post-1", {"status": "Published"})
+    assert store.get_credentials("alice", "post-1") == {}
+
+    store.update_post("alice", "post-2", {"status": "Failed", "error": "Invalid token"})
+    assert store.get_credentials("alice", "post-2") == {}
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from backend.services import publish_jobs as jobs_module
+from backend.services.post_store import PostStore
+from backend.services.publish_jobs import PublishJobs
+from backend.services.publishing import ProviderUnavailable, PublishError
+
+
+def test_publish_jobs_record_progress_and_result(tmp_path, monkeypatch):
+    store = PostStore(str(tmp_path / "posts.db"))
+    seen = {}
+
+    async def fake_publish(user_id, post_id, platform=None, store=None, on_progress=None, **credentials):
+        seen[post_id] = credentials
+        await on_progress(f"publishing to {platform}")
+        await asyncio.sleep(0.05)
+        if post_id == "bad":
+            raise PublishError("Invalid token", 400)
+        return {"post": {"id": post_id, "status": "Published"}, "url": f"https://threads.net/{post_id}"}
+
+    monkeypatch.setattr(jobs_module, "publish_post", fake_publish)
+
+    async def scenario():
+        jobs = PublishJobs(store, workers=2)
+        jobs.start()
+        ok = await jobs.submit("alice", "good", "threads", access_token="token")
+        bad = await jobs.submit("alice", "bad", "threads", access_token="token")
+        await asyncio.sleep(0.01)
+        running = await jobs.get(ok["id"])
+        await jobs._queue.join()
+        await jobs.stop()
+        return jobs, ok["id"], bad["id"], running
+
+    jobs, ok_id, bad_id, running = asyncio.run(scenario())
+
+    assert running["status"] == "running"
+    assert running["progress"] == "publishing to threads"
+    assert "access_token" not in running
+
+    ok = store.get_job(ok_id)
+    assert ok["status"] == "succeeded"
+    assert ok["url"] == "https://threads.net/good"
+    bad = store.get_job(bad_id)
+    assert (bad["status"], bad["status_code"], bad["error"]) == ("failed", 400, "Invalid token")
+    assert seen["good"] == {"access_token": "token"}
+    assert jobs.snapshot()["succeeded"] == 1 and jobs.snapshot()["failed"] == 1
+
+
+def test_publish_jobs_wait_out_an_open_circuit(tmp_path, monkeypatch):
+    store = PostStore(str(tmp_path / "posts.db"))
+    attempts = []
+
+    async def fake_publish(user_id, post_id, platform=None, store=None, on_progress=None, **credentials):
+        attempts.append(post_id)
+        if len(attempts) == 1:
+            raise ProviderUnavailable("threads is unavailable (circuit open), retry in 0s", 0.0)
+        return {"post": {"id": post_id, "status": "Published"}, "url": f"https://threads.net/{post_id}"}
+
+    monkeypatch.setattr(jobs_module, "publish_post", fake_publish)
+
+    async def scenario():
+        jobs = PublishJobs(store, workers=1)
+        jobs.start()
+        held = await jobs.submit("alice", "held", "threads", delay=0.05, access_token="token")
+        await asyncio.sleep(0.01)
+        waiting = await jobs.get(held["id"])
+        deadline = time.time() + 3
+        while (await jobs.get(held["id"]))["status"] != "succeeded" and time.time() < deadline:
+            await asyncio.sleep(0.05)
+        await jobs.stop()
+        return jobs, held["id"], waiting
+
+    jobs, job_id, waiting = asyncio.run(scenario())
+
+    assert (waiting["status"], waiting["progress"]) == ("queued", "waiting for provider")
+    job = store.get_job(job_id)
+    assert job["status"] == "succeeded" and job["deferrals"] == 1
+    assert attempts == ["held", "held"]
+    assert jobs.snapshot()["deferred"] == 2 and jobs.snapshot()["waiting_for_provider"] == 0
@@ -0,0 +1,67 @@
+import asyncio
+
+from backend.services.request_cancel import CancelOnDisconnectMiddleware, DisconnectTracker
+
+
+def _scope(path):
+    return {"type": "http", "method": "POST", "path": path}
+
+
+def _client(disconnect_after):
+    """ASGI receive/send pair for a client that disconnects after `disconnect_after` seconds."""
+    sent = []
+    body = [{"type": "http.request", "body": b"{}", "more_body": False}]
+
+    async def receive():
+        if body:
+            return body.pop()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    return receive, send, sent
+
+
+def test_handler_is_cancelled_when_client_disconnects():
+    tracker = DisconnectTracker()
+    cancelled = []
+
+    async def app(scope, receive, send):
+        assert (await receive())["body"] == b"{}"
+        try:
+            await asyncio.sleep(5)  # a slow model call
+        except asyncio.CancelledError:
+            cancelled.append(scope["path"])
+            raise
+
+    receive, send, sent = _client(disconnect_after=0.01)
+    asyncio.run(CancelOnDisconnectMiddleware(app, tracker)(_scope("/api/chat"), receive, send))
+
+    assert cancelled == ["/api/chat"] and sent == []
+    assert tracker.snapshot()["cancelled"] == 1
+    assert tracker.snapshot()["cancelled_by_route"] == {"POST /api/chat": 1}
+
+
+def test_completed_and_untracked_requests_are_left_alone():
+    tracker = DisconnectTracker()
+
+    async def app(scope, receive, send):
+        await receive()
+        await asyncio.sleep(0.02)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def scenario():
+        middleware = CancelOnDisconnectMiddleware(app, tracker)
+        receive, send, sent = _client(disconnect_after=0.05)
+        await middleware(_scope("/api/generate-content"), receive, send)
+        # Not a model route: never wrapped, even if the client leaves early
+        receive, send, other = _client(disconnect_after=0)
+        await middleware(_scope("/api/scheduled-posts/list"), receive, send)
+        return sent, other
+
+    sent, other = asyncio.run(scenario())
+    assert sent[-1]["body"] == b"ok" and other[-1]["body"] == b"ok"
+    assert tracker.snapshot()["cancelled"] == 0
@@ -0,0 +1,43 @@
+import asyncio
+
+from backend.services.file_store import read_json, update_json
+from backend.services.session_cache import SessionCache
+
+
+def _turn(text):
+    return {"role": "user", "content": text}
+
+
+def test_session_cache_writes_behind_and_keeps_pending_turns(tmp_path):
+    cache = SessionCache(tmp_path, max_sessions=2, flush_interval=60)
+
+    async def scenario():
+        cache.start()
+        cache.append("a", [_turn("one")])
+        cache.append("a", [_turn("two")])
+        assert not (tmp_path / "a.json").exists()  # nothing written yet
+        assert [t["content"] for t in cache.get("a")] == ["one", "two"]
+
+        # Evicting "a" must not lose its unflushed turns
+        cache.get("b")
+        cache.get("c")
+        assert [t["content"] for t in cache.get("a")] == ["one", "two"]
+
+        # Another worker appended on disk; the flush appends rather than overwrites
+        update_json(tmp_path / "a.json", lambda current: current + [_turn("other")], default=[])
+        await cache.stop()
+
+    asyncio.run(scenario())
+
+    assert [t["content"] for t in read_json(tmp_path / "a.json")] == ["other", "one", "two"]
+    assert cache.snapshot()["dirty"] == 0
+    assert cache.stats["evictions"] >= 1
+
+
+def test_session_cache_explicit_history_replaces_and_caps_turns(tmp_path):
+    cache = SessionCache(tmp_path, max_turns=3)
+    cache.append("s", [_turn("old")])
+    cache.append("s", [_turn("new")], base=[_turn("x"), _turn("y"), _turn("z")])
+
+    assert [t["content"] for t in read_json(tmp_path / "s.json")] == ["y", "z", "new"]
+    assert [t["content"] for t in cache.get("s")] == ["y", "z", "new"]
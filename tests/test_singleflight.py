@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from backend.services.singleflight import SingleFlight
+
+
+def test_identical_concurrent_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        if prompt == "bad":
+            raise RuntimeError("upstream failed")
+        return {"text": prompt.upper()}
+
+    async def scenario():
+        same = [flight.do("llm", {"prompt": "hi", "tone": "x"}, lambda: upstream("hi")) for _ in range(5)]
+        reordered = flight.do("llm", {"tone": "x", "prompt": "hi"}, lambda: upstream("hi"))
+        other = flight.do("llm", {"prompt": "bye", "tone": "x"}, lambda: upstream("bye"))
+        results = await asyncio.gather(*same, reordered, other)
+
+        failures = await asyncio.gather(*[flight.do("llm", {"prompt": "bad"}, lambda: upstream("bad"))
+                                          for _ in range(3)], return_exceptions=True)
+        return results, failures
+
+    results, failures = asyncio.run(scenario())
+
+    assert results[:6] == [{"text": "HI"}] * 6
+    assert results[6] == {"text": "BYE"}
+    assert results[0] is not results[1]  # followers get their own copy
+    assert sorted(calls) == ["bad", "bye", "hi"]
+    assert all(isinstance(f, RuntimeError) for f in failures)
+    assert flight.snapshot()["by_upstream"]["llm"] == {"requests": 10, "upstream_calls": 3, "saved_calls": 7,
+                                                       "cancelled_calls": 0}
+    assert flight.snapshot()["in_flight"] == 0
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("image", {"prompt": "cat"}, upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("image", {"prompt": "cat"}, upstream))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_last_waiter_leaving_cancels_upstream_call():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def upstream():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "done"
+
+    async def fast():
+        return "fresh"
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(flight.do("agent", {"prompt": "x"}, upstream)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        # A new identical request starts its own call rather than joining the cancelled one
+        return await flight.do("agent", {"prompt": "x"}, fast)
+
+    assert asyncio.run(scenario()) == "fresh"
+    assert cancelled == [True]
+    assert flight.stats["agent"]["cancelled_calls"] == 1
+    assert flight.snapshot()["in_flight"] == 0
@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+from backend.services.stage_memo import StageMemo, parse_ttls
+from ghostwriter_agent.pipeline import FULL_CYCLE
+
+
+def test_memoized_stages_are_reused_until_invalidated():
+    memo = StageMemo({"trend_watcher": 60, "content_strategist": 60})
+    calls = []
+
+    async def run_agent(agent, prompt, state):
+        calls.append(agent)
+        return f"{agent} output"
+
+    async def cycle(topic, refresh=False):
+        return await FULL_CYCLE.run({"topic": topic, "notes": ""}, run_agent, memo=memo, refresh=refresh)
+
+    asyncio.run(cycle("AI careers"))
+    assert calls.count("trend-watcher") == 1
+
+    calls.clear()
+    second = asyncio.run(cycle("AI careers"))
+    assert "trend-watcher" not in calls and "content-strategist" not in calls
+    assert calls.count("content-creator") == 1
+    assert second["timings"]["trend_watcher"]["status"] == "cached"
+    assert second["outputs"]["content_strategist"] == "content-strategist output"
+
+    calls.clear()
+    asyncio.run(cycle("AI careers", refresh=True))
+    assert "trend-watcher" in calls
+
+    assert memo.invalidate(stage="trend_watcher", topic="Other topic") == 0
+    assert memo.invalidate(topic="AI Careers") == 2
+    calls.clear()
+    asyncio.run(cycle("AI careers"))
+    assert "trend-watcher" in calls
+
+
+def test_freshness_window_expires_entries(monkeypatch):
+    memo = StageMemo(parse_ttls("trend_watcher=10, content_strategist=0"))
+    memo.set("trend_watcher", "prompt", "trends")
+    memo.set("content_strategist", "prompt", "plan")
+    assert memo.get("trend_watcher", "prompt") == "trends"
+    assert memo.get("content_strategist", "prompt") is None
+
+    now = time.time()
+    monkeypatch.setattr("backend.services.stage_memo.time.time", lambda: now + 11)
+    assert memo.get("trend_watcher", "prompt") is None
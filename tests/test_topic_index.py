@@ -0,0 +1,38 @@
+from backend.services.topic_index import TopicIndex
+
+
+def test_topic_index_finds_near_duplicates_only():
+    index = TopicIndex(threshold=0.6)
+    index.add("content", "k1", "AI in healthcare")
+    index.add("content", "k2", "Remote work productivity tips")
+    index.add("agent-cycle", "k3", "AI in healthcare")
+
+    matches = index.query("content", "AI for Healthcare")
+    assert [(key, topic) for _, key, topic in matches] == [("k1", "AI in healthcare")]
+    assert matches[0][0] >= 0.9
+
+    assert index.query("content", "productivity tips for remote workers")[0][1] == "k2"
+    assert index.query("content", "Sourdough baking at home") == []
+    assert index.query("content", "AI in healthcare", exclude_key="k1") == []
+    assert [key for _, key, _ in index.query("agent-cycle", "AI healthcare")] == ["k3"]
+
+
+def test_full_index_evicts_the_oldest_topics():
+    index = TopicIndex(threshold=0.6, max_entries=2)
+    index.add("content", "k1", "AI in healthcare")
+    index.add("content", "k2", "Remote work productivity tips")
+    index.add("content", "k3", "Sourdough baking at home")
+
+    assert [key for _, key, _ in index.query("content", "Sourdough baking at home")] == ["k3"]
+    assert index.query("content", "AI in healthcare") == []
+    assert index.query("content", "Remote work productivity tips")[0][1] == "k2"
+
+    index.add("content", "k2", "Remote work productivity tips")  # re-cached, now the newest
+    index.add("content", "k4", "AI for healthcare")
+    assert index.query("content", "Remote work productivity tips")[0][1] == "k2"
+    assert index.query("content", "Sourdough baking at home") == []
+    assert index.snapshot()["topics"] == 2 and index.snapshot()["evicted"] == 2
+    # Evicted topics are gone from the LSH buckets too
+    bucketed = {entry for buckets in index._buckets for found in buckets.values()
+                for entry in (found if isinstance(found, list) else [found])}
+    assert bucketed == set(index._ids.values())